@@ -11,22 +11,49 @@ import {
 } from "vscode-languageserver";
 import { TextDocument } from "vscode-languageserver-textdocument";
 import {
-  doCompletion,
-  doCompletionResolve,
-  hasCompletionDocumentUri,
-} from "@src/providers/completionProvider.js";
-import { getDefinition } from "@src/providers/definitionProvider.js";
-import { doHover } from "@src/providers/hoverProvider.js";
-import {
-  doSemanticTokens,
   tokenModifiers,
   tokenTypes,
-} from "@src/providers/semanticTokenProvider.js";
-import { doValidate } from "@src/providers/validationProvider.js";
+} from "@src/providers/semanticTokenLegend.js";
 import { SchemaService } from "@src/services/schemaService.js";
 import { ValidationManager } from "@src/services/validationManager.js";
-import { WorkspaceManager } from "@src/services/workspaceManager.js";
-import { getAnsibleMetaData } from "@src/utils/getAnsibleMetaData.js";
+import {
+  DocumentMode,
+  DocumentModeManager,
+} from "@src/services/documentModeManager.js";
+import { ILargeDocumentSettings } from "@src/interfaces/extensionSettings.js";
+import {
+  WorkspaceFolderContext,
+  WorkspaceManager,
+} from "@src/services/workspaceManager.js";
+import {
+  isCancellation,
+  serverCancelled,
+  throwIfCancelled,
+} from "@src/utils/cancellation.js";
+import { lazyImport } from "@src/utils/misc.js";
+import { perfStats } from "@src/utils/perfStats.js";
+
+// Providers pull in the YAML, schema and documentation stacks. They are
+// loaded on first use or during the warm-up, so that `initialize` is answered
+// without waiting for them.
+const loadCompletionProvider = lazyImport(
+  () => import("@src/providers/completionProvider.js"),
+);
+const loadDefinitionProvider = lazyImport(
+  () => import("@src/providers/definitionProvider.js"),
+);
+const loadHoverProvider = lazyImport(
+  () => import("@src/providers/hoverProvider.js"),
+);
+const loadSemanticTokenProvider = lazyImport(
+  () => import("@src/providers/semanticTokenProvider.js"),
+);
+const loadValidationProvider = lazyImport(
+  () => import("@src/providers/validationProvider.js"),
+);
+const loadAnsibleMetaData = lazyImport(
+  () => import("@src/utils/getAnsibleMetaData.js"),
+);
 
 /**
  * Initializes the connection and registers all lifecycle event handlers.
@@ -43,6 +70,11 @@ export class AnsibleLanguageService {
   private workspaceManager: WorkspaceManager;
   private validationManager: ValidationManager;
   private schemaService: SchemaService;
+  private documentModes: DocumentModeManager;
+  /** pending quick validations of documents in reduced mode */
+  private validationTimers = new Map<string, ReturnType<typeof setTimeout>>();
+  /** latest revalidation started per workspace folder */
+  private revalidations = new WeakMap<WorkspaceFolderContext, number>();
 
   constructor(connection: Connection, documents: TextDocuments<TextDocument>) {
     this.connection = connection;
@@ -50,6 +82,7 @@ export class AnsibleLanguageService {
     this.workspaceManager = new WorkspaceManager(connection);
     this.validationManager = new ValidationManager(connection, documents);
     this.schemaService = new SchemaService(connection);
+    this.documentModes = new DocumentModeManager(connection);
   }
 
   public initialize(): void {
@@ -61,6 +94,7 @@ export class AnsibleLanguageService {
     this.connection.onInitialize((params: InitializeParams) => {
       this.workspaceManager.setWorkspaceFolders(params.workspaceFolders || []);
       this.workspaceManager.setCapabilities(params.capabilities);
+      this.startPerfStatsLog(params.initializationOptions);
 
       const result: InitializeResult = {
         capabilities: {
@@ -78,6 +112,7 @@ export class AnsibleLanguageService {
               },
             ],
             full: true,
+            range: true,
             legend: {
               tokenTypes: tokenTypes,
               tokenModifiers: tokenModifiers,
@@ -148,9 +183,45 @@ export class AnsibleLanguageService {
               "will require a server restart to take effect.",
           );
         });
+      this.scheduleWarmUp();
     });
   }
 
+  /**
+   * Loads the providers and the docs library of each workspace folder in the
+   * background, one step at a time and only when no other event is pending,
+   * so that the first hover does not pay for them.
+   */
+  private scheduleWarmUp() {
+    const steps: (() => Thenable<unknown>)[] = [
+      loadValidationProvider,
+      loadSemanticTokenProvider,
+      loadHoverProvider,
+      loadCompletionProvider,
+      loadDefinitionProvider,
+      ...this.workspaceManager.workspaceFolders.map(
+        (folder) => () =>
+          this.workspaceManager.getContext(folder.uri)?.docsLibrary ??
+          Promise.resolve(),
+      ),
+    ];
+    const runNextStep = () => {
+      const step = steps.shift();
+      if (step) {
+        step().then(
+          () => setImmediate(runNextStep),
+          (error: unknown) => {
+            this.connection.console.log(
+              `Warm-up step failed: ${error instanceof Error ? error.message : String(error)}`,
+            );
+            setImmediate(runNextStep);
+          },
+        );
+      }
+    };
+    setImmediate(runNextStep);
+  }
+
   private registerLifecycleEventHandlers() {
     this.connection.onDidChangeConfiguration(async (params) => {
       try {
@@ -162,6 +233,18 @@ export class AnsibleLanguageService {
       }
     });
 
+    this.workspaceManager.onSettingsChanged("validation", (context) => {
+      void this.revalidateDocuments(context);
+    });
+    this.workspaceManager.onSettingsChanged("documentModes", (context) => {
+      for (const document of this.getOpenDocuments(context)) {
+        this.documentModes.resetMode(document.uri);
+      }
+    });
+
+    // Custom request handler exposing latency and cache statistics
+    this.connection.onRequest("ansible/perfStats", () => perfStats.snapshot());
+
     // Custom request handler for configuration refresh with immediate cache clearing
     this.connection.onRequest(
       "ansible/refreshConfiguration",
@@ -172,7 +255,7 @@ export class AnsibleLanguageService {
             await context.documentSettings.handleConfigurationChanged({
               settings: null,
             });
-            context.clearCachedServices();
+            context.invalidateServices(["environment"]);
           });
           return { success: true };
         } catch (error) {
@@ -183,9 +266,11 @@ export class AnsibleLanguageService {
     );
 
     this.documents.onDidOpen(async (e) => {
+      const stopTimer = perfStats.startTimer("validation/full");
       try {
         const context = this.workspaceManager.getContext(e.document.uri);
         if (context) {
+          const { doValidate } = await loadValidationProvider();
           // perform full validation
           await doValidate(
             e.document,
@@ -198,12 +283,17 @@ export class AnsibleLanguageService {
         }
       } catch (error) {
         this.handleError(error, "onDidOpen");
+      } finally {
+        stopTimer();
       }
     });
 
     this.documents.onDidClose((e) => {
       try {
         this.validationManager.handleDocumentClosed(e.document.uri);
+        this.documentModes.handleDocumentClosed(e.document.uri);
+        clearTimeout(this.validationTimers.get(e.document.uri));
+        this.validationTimers.delete(e.document.uri);
         const context = this.workspaceManager.getContext(e.document.uri);
         if (context) {
           context.documentSettings.handleDocumentClosed(e.document.uri);
@@ -224,9 +314,11 @@ export class AnsibleLanguageService {
     });
 
     this.documents.onDidSave(async (e) => {
+      const stopTimer = perfStats.startTimer("validation/full");
       try {
         const context = this.workspaceManager.getContext(e.document.uri);
         if (context) {
+          const { doValidate } = await loadValidationProvider();
           // perform full validation
           await doValidate(
             e.document,
@@ -239,6 +331,8 @@ export class AnsibleLanguageService {
         }
       } catch (error) {
         this.handleError(error, "onDidSave");
+      } finally {
+        stopTimer();
       }
     });
 
@@ -254,21 +348,33 @@ export class AnsibleLanguageService {
     });
 
     this.documents.onDidChangeContent(async (e) => {
+      const uri = e.document.uri;
       try {
-        await doValidate(
-          e.document,
-          this.validationManager,
-          true,
-          this.workspaceManager.getContext(e.document.uri),
-          this.connection,
-          this.schemaService,
-        );
+        const settings = await this.getLargeDocumentSettings(uri);
+        const mode = this.documentModes.getMode(e.document, settings);
+        clearTimeout(this.validationTimers.get(uri));
+        if (mode === "reduced" && settings) {
+          // validate once typing pauses
+          this.validationTimers.set(
+            uri,
+            setTimeout(() => {
+              this.validationTimers.delete(uri);
+              const document = this.documents.get(uri);
+              if (document) {
+                void this.validateQuickly(document, mode);
+              }
+            }, settings.validationDelay),
+          );
+        } else {
+          await this.validateQuickly(e.document, mode);
+        }
       } catch (error) {
         this.handleError(error, "onDidChangeContent");
       }
     });
 
-    this.connection.languages.semanticTokens.on(async (params) => {
+    this.connection.languages.semanticTokens.on(async (params, token) => {
+      const stopTimer = perfStats.startTimer("semanticTokens");
       try {
         const document = this.documents.get(params.textDocument.uri);
         if (document) {
@@ -276,18 +382,32 @@ export class AnsibleLanguageService {
             params.textDocument.uri,
           );
           if (context) {
-            return await doSemanticTokens(document, await context.docsLibrary);
+            const settings = await this.getLargeDocumentSettings(document.uri);
+            if (this.documentModes.getMode(document, settings) === "reduced") {
+              // the client falls back to requesting the visible range
+              throw serverCancelled("Document is handled in reduced mode");
+            }
+            const { doSemanticTokens } = await loadSemanticTokenProvider();
+            const docsLibrary = await context.docsLibrary;
+            throwIfCancelled(token);
+            return await doSemanticTokens(document, docsLibrary, token);
           }
         }
       } catch (error) {
+        if (isCancellation(error)) {
+          throw error;
+        }
         this.handleError(error, "onSemanticTokens");
+      } finally {
+        stopTimer();
       }
       return {
         data: [],
       };
     });
 
-    this.connection.onHover(async (params) => {
+    this.connection.languages.semanticTokens.onRange(async (params, token) => {
+      const stopTimer = perfStats.startTimer("semanticTokens/range");
       try {
         const document = this.documents.get(params.textDocument.uri);
         if (document) {
@@ -295,20 +415,58 @@ export class AnsibleLanguageService {
             params.textDocument.uri,
           );
           if (context) {
-            return await doHover(
+            const { doSemanticTokens } = await loadSemanticTokenProvider();
+            const docsLibrary = await context.docsLibrary;
+            throwIfCancelled(token);
+            return await doSemanticTokens(
               document,
-              params.position,
-              await context.docsLibrary,
+              docsLibrary,
+              token,
+              params.range,
             );
           }
         }
       } catch (error) {
+        if (isCancellation(error)) {
+          throw error;
+        }
+        this.handleError(error, "onSemanticTokensRange");
+      } finally {
+        stopTimer();
+      }
+      return {
+        data: [],
+      };
+    });
+
+    this.connection.onHover(async (params, token) => {
+      const stopTimer = perfStats.startTimer("hover");
+      try {
+        const document = this.documents.get(params.textDocument.uri);
+        if (document) {
+          const context = this.workspaceManager.getContext(
+            params.textDocument.uri,
+          );
+          if (context) {
+            const { doHover } = await loadHoverProvider();
+            const docsLibrary = await context.docsLibrary;
+            throwIfCancelled(token);
+            return await doHover(document, params.position, docsLibrary, token);
+          }
+        }
+      } catch (error) {
+        if (isCancellation(error)) {
+          throw error;
+        }
         this.handleError(error, "onHover");
+      } finally {
+        stopTimer();
       }
       return null;
     });
 
-    this.connection.onCompletion(async (params) => {
+    this.connection.onCompletion(async (params, token) => {
+      const stopTimer = perfStats.startTimer("completion");
       try {
         const document = this.documents.get(params.textDocument.uri);
         if (document) {
@@ -316,37 +474,53 @@ export class AnsibleLanguageService {
             params.textDocument.uri,
           );
           if (context) {
-            return await doCompletion(
+            const { doCompletionList } = await loadCompletionProvider();
+            return await doCompletionList(
               document,
               params.position,
               context,
               this.schemaService,
+              token,
             );
           }
         }
       } catch (error) {
+        if (isCancellation(error)) {
+          throw error;
+        }
         this.handleError(error, "onCompletion");
+      } finally {
+        stopTimer();
       }
       return null;
     });
 
-    this.connection.onCompletionResolve(async (completionItem) => {
+    this.connection.onCompletionResolve(async (completionItem, token) => {
+      const stopTimer = perfStats.startTimer("completionResolve");
       try {
+        const { doCompletionResolve, hasCompletionDocumentUri } =
+          await loadCompletionProvider();
         if (hasCompletionDocumentUri(completionItem.data)) {
           const context = this.workspaceManager.getContext(
             completionItem.data.documentUri,
           );
           if (context) {
-            return await doCompletionResolve(completionItem, context);
+            return await doCompletionResolve(completionItem, context, token);
           }
         }
       } catch (error) {
+        if (isCancellation(error)) {
+          throw error;
+        }
         this.handleError(error, "onCompletionResolve");
+      } finally {
+        stopTimer();
       }
       return completionItem;
     });
 
-    this.connection.onDefinition(async (params) => {
+    this.connection.onDefinition(async (params, token) => {
+      const stopTimer = perfStats.startTimer("definition");
       try {
         const document = this.documents.get(params.textDocument.uri);
         if (document) {
@@ -354,31 +528,38 @@ export class AnsibleLanguageService {
             params.textDocument.uri,
           );
           if (context) {
+            const { getDefinition } = await loadDefinitionProvider();
+            const docsLibrary = await context.docsLibrary;
+            throwIfCancelled(token);
             return await getDefinition(
               document,
               params.position,
-              await context.docsLibrary,
+              docsLibrary,
+              token,
             );
           }
         }
       } catch (error) {
+        if (isCancellation(error)) {
+          throw error;
+        }
         this.handleError(error, "onDefinition");
+      } finally {
+        stopTimer();
       }
       return null;
     });
 
     // Custom actions that are performed on receiving special notifications from the client
-    // Resync ansible inventory service by clearing the cached items
+    // Resync ansible inventory service by re-running ansible-inventory
     this.connection.onNotification("resync/ansible-inventory", async () => {
       await this.workspaceManager.forEachContext((e) => {
-        // Invalidate ansible inventory cache
-        e.clearAnsibleInventory();
         this.connection.window.showInformationMessage(
           "Re-syncing ansible inventory. This might take some time.",
         );
 
-        // Run the ansible inventory service
-        e.ansibleInventory.then(() => {
+        // Run the ansible inventory service, bypassing the persisted hosts
+        void e.refreshAnsibleInventory().then(() => {
           this.connection.window.showInformationMessage(
             "Ansible Inventory re-synced.",
           );
@@ -392,6 +573,7 @@ export class AnsibleLanguageService {
       async (activeFileUri: string) => {
         const ctx = this.workspaceManager.getContext(activeFileUri);
         if (ctx !== undefined) {
+          const { getAnsibleMetaData } = await loadAnsibleMetaData();
           const ansibleMetaData = await getAnsibleMetaData(
             ctx,
             this.connection,
@@ -404,6 +586,93 @@ export class AnsibleLanguageService {
     );
   }
 
+  /**
+   * Runs the quick validation of the document and records its cost, the time
+   * spent parsing and checking it. In reduced mode, schemas are only checked
+   * on open and save.
+   */
+  private async validateQuickly(document: TextDocument, mode: DocumentMode) {
+    try {
+      const { doValidate } = await loadValidationProvider();
+      const stopTimer = perfStats.startTimer("validation/quick");
+      try {
+        await doValidate(
+          document,
+          this.validationManager,
+          true,
+          this.workspaceManager.getContext(document.uri),
+          this.connection,
+          mode === "full" ? this.schemaService : undefined,
+          (duration) => this.documentModes.recordCost(document.uri, duration),
+        );
+      } finally {
+        stopTimer();
+      }
+    } catch (error) {
+      this.handleError(error, "onDidChangeContent");
+    }
+  }
+
+  /**
+   * Validates again the open documents of the workspace folder, whose
+   * validation settings have changed. Documents are validated one at a time,
+   * not to run many linters at once, and a later change of the settings
+   * supersedes the revalidation in progress.
+   */
+  private async revalidateDocuments(context: WorkspaceFolderContext) {
+    const generation = (this.revalidations.get(context) ?? 0) + 1;
+    this.revalidations.set(context, generation);
+    try {
+      const { doValidate } = await loadValidationProvider();
+      for (const document of this.getOpenDocuments(context)) {
+        if (this.revalidations.get(context) !== generation) {
+          return;
+        }
+        await doValidate(
+          document,
+          this.validationManager,
+          false,
+          context,
+          this.connection,
+          this.schemaService,
+        );
+      }
+    } catch (error) {
+      this.handleError(error, "onSettingsChanged");
+    }
+  }
+
+  private getOpenDocuments(context: WorkspaceFolderContext): TextDocument[] {
+    return this.documents
+      .all()
+      .filter(
+        (document) =>
+          this.workspaceManager.getContext(document.uri) === context,
+      );
+  }
+
+  private async getLargeDocumentSettings(
+    uri: string,
+  ): Promise<ILargeDocumentSettings | undefined> {
+    const context = this.workspaceManager.getContext(uri);
+    return (await context?.documentSettings.get(uri))?.largeDocuments;
+  }
+
+  /**
+   * Logs a digest of the performance statistics periodically, if requested
+   * by the `perfStatsLogInterval` initialization option (in seconds).
+   */
+  private startPerfStatsLog(initializationOptions: unknown) {
+    const interval = (
+      initializationOptions as { perfStatsLogInterval?: unknown } | undefined
+    )?.perfStatsLogInterval;
+    if (typeof interval === "number" && interval > 0) {
+      setInterval(() => {
+        this.connection.console.log(`[perfStats] ${perfStats.format()}`);
+      }, interval * 1000).unref();
+    }
+  }
+
   private handleError(error: unknown, contextName: string) {
     const leadMessage = `An error occurred in '${contextName}' handler: `;
     if (error instanceof Error) {
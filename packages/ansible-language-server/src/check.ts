@@ -0,0 +1,195 @@
+import * as fs from "node:fs";
+import * as os from "node:os";
+import * as path from "node:path";
+import { Diagnostic, DiagnosticSeverity } from "vscode-languageserver";
+import { URI } from "vscode-uri";
+import { checkFile, ICheckTask } from "@src/providers/validationProvider.js";
+import { SchemaService } from "@src/services/schemaService.js";
+import { resolveWorkerScript, WorkerPool } from "@src/utils/workerPool.js";
+
+declare const PACKAGE_VERSION: string;
+
+export type CheckFormat = "json" | "sarif";
+
+export interface ICheckResult {
+  /** path of the file, relative to the working directory */
+  path: string;
+  diagnostics: Diagnostic[];
+  /** reason why the file could not be checked */
+  error?: string;
+}
+
+const YAML_EXTENSIONS = new Set([".yml", ".yaml"]);
+
+/**
+ * Lists the YAML files found under the given paths. Files given explicitly
+ * are kept whatever their extension, hidden directories and node_modules are
+ * skipped.
+ */
+export function collectFiles(paths: string[]): string[] {
+  const files = new Set<string>();
+  const visit = (filePath: string, explicit: boolean) => {
+    if (fs.statSync(filePath).isDirectory()) {
+      for (const entry of fs.readdirSync(filePath).sort()) {
+        if (!entry.startsWith(".") && entry !== "node_modules") {
+          visit(path.join(filePath, entry), false);
+        }
+      }
+    } else if (explicit || YAML_EXTENSIONS.has(path.extname(filePath))) {
+      files.add(path.resolve(filePath));
+    }
+  };
+  for (const filePath of paths) {
+    visit(filePath, true);
+  }
+  return [...files];
+}
+
+/**
+ * Validates the files in parallel, on worker threads when running from the
+ * compiled server. Schemas are fetched once and shared by all files.
+ */
+export async function checkFiles(files: string[]): Promise<ICheckResult[]> {
+  const schemaService = new SchemaService(null);
+  const scriptPath = resolveWorkerScript("checkWorker");
+  const pool = scriptPath
+    ? new WorkerPool<ICheckTask, Diagnostic[]>(
+        scriptPath,
+        os.availableParallelism(),
+      )
+    : undefined;
+  try {
+    return await Promise.all(
+      files.map(async (filePath) => {
+        const result: ICheckResult = {
+          path: path.relative(process.cwd(), filePath),
+          diagnostics: [],
+        };
+        try {
+          const task: ICheckTask = {
+            path: filePath,
+            schema: await schemaService.getSchemaForUri(
+              URI.file(filePath).toString(),
+            ),
+          };
+          result.diagnostics = await (pool ? pool.run(task) : checkFile(task));
+        } catch (error) {
+          result.error = error instanceof Error ? error.message : String(error);
+        }
+        return result;
+      }),
+    );
+  } finally {
+    pool?.dispose();
+  }
+}
+
+/**
+ * Renders the results in JSON or in SARIF, the format understood by code
+ * scanning tools.
+ */
+export function formatResults(
+  results: ICheckResult[],
+  format: CheckFormat,
+): string {
+  if (format === "json") {
+    return JSON.stringify(
+      results.filter((r) => r.error || r.diagnostics.length > 0),
+      null,
+      2,
+    );
+  }
+  const sarifResults = results.flatMap((result) => {
+    const artifactLocation = {
+      uri: result.path.split(path.sep).join("/"),
+      uriBaseId: "SRCROOT",
+    };
+    if (result.error) {
+      return [
+        {
+          ruleId: "check-error",
+          level: "error",
+          message: { text: result.error },
+          locations: [{ physicalLocation: { artifactLocation } }],
+        },
+      ];
+    }
+    return result.diagnostics.map((diagnostic) => ({
+      ruleId: diagnostic.code
+        ? `${diagnostic.source}/${diagnostic.code}`
+        : diagnostic.source,
+      level: getSarifLevel(diagnostic.severity),
+      message: { text: diagnostic.message },
+      locations: [
+        {
+          physicalLocation: {
+            artifactLocation,
+            region: {
+              startLine: diagnostic.range.start.line + 1,
+              startColumn: diagnostic.range.start.character + 1,
+              endLine: diagnostic.range.end.line + 1,
+              endColumn: diagnostic.range.end.character + 1,
+            },
+          },
+        },
+      ],
+    }));
+  });
+  return JSON.stringify(
+    {
+      $schema: "https://json.schemastore.org/sarif-2.1.0.json",
+      version: "2.1.0",
+      runs: [
+        {
+          tool: {
+            driver: {
+              name: "ansible-language-server",
+              version: PACKAGE_VERSION,
+              informationUri: "https://github.com/ansible/vscode-ansible",
+            },
+          },
+          originalUriBaseIds: {
+            SRCROOT: { uri: `${URI.file(process.cwd()).toString()}/` },
+          },
+          results: sarifResults,
+        },
+      ],
+    },
+    null,
+    2,
+  );
+}
+
+function getSarifLevel(severity: DiagnosticSeverity | undefined): string {
+  switch (severity) {
+    case DiagnosticSeverity.Warning:
+      return "warning";
+    case DiagnosticSeverity.Information:
+    case DiagnosticSeverity.Hint:
+      return "note";
+    default:
+      return "error";
+  }
+}
+
+/**
+ * Checks the files under the given paths and prints the results.
+ * @returns 1 when an error has been found, 0 otherwise
+ */
+export async function runCheck(
+  paths: string[],
+  format: CheckFormat,
+): Promise<number> {
+  const results = await checkFiles(collectFiles(paths));
+  console.log(formatResults(results, format));
+  const failed = results.some(
+    (result) =>
+      result.error ||
+      result.diagnostics.some(
+        (diagnostic) =>
+          (diagnostic.severity ?? DiagnosticSeverity.Error) ===
+          DiagnosticSeverity.Error,
+      ),
+  );
+  return failed ? 1 : 0;
+}
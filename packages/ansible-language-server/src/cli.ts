@@ -40,6 +40,24 @@ export async function run(argv: string[]): Promise<number> {
     return 0;
   }
 
+  if (args.has("--check")) {
+    const paths = takeValues(argv, "--check");
+    const format = takeValues(argv, "--format")[0] ?? "json";
+    if (paths.length === 0 || (format !== "json" && format !== "sarif")) {
+      console.error(
+        "Usage: ansible-language-server --check <paths...> [--format json|sarif]",
+      );
+      return 1;
+    }
+    try {
+      const { runCheck } = await import("@src/check");
+      return await runCheck(paths, format);
+    } catch (err: unknown) {
+      console.error(err);
+      return 1;
+    }
+  }
+
   try {
     await import("./server.js");
   } catch (err: unknown) {
@@ -50,6 +68,20 @@ export async function run(argv: string[]): Promise<number> {
   return 0;
 }
 
+/**
+ * Returns the arguments following the given flag, up to the next flag.
+ */
+function takeValues(argv: string[], flag: string): string[] {
+  const values: string[] = [];
+  for (const arg of argv.slice(argv.indexOf(flag) + 1)) {
+    if (arg.startsWith("--")) {
+      break;
+    }
+    values.push(arg);
+  }
+  return argv.includes(flag) ? values : [];
+}
+
 /** Canonical path of this module (src/cli.ts or dist/cli.cjs depending on build). */
 const thisModulePath = fileURLToPath(import.meta.url);
 const entryArg = process.argv[1] ? path.resolve(process.argv[1]) : "";
@@ -62,15 +94,18 @@ if (isDirectRun) {
   void run(process.argv.slice(2))
     .then((code) => {
       // Failures always exit. Success exits only for short-lived flag handlers
-      // (--version / --generate-docs). After LSP server import, open handles
-      // keep the process alive — calling process.exit(0) would kill the server.
+      // (--version / --generate-docs / --check). After LSP server import,
+      // open handles keep the process alive — calling process.exit(0) would
+      // kill the server.
       if (code !== 0) {
         process.exit(code);
         return;
       }
       const argv = process.argv.slice(2);
       const startedServer =
-        !argv.includes("--version") && !argv.includes("--generate-docs");
+        !argv.includes("--version") &&
+        !argv.includes("--generate-docs") &&
+        !argv.includes("--check");
       if (!startedServer) {
         process.exit(0);
       }
@@ -15,6 +15,7 @@ interface ExtensionSettingsType {
     | ExtensionSettingsType
     | string
     | boolean
+    | number
     | string[]
     | IContainerEngine
     | IPullPolicy
@@ -30,6 +31,11 @@ export interface ExtensionSettings extends ExtensionSettingsType {
     provideRedirectModules: boolean;
     provideModuleOptionAliases: boolean;
   };
+  inventory: {
+    refreshInterval: number;
+    timeout: number;
+  };
+  largeDocuments: ILargeDocumentSettings;
   validation: {
     enabled: boolean;
     lint: {
@@ -50,6 +56,12 @@ export interface ExtensionSettings extends ExtensionSettingsType {
   python: { interpreterPath: string; activationScript: string };
 }
 
+export interface ILargeDocumentSettings {
+  lineThreshold: number;
+  costThreshold: number;
+  validationDelay: number;
+}
+
 export interface IVolumeMounts {
   src: string;
   dest: string;
@@ -62,7 +74,7 @@ export interface IVolumeMounts {
 export interface SettingsEntry {
   [name: string]:
     | {
-        default: string | boolean;
+        default: string | boolean | number;
         description: string;
       }
     | SettingsEntry
@@ -96,6 +108,8 @@ export interface ExtensionSettingsWithDescriptionBase {
 export interface ExtensionSettingsWithDescription extends ExtensionSettingsWithDescriptionBase {
   ansible: AnsibleSettingsWithDescription;
   completion: CompletionSettingsWithDescription;
+  inventory: InventorySettingsWithDescription;
+  largeDocuments: LargeDocumentSettingsWithDescription;
   validation: ValidationSettingsWithDescription;
   executionEnvironment: ExecutionEnvironmentSettingsWithDescription;
   python: PythonSettingsWithDescription;
@@ -140,6 +154,38 @@ interface CompletionSettingsWithDescription extends SettingsEntry {
   };
 }
 
+/**
+ * Interface for inventory settings
+ */
+interface InventorySettingsWithDescription extends SettingsEntry {
+  refreshInterval: {
+    default: number;
+    description: string;
+  };
+  timeout: {
+    default: number;
+    description: string;
+  };
+}
+
+/**
+ * Interface for large document settings
+ */
+interface LargeDocumentSettingsWithDescription extends SettingsEntry {
+  lineThreshold: {
+    default: number;
+    description: string;
+  };
+  costThreshold: {
+    default: number;
+    description: string;
+  };
+  validationDelay: {
+    default: number;
+    description: string;
+  };
+}
+
 /**
  * Interface for validation settings
  */
@@ -2,6 +2,13 @@ import { YAMLError } from "yaml";
 
 export type IDescription = string | Array<unknown>;
 
+/**
+ * How much of the documentation of a module is loaded: only what is needed to
+ * recognize its options (names, types, aliases, etc.), or everything,
+ * including the descriptions rendered for the user.
+ */
+export type IDocumentationDetail = "options" | "full";
+
 export interface IModuleDocumentation {
   module: string;
   shortDescription?: IDescription;
@@ -24,6 +31,7 @@ export interface IModuleMetadata {
   name: string;
   rawDocumentationFragments: Map<string, Record<string, unknown>>;
   documentation?: IModuleDocumentation;
+  documentationDetail?: IDocumentationDetail;
   fragments?: IModuleMetadata[];
   errors: YAMLError[];
 }
@@ -1,7 +1,9 @@
 import { EOL } from "node:os";
 import {
+  CancellationToken,
   CompletionItem,
   CompletionItemKind,
+  CompletionList,
   InsertTextFormat,
   MarkupContent,
   Range,
@@ -11,6 +13,8 @@ import { Position, TextDocument } from "vscode-languageserver-textdocument";
 import { isNode, isScalar, Node, YAMLMap } from "yaml";
 import { IOption } from "@src/interfaces/module.js";
 import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
+import type { DocsLibrary } from "@src/services/docsLibrary.js";
+import { matchesModuleFilter } from "@src/services/moduleCatalog.js";
 import { SchemaService } from "@src/services/schemaService.js";
 import { SchemaCompleter } from "@src/services/schemaCompleter.js";
 import {
@@ -24,8 +28,10 @@ import {
   formatModule,
   formatOption,
   getDetails,
+  getRenderedDocs,
 } from "@src/utils/docsFormatter.js";
-import { insert, toLspRange } from "@src/utils/misc.js";
+import { throwIfCancelled } from "@src/utils/cancellation.js";
+import { getFileStamp, toLspRange } from "@src/utils/misc.js";
 import {
   AncestryBuilder,
   findProvidedModule,
@@ -37,7 +43,8 @@ import {
   isPlayParam,
   isRoleParam,
   isTaskParam,
-  parseAllDocuments,
+  parseScopeAt,
+  getOptionsContextForPath,
   getPossibleOptionsForPath,
   isCursorInsideJinjaBrackets,
   isPlaybook,
@@ -117,6 +124,140 @@ const priorityMap = {
   choice: 2,
 };
 
+/**
+ * Maximum number of module names returned by {@link doCompletionList}. Longer
+ * lists are narrowed to the best matches of what is typed and marked as
+ * incomplete, so that the client asks again as the user keeps typing.
+ */
+const MODULE_COMPLETION_LIMIT = 200;
+
+/**
+ * Module completion items of a docs library, without the parts depending on
+ * the document and the cursor, built once per generation of the library.
+ */
+interface IModuleCompletionCache {
+  generation: number;
+  useFqcn: boolean;
+  items: Map<string, CompletionItem>;
+  /** set of modules last ranked, and its items sorted by sortText */
+  rankedFqcns?: Set<string>;
+  rankedItems?: CompletionItem[];
+}
+
+const moduleCompletionCaches = new WeakMap<
+  DocsLibrary,
+  IModuleCompletionCache
+>();
+
+function getModuleCompletionCache(
+  docsLibrary: DocsLibrary,
+  useFqcn: boolean,
+): IModuleCompletionCache {
+  let cache = moduleCompletionCaches.get(docsLibrary);
+  if (
+    !cache ||
+    cache.generation !== docsLibrary.generation ||
+    cache.useFqcn !== useFqcn
+  ) {
+    cache = { generation: docsLibrary.generation, useFqcn, items: new Map() };
+    moduleCompletionCaches.set(docsLibrary, cache);
+  }
+  return cache;
+}
+
+function getModuleCompletionItem(
+  cache: IModuleCompletionCache,
+  docsLibrary: DocsLibrary,
+  moduleFqcn: string,
+): CompletionItem {
+  let item = cache.items.get(moduleFqcn);
+  if (!item) {
+    let priority, kind;
+    if (docsLibrary.getModuleRoute(moduleFqcn)?.redirect) {
+      priority = priorityMap.redirectedModuleName;
+      kind = CompletionItemKind.Reference;
+    } else {
+      priority = priorityMap.moduleName;
+      kind = CompletionItemKind.Class;
+    }
+    const [namespace, collection, name] = moduleFqcn.split(".");
+    item = {
+      label: cache.useFqcn ? moduleFqcn : name,
+      kind: kind,
+      detail: `${namespace}.${collection}`,
+      sortText: cache.useFqcn
+        ? `${priority}_${moduleFqcn}`
+        : `${priority}_${name}`,
+      filterText: cache.useFqcn
+        ? `${name} ${moduleFqcn} ${collection} ${namespace}` // name should have highest priority (in case of FQCN)
+        : `${name} ${moduleFqcn}`, // name should have priority (in case of no FQCN)
+      data: { moduleFqcn: moduleFqcn },
+    };
+    cache.items.set(moduleFqcn, item);
+  }
+  return item;
+}
+
+function compareSortText(a: CompletionItem, b: CompletionItem): number {
+  const aText = a.sortText ?? "";
+  const bText = b.sortText ?? "";
+  return aText < bText ? -1 : aText > bText ? 1 : 0;
+}
+
+/**
+ * Picks the best module completion items for what is typed so far: exact
+ * matches, then modules whose name or FQCN starts with it, then fuzzy matches
+ * of their filter text, each ranked by sortText, i.e. modules before
+ * redirects and shorter names before longer ones.
+ */
+function selectModuleCompletionItems(
+  cache: IModuleCompletionCache,
+  docsLibrary: DocsLibrary,
+  moduleFqcns: Set<string>,
+  prefixFqcns: string[],
+  prefix: string,
+  limit: number,
+  isOffered: (item: CompletionItem) => boolean,
+): CompletionItem[] {
+  const key = prefix.toLowerCase();
+  const exactItems: CompletionItem[] = [];
+  const prefixItems: CompletionItem[] = [];
+  for (const moduleFqcn of prefixFqcns) {
+    const item = getModuleCompletionItem(cache, docsLibrary, moduleFqcn);
+    if (isOffered(item)) {
+      (item.label.toLowerCase() === key ? exactItems : prefixItems).push(item);
+    }
+  }
+  const selected = [...exactItems, ...prefixItems.sort(compareSortText)];
+  if (selected.length < limit) {
+    // all the modules are ranked once per generation, the scan stops as soon
+    // as enough of them match
+    if (cache.rankedFqcns !== moduleFqcns || !cache.rankedItems) {
+      cache.rankedItems = [...moduleFqcns]
+        .map((moduleFqcn) =>
+          getModuleCompletionItem(cache, docsLibrary, moduleFqcn),
+        )
+        .sort(compareSortText);
+      cache.rankedFqcns = moduleFqcns;
+    }
+    const found = new Set(prefixFqcns);
+    for (const item of cache.rankedItems) {
+      if (selected.length >= limit) {
+        break;
+      }
+      const moduleFqcn = (item.data as { moduleFqcn: string }).moduleFqcn;
+      if (
+        !found.has(moduleFqcn) &&
+        isOffered(item) &&
+        matchesModuleFilter(item.filterText ?? item.label, prefix)
+      ) {
+        selected.push(item);
+      }
+    }
+  }
+  return selected.slice(0, limit);
+}
+
 let dummyMappingCharacter: string;
 let isAnsiblePlaybook: boolean;
 
@@ -129,6 +270,47 @@ export async function doCompletion(
   context: WorkspaceFolderContext,
   schemaService?: SchemaService,
 ): Promise<CompletionItem[]> {
+  const completion = await getCompletion(
+    document,
+    position,
+    context,
+    schemaService,
+  );
+  return Array.isArray(completion) ? completion : completion.items;
+}
+
+/**
+ * Same as {@link doCompletion}, except that only the best matches of the
+ * text typed so far are returned when there are too many module names.
+ */
+export async function doCompletionList(
+  document: TextDocument,
+  position: Position,
+  context: WorkspaceFolderContext,
+  schemaService?: SchemaService,
+  token?: CancellationToken,
+): Promise<CompletionList> {
+  const completion = await getCompletion(
+    document,
+    position,
+    context,
+    schemaService,
+    MODULE_COMPLETION_LIMIT,
+    token,
+  );
+  return Array.isArray(completion)
+    ? CompletionList.create(completion, false)
+    : completion;
+}
+
+async function getCompletion(
+  document: TextDocument,
+  position: Position,
+  context: WorkspaceFolderContext,
+  schemaService?: SchemaService,
+  moduleLimit?: number,
+  token?: CancellationToken,
+): Promise<CompletionItem[] | CompletionList> {
   // Check for schema-based completions first (for meta/main.yml, etc.)
   if (schemaService && schemaService.shouldValidateWithSchema(document)) {
     const schemaCompletions = await getSchemaCompletions(
@@ -143,7 +325,6 @@ export async function doCompletion(
 
   isAnsiblePlaybook = isPlaybook(document);
 
-  let preparedText = document.getText();
   const offset = document.offsetAt(position);
 
   // HACK: We need to insert a dummy mapping, so that the YAML parser can properly recognize the scope.
@@ -168,10 +349,11 @@ export async function doCompletion(
     dummyMappingCharacter = "__";
   }
 
-  preparedText = insert(preparedText, offset, dummyMappingCharacter);
-  const yamlDocs = parseAllDocuments(preparedText);
+  // only the play or task around the cursor is parsed
+  const yamlDocs = parseScopeAt(document, offset, dummyMappingCharacter);
 
   const extensionSettings = await context.documentSettings.get(document.uri);
+  throwIfCancelled(token);
 
   const useFqcn = extensionSettings.ansible.useFullyQualifiedCollectionNames;
   const provideRedirectModulesCompletion =
@@ -186,6 +368,7 @@ export async function doCompletion(
     const node = path[path.length - 1];
     if (node) {
       const docsLibrary = await context.docsLibrary;
+      throwIfCancelled(token);
 
       const isPlay = isPlayParam(path);
       if (isPlay) {
@@ -223,6 +406,7 @@ export async function doCompletion(
         // incidentally, the hack mentioned above prevents finding a module in
         // case the cursor is on it
         const module = await findProvidedModule(path, document, docsLibrary);
+        throwIfCancelled(token);
         if (!module) {
           // offer the 'block' keyword (as it is not one of taskKeywords)
           completionItems.push(
@@ -251,25 +435,46 @@ export async function doCompletion(
           );
 
           // offer modules
-          const moduleCompletionItems = [
-            ...(await docsLibrary.getModuleFqcns(document.uri)),
-          ]
-            .filter(
-              (moduleFqcn) =>
-                provideRedirectModulesCompletion ||
-                !docsLibrary.getModuleRoute(moduleFqcn)?.redirect,
-            )
-            .map((moduleFqcn): CompletionItem => {
-              let priority, kind;
-              if (docsLibrary.getModuleRoute(moduleFqcn)?.redirect) {
-                priority = priorityMap.redirectedModuleName;
-                kind = CompletionItemKind.Reference;
-              } else {
-                priority = priorityMap.moduleName;
-                kind = CompletionItemKind.Class;
-              }
-              const [namespace, collection, name] = moduleFqcn.split(".");
-              const insertName = useFqcn ? moduleFqcn : name;
+          const prefix = nodeRange
+            ? document.getText({ start: nodeRange.start, end: position })
+            : "";
+          const moduleFqcns = await docsLibrary.getModuleFqcns(document.uri);
+          throwIfCancelled(token);
+          const cache = getModuleCompletionCache(docsLibrary, useFqcn);
+          // redirects are offered as references
+          const isOffered = (item: CompletionItem) =>
+            provideRedirectModulesCompletion ||
+            item.kind !== CompletionItemKind.Reference;
+          let offeredItems: CompletionItem[];
+          let isIncomplete = false;
+          if (moduleLimit === undefined || moduleFqcns.size <= moduleLimit) {
+            // the client filters the whole list as the user keeps typing
+            offeredItems = [...moduleFqcns]
+              .map((moduleFqcn) =>
+                getModuleCompletionItem(cache, docsLibrary, moduleFqcn),
+              )
+              .filter(isOffered);
+          } else {
+            const prefixFqcns = prefix
+              ? await docsLibrary.findModuleFqcns(document.uri, prefix)
+              : [];
+            throwIfCancelled(token);
+            offeredItems = selectModuleCompletionItems(
+              cache,
+              docsLibrary,
+              moduleFqcns,
+              prefixFqcns,
+              prefix,
+              moduleLimit,
+              isOffered,
+            );
+            // a narrowed list must be asked again as the prefix changes,
+            // including when characters are deleted
+            isIncomplete = true;
+          }
+          const moduleCompletionItems = offeredItems.map(
+            (item): CompletionItem => {
+              const insertName = item.label;
               const insertText = cursorAtEndOfLine
                 ? `${insertName}:${resolveSuffix(
                     "dict", // since a module is always a dictionary
@@ -278,18 +483,10 @@ export async function doCompletion(
                   )}`
                 : insertName;
               return {
-                label: useFqcn ? moduleFqcn : name,
-                kind: kind,
-                detail: `${namespace}.${collection}`,
-                sortText: useFqcn
-                  ? `${priority}_${moduleFqcn}`
-                  : `${priority}_${name}`,
-                filterText: useFqcn
-                  ? `${name} ${moduleFqcn} ${collection} ${namespace}` // name should have highest priority (in case of FQCN)
-                  : `${name} ${moduleFqcn}`, // name should have priority (in case of no FQCN)
+                ...item,
                 data: {
                   documentUri: document.uri, // preserve document URI for completion request
-                  moduleFqcn: moduleFqcn,
+                  moduleFqcn: (item.data as { moduleFqcn: string }).moduleFqcn,
                   inlineCollections: inlineCollections,
                   atEndOfLine: cursorAtEndOfLine,
                   firstElementOfList: cursorAtFirstElementOfList,
@@ -302,8 +499,12 @@ export async function doCompletion(
                   newText: insertText,
                 },
               };
-            });
+            },
+          );
           completionItems.push(...moduleCompletionItems);
+          if (moduleLimit !== undefined) {
+            return CompletionList.create(completionItems, isIncomplete);
+          }
         }
         return completionItems;
       }
@@ -321,13 +522,15 @@ export async function doCompletion(
       }
 
       // Check if we're looking for module options or sub-options
-      const options = await getPossibleOptionsForPath(
+      const optionsContext = await getOptionsContextForPath(
         path,
         document,
         docsLibrary,
       );
+      throwIfCancelled(token);
 
-      if (options) {
+      if (optionsContext) {
+        const options = optionsContext.options;
         const optionMap = new AncestryBuilder(path)
           .parentOfKey()
           .get() as YAMLMap;
@@ -347,6 +550,8 @@ export async function doCompletion(
         );
 
         const cursorAtEndOfLine = atEndOfLine(document, position);
+        // the source is checked once for all the options of the module
+        const sourceStamp = getFileStamp(optionsContext.module.source);
 
         return remainingOptions
           .map(([option, specs]) => {
@@ -379,7 +584,16 @@ export async function doCompletion(
               kind: isAlias(option)
                 ? CompletionItemKind.Reference
                 : CompletionItemKind.Property,
-              documentation: formatOption(option.specs),
+              documentation: getRenderedDocs(
+                {
+                  generation: docsLibrary.generation,
+                  fqcn: optionsContext.module.fqcn,
+                  source: optionsContext.module.source,
+                  stamp: sourceStamp,
+                  optionPath: [...optionsContext.optionPath, option.specs.name],
+                },
+                () => formatOption(option.specs),
+              ),
               data: {
                 documentUri: document.uri, // preserve document URI for completion request
                 type: option.specs.type,
@@ -603,13 +817,21 @@ function getNodeRange(node: Node, document: TextDocument): Range | undefined {
 export async function doCompletionResolve(
   completionItem: CompletionItem,
   context: WorkspaceFolderContext,
+  token?: CancellationToken,
 ): Promise<CompletionItem> {
   if (isModuleCompletionResolveData(completionItem.data)) {
     const data = completionItem.data;
     // resolve completion for a module
 
     const docsLibrary = await context.docsLibrary;
-    const [module] = await docsLibrary.findModule(data.moduleFqcn);
+    throwIfCancelled(token);
+    const [module] = await docsLibrary.findModule(
+      data.moduleFqcn,
+      undefined,
+      undefined,
+      token,
+    );
+    throwIfCancelled(token);
 
     if (module && module.documentation) {
       const [namespace, collection, name] = data.moduleFqcn.split(".");
@@ -655,9 +877,19 @@ export async function doCompletionResolve(
         completionItem.insertTextFormat = InsertTextFormat.PlainText;
       }
 
-      completionItem.documentation = formatModule(
-        module.documentation,
-        docsLibrary.getModuleRoute(data.moduleFqcn),
+      const documentation = module.documentation;
+      completionItem.documentation = getRenderedDocs(
+        {
+          generation: docsLibrary.generation,
+          fqcn: data.moduleFqcn,
+          source: module.source,
+          stamp: getFileStamp(module.source),
+        },
+        () =>
+          formatModule(
+            documentation,
+            docsLibrary.getModuleRoute(data.moduleFqcn),
+          ),
       );
     }
   }
@@ -688,9 +920,11 @@ function isAlias(option: { name: string; specs: IOption }): boolean {
 }
 
 function atEndOfLine(document: TextDocument, position: Position): boolean {
-  const charAfterCursor = `${document.getText()}\n`[
-    document.offsetAt(position)
-  ];
+  const charAfterCursor =
+    document.getText({
+      start: position,
+      end: { line: position.line + 1, character: 0 },
+    })[0] ?? "\n";
   return charAfterCursor === "\n" || charAfterCursor === "\r";
 }
 
@@ -1,23 +1,29 @@
-import { DefinitionLink, Range } from "vscode-languageserver";
+import {
+  CancellationToken,
+  DefinitionLink,
+  Range,
+} from "vscode-languageserver";
 import { Position, TextDocument } from "vscode-languageserver-textdocument";
 import { URI } from "vscode-uri";
 import { isScalar } from "yaml";
 import { DocsLibrary } from "@src/services/docsLibrary.js";
+import { throwIfCancelled } from "@src/utils/cancellation.js";
 import { toLspRange } from "@src/utils/misc.js";
 import {
   AncestryBuilder,
   getOrigRange,
   getPathAt,
   isTaskParam,
-  parseAllDocuments,
+  parseTextDocument,
 } from "@src/utils/yaml.js";
 
 export async function getDefinition(
   document: TextDocument,
   position: Position,
   docsLibrary: DocsLibrary,
+  token?: CancellationToken,
 ): Promise<DefinitionLink[] | null> {
-  const yamlDocs = parseAllDocuments(document.getText());
+  const yamlDocs = parseTextDocument(document);
   const path = getPathAt(document, position, yamlDocs);
   if (path) {
     const node = path[path.length - 1];
@@ -30,7 +36,9 @@ export async function getDefinition(
           node.value as string,
           path,
           document.uri,
+          token,
         );
+        throwIfCancelled(token);
         if (module) {
           const range = getOrigRange(node);
           return [
@@ -1,4 +1,9 @@
-import { Hover, MarkupContent, MarkupKind } from "vscode-languageserver";
+import {
+  CancellationToken,
+  Hover,
+  MarkupContent,
+  MarkupKind,
+} from "vscode-languageserver";
 import { Position, TextDocument } from "vscode-languageserver-textdocument";
 import { isScalar, Scalar } from "yaml";
 import { DocsLibrary } from "@src/services/docsLibrary.js";
@@ -13,26 +18,29 @@ import {
   formatModule,
   formatOption,
   formatTombstone,
+  getRenderedDocs,
 } from "@src/utils/docsFormatter.js";
-import { toLspRange } from "@src/utils/misc.js";
+import { throwIfCancelled } from "@src/utils/cancellation.js";
+import { getFileStamp, toLspRange } from "@src/utils/misc.js";
 import {
   AncestryBuilder,
+  getOptionsContextForPath,
   getOrigRange,
   getPathAt,
-  getPossibleOptionsForPath,
   isBlockParam,
   isPlayParam,
   isRoleParam,
   isTaskParam,
-  parseAllDocuments,
+  parseTextDocument,
 } from "@src/utils/yaml.js";
 
 export async function doHover(
   document: TextDocument,
   position: Position,
   docsLibrary: DocsLibrary,
+  token?: CancellationToken,
 ): Promise<Hover | null> {
-  const yamlDocs = parseAllDocuments(document.getText());
+  const yamlDocs = parseTextDocument(document);
   const path = getPathAt(document, position, yamlDocs);
   if (path) {
     const node = path[path.length - 1];
@@ -60,13 +68,23 @@ export async function doHover(
             node.value as string,
             path,
             document.uri,
+            token,
           );
+          throwIfCancelled(token);
           const range = getOrigRange(node);
           if (module && module.documentation) {
+            const documentation = module.documentation;
+            const fqcn = hitFqcn || (node.value as string);
             return {
-              contents: formatModule(
-                module.documentation,
-                docsLibrary.getModuleRoute(hitFqcn || (node.value as string)),
+              contents: getRenderedDocs(
+                {
+                  generation: docsLibrary.generation,
+                  fqcn: fqcn,
+                  source: module.source,
+                  stamp: getFileStamp(module.source),
+                },
+                () =>
+                  formatModule(documentation, docsLibrary.getModuleRoute(fqcn)),
               ),
               range: range ? toLspRange(range, document) : undefined,
             };
@@ -84,17 +102,28 @@ export async function doHover(
       }
 
       // hovering over a module option or sub-option
-      const options = await getPossibleOptionsForPath(
+      const optionsContext = await getOptionsContextForPath(
         path,
         document,
         docsLibrary,
       );
+      throwIfCancelled(token);
 
-      if (options) {
-        const option = options.get(node.value as string);
+      if (optionsContext) {
+        const option = optionsContext.options.get(node.value as string);
         if (option) {
           return {
-            contents: formatOption(option, true),
+            contents: getRenderedDocs(
+              {
+                generation: docsLibrary.generation,
+                fqcn: optionsContext.module.fqcn,
+                source: optionsContext.module.source,
+                stamp: getFileStamp(optionsContext.module.source),
+                optionPath: [...optionsContext.optionPath, option.name],
+                variant: "details",
+              },
+              () => formatOption(option, true),
+            ),
           };
         }
       }
@@ -0,0 +1,17 @@
+import {
+  SemanticTokenModifiers,
+  SemanticTokenTypes,
+} from "vscode-languageserver";
+
+/**
+ * Legend of the semantic tokens, kept apart from the provider so that it can
+ * be announced in the server capabilities without loading the provider.
+ */
+export const tokenTypes = [
+  SemanticTokenTypes.method,
+  SemanticTokenTypes.class,
+  SemanticTokenTypes.keyword,
+  SemanticTokenTypes.property,
+];
+
+export const tokenModifiers = [SemanticTokenModifiers.definition];
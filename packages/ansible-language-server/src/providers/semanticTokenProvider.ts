@@ -1,4 +1,6 @@
 import {
+  CancellationToken,
+  Range,
   SemanticTokenModifiers,
   SemanticTokens,
   SemanticTokensBuilder,
@@ -12,11 +14,20 @@ import {
   isScalar,
   isSeq,
   Node,
+  Pair,
   Scalar,
   YAMLMap,
 } from "yaml";
 import { IOption } from "@src/interfaces/module.js";
 import { DocsLibrary } from "@src/services/docsLibrary.js";
+import {
+  createCancellationCheck,
+  throwIfCancelled,
+} from "@src/utils/cancellation.js";
+import {
+  tokenModifiers,
+  tokenTypes,
+} from "@src/providers/semanticTokenLegend.js";
 import {
   blockKeywords,
   isTaskKeyword,
@@ -30,49 +41,91 @@ import {
   isPlayParam,
   isRoleParam,
   isTaskParam,
-  parseAllDocuments,
+  parseTextDocument,
 } from "@src/utils/yaml.js";
 
-export const tokenTypes = [
-  SemanticTokenTypes.method,
-  SemanticTokenTypes.class,
-  SemanticTokenTypes.keyword,
-  SemanticTokenTypes.property,
-];
+// the legend is part of the provider API as well
+export { tokenModifiers, tokenTypes };
 
 const tokenTypesLegend = new Map(
   tokenTypes.map((value, index) => [value, index]),
 );
 
-export const tokenModifiers = [SemanticTokenModifiers.definition];
-
 const tokenModifiersLegend = new Map(
   tokenModifiers.map((value, index) => [value, index]),
 );
 
+/** Start and end offsets of the part of a document to highlight. */
+type Span = [number, number];
+
+/**
+ * Computes the semantic tokens of the document.
+ * @param range - only highlight the entries overlapping this range
+ */
 export async function doSemanticTokens(
   document: TextDocument,
   docsLibrary: DocsLibrary,
+  token?: CancellationToken,
+  range?: Range,
 ): Promise<SemanticTokens> {
   const builder = new SemanticTokensBuilder();
-  const yDocuments = parseAllDocuments(document.getText());
+  const span: Span | undefined = range && [
+    document.offsetAt(range.start),
+    document.offsetAt(range.end),
+  ];
+  const yDocuments = parseTextDocument(document);
+  const checkCancellation = createCancellationCheck(token);
   for (const yDoc of yDocuments) {
-    if (yDoc.contents) {
-      await markSemanticTokens([yDoc.contents], builder, document, docsLibrary);
+    if (yDoc.contents && overlaps(yDoc.contents.range, span)) {
+      await markSemanticTokens(
+        [yDoc.contents],
+        builder,
+        document,
+        docsLibrary,
+        checkCancellation,
+        token,
+        span,
+      );
     }
   }
   return builder.build();
 }
 
+/**
+ * Tells whether a node range overlaps the span. Nodes without a range are
+ * assumed to.
+ */
+function overlaps(
+  range: [number, number, number] | null | undefined,
+  span: Span | undefined,
+): boolean {
+  return !span || !range || (range[0] <= span[1] && range[2] >= span[0]);
+}
+
+function getPairRange(pair: Pair): [number, number, number] | undefined {
+  const keyRange = isNode(pair.key) ? pair.key.range : undefined;
+  const valueRange = isNode(pair.value) ? pair.value.range : keyRange;
+  if (keyRange && valueRange) {
+    return [keyRange[0], keyRange[1], valueRange[2]];
+  }
+}
+
 async function markSemanticTokens(
   path: Node[],
   builder: SemanticTokensBuilder,
   document: TextDocument,
   docsLibrary: DocsLibrary,
+  checkCancellation: () => Promise<void>,
+  token?: CancellationToken,
+  span?: Span,
 ): Promise<void> {
   const node = path[path.length - 1];
   if (isMap(node)) {
     for (const pair of node.items) {
+      if (!overlaps(getPairRange(pair), span)) {
+        continue;
+      }
+      await checkCancellation();
       if (isScalar(pair.key)) {
         const keyPath = path.concat(<Scalar>(<unknown>pair), pair.key);
         if (isPlayParam(keyPath)) {
@@ -95,7 +148,9 @@ async function markSemanticTokens(
                 path.concat(pair as unknown as Node, pair.key),
                 document,
                 docsLibrary,
+                "options",
               );
+              throwIfCancelled(token);
               if (module && isMap(pair.value)) {
                 // highlight module parameters
                 markModuleParameters(
@@ -111,7 +166,10 @@ async function markSemanticTokens(
               String(pair.key.value),
               keyPath,
               document.uri,
+              token,
+              "options",
             );
+            throwIfCancelled(token);
             if (module) {
               // highlight module name
               markNode(
@@ -159,12 +217,15 @@ async function markSemanticTokens(
           builder,
           document,
           docsLibrary,
+          checkCancellation,
+          token,
+          span,
         );
       }
     }
   } else if (isSeq(node)) {
     for (const item of node.items) {
-      if (isNode(item)) {
+      if (isNode(item) && overlaps(item.range, span)) {
         // the builder does not support out-of-order inserts yet, hence awaiting
         // on each individual promise instead of using Promise.all
         await markSemanticTokens(
@@ -172,6 +233,9 @@ async function markSemanticTokens(
           builder,
           document,
           docsLibrary,
+          checkCancellation,
+          token,
+          span,
         );
       }
     }
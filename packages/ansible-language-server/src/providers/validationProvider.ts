@@ -1,4 +1,6 @@
 import { IntervalTree, IntervalBase } from "@flatten-js/interval-tree";
+import { promises as fs } from "fs";
+import { performance } from "perf_hooks";
 import {
   Connection,
   Diagnostic,
@@ -6,12 +8,54 @@ import {
   Range,
 } from "vscode-languageserver";
 import { TextDocument } from "vscode-languageserver-textdocument";
+import { URI } from "vscode-uri";
 import { ValidationManager } from "@src/services/validationManager.js";
 import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
-import { isPlaybook, parseAllDocuments } from "@src/utils/yaml.js";
+import { isPlaybook, parseTextDocument } from "@src/utils/yaml.js";
 import { CommandRunner } from "@src/utils/commandRunner.js";
 import { SchemaService } from "@src/services/schemaService.js";
 import { SchemaValidator } from "@src/services/schemaValidator.js";
+import { JSONSchema } from "@src/services/schemaCache.js";
+import { resolveWorkerScript, WorkerPool } from "@src/utils/workerPool.js";
+
+/**
+ * Length from which documents are validated on a worker thread, so that
+ * parsing them does not delay the other requests.
+ */
+const WORKER_VALIDATION_THRESHOLD = 256 * 1024;
+
+/** A document validated on a worker thread. */
+export interface IValidationTask {
+  uri: string;
+  /** UTF-8 encoded text, transferred to the worker rather than copied */
+  text: Uint8Array;
+  /** schema the document has to comply with, if any */
+  schema?: JSONSchema;
+}
+
+/** A file validated outside of the editor. */
+export interface ICheckTask {
+  path: string;
+  /** schema the file has to comply with, if any */
+  schema?: JSONSchema;
+}
+
+/**
+ * Time the main thread spends in the synchronous parts of a validation,
+ * leaving out the time awaiting settings, schemas or worker threads.
+ */
+class CostMeter {
+  public duration = 0;
+
+  public measure<T>(compute: () => T): T {
+    const started = performance.now();
+    try {
+      return compute();
+    } finally {
+      this.duration += performance.now() - started;
+    }
+  }
+}
 
 /**
  * Validates the given document.
@@ -19,6 +63,8 @@ import { SchemaValidator } from "@src/services/schemaValidator.js";
  * @param linter - uses linter
  * @param quick - only re-evaluates YAML validation and uses lint cache
  * @param schemaService - optional schema service for JSON schema validation
+ * @param recordCost - receives the time, in milliseconds, spent parsing and
+ * checking the document on the main thread
  * @returns Map of diagnostics per file.
  */
 export async function doValidate(
@@ -28,6 +74,7 @@ export async function doValidate(
   context?: WorkspaceFolderContext,
   connection?: Connection,
   schemaService?: SchemaService,
+  recordCost?: (duration: number) => void,
 ): Promise<Map<string, Diagnostic[]>> {
   let diagnosticsByFile: Map<string, Diagnostic[]> = new Map<
     string,
@@ -65,7 +112,8 @@ export async function doValidate(
 
       if (lintAvailability) {
         connection?.console.log("Validating using ansible-lint");
-        diagnosticsByFile = await context.ansibleLint.doValidate(textDocument);
+        const ansibleLint = await context.ansibleLint;
+        diagnosticsByFile = await ansibleLint.doValidate(textDocument);
       } else {
         connection?.window.showErrorMessage(
           "Ansible-lint is not available. Kindly check the path or disable validation using ansible-lint",
@@ -79,8 +127,8 @@ export async function doValidate(
 
       if (isPlaybook(textDocument)) {
         connection?.console.log("playbook file");
-        diagnosticsByFile =
-          await context.ansiblePlaybook.doValidate(textDocument);
+        const ansiblePlaybook = await context.ansiblePlaybook;
+        diagnosticsByFile = await ansiblePlaybook.doValidate(textDocument);
       } else {
         connection?.console.log("non-playbook file");
         diagnosticsByFile = new Map<string, Diagnostic[]>();
@@ -98,29 +146,94 @@ export async function doValidate(
   // attach quick validation for the inspected file
   const settings = await context?.documentSettings.get(textDocument.uri);
   if (settings?.validation.enabled) {
+    const meter = new CostMeter();
     for (const [fileUri, fileDiagnostics] of diagnosticsByFile) {
       if (textDocument.uri === fileUri) {
-        fileDiagnostics.push(...getYamlValidation(textDocument));
-
-        // Add schema validation if schema service is available
-        if (schemaService) {
-          const schemaDiagnostics = await getSchemaValidation(
-            textDocument,
-            schemaService,
-            connection,
-          );
-          fileDiagnostics.push(...schemaDiagnostics);
-        }
+        const quickDiagnostics = await getQuickValidation(
+          textDocument,
+          meter,
+          schemaService,
+          connection,
+        );
+        fileDiagnostics.push(...quickDiagnostics);
       }
     }
+    recordCost?.(meter.duration);
+  }
+  if (validationManager.isOutdated(textDocument)) {
+    // not to override the diagnostics of the current text
+    return diagnosticsByFile;
   }
   validationManager.processDiagnostics(textDocument.uri, diagnosticsByFile);
   return diagnosticsByFile;
 }
 
+/**
+ * Validates the YAML syntax of the document and, if a schema service is
+ * given, its schema. Large documents are validated on a worker thread.
+ */
+async function getQuickValidation(
+  textDocument: TextDocument,
+  meter: CostMeter,
+  schemaService?: SchemaService,
+  connection?: Connection,
+): Promise<Diagnostic[]> {
+  const text = textDocument.getText();
+  const pool =
+    text.length >= WORKER_VALIDATION_THRESHOLD
+      ? getValidationPool()
+      : undefined;
+  if (pool) {
+    const schema = schemaService?.shouldValidateWithSchema(textDocument)
+      ? await schemaService.getSchemaForDocument(textDocument)
+      : undefined;
+    const encodedText = meter.measure(() => new TextEncoder().encode(text));
+    try {
+      return await pool.run(
+        { uri: textDocument.uri, text: encodedText, schema },
+        [encodedText.buffer],
+      );
+    } catch (err) {
+      connection?.console.error(
+        `Validation on a worker thread failed: ${err instanceof Error ? err.message : String(err)}`,
+      );
+    }
+  }
+
+  const diagnostics = meter.measure(() => getYamlValidation(textDocument));
+  // Add schema validation if schema service is available
+  if (schemaService) {
+    diagnostics.push(
+      ...(await getSchemaValidation(
+        textDocument,
+        schemaService,
+        meter,
+        connection,
+      )),
+    );
+  }
+  return diagnostics;
+}
+
+// null when worker scripts are not available, e.g. running from sources
+let validationPool:
+  | WorkerPool<IValidationTask, Diagnostic[]>
+  | null
+  | undefined;
+
+function getValidationPool():
+  | WorkerPool<IValidationTask, Diagnostic[]>
+  | undefined {
+  if (validationPool === undefined) {
+    const scriptPath = resolveWorkerScript("validationWorker");
+    validationPool = scriptPath ? new WorkerPool(scriptPath) : null;
+  }
+  return validationPool ?? undefined;
+}
+
 export function getYamlValidation(textDocument: TextDocument): Diagnostic[] {
   const diagnostics: Diagnostic[] = [];
-  const yDocuments = parseAllDocuments(textDocument.getText());
+  const yDocuments = parseTextDocument(textDocument);
   const rangeTree = new IntervalTree<Diagnostic>();
   yDocuments.forEach((yDoc) => {
     yDoc.errors.forEach((error) => {
@@ -172,6 +285,7 @@ let schemaValidator: SchemaValidator | undefined;
 async function getSchemaValidation(
   textDocument: TextDocument,
   schemaService: SchemaService,
+  meter: CostMeter,
   connection?: Connection,
 ): Promise<Diagnostic[]> {
   if (!schemaService.shouldValidateWithSchema(textDocument)) {
@@ -183,12 +297,9 @@ async function getSchemaValidation(
     return [];
   }
 
-  if (!schemaValidator) {
-    schemaValidator = new SchemaValidator();
-  }
-
+  const validator = (schemaValidator ??= new SchemaValidator());
   try {
-    return schemaValidator.validate(textDocument, schema);
+    return meter.measure(() => validator.validate(textDocument, schema));
   } catch (err) {
     connection?.console.error(
       `Schema validation error: ${err instanceof Error ? err.message : String(err)}`,
@@ -196,3 +307,45 @@ async function getSchemaValidation(
     return [];
   }
 }
+
+/**
+ * Validates a file from disk the way an opened document is, without running
+ * ansible-lint or ansible-playbook. Used by the `--check` mode of the CLI.
+ */
+export async function checkFile(task: ICheckTask): Promise<Diagnostic[]> {
+  const textDocument = TextDocument.create(
+    URI.file(task.path).toString(),
+    "ansible",
+    0,
+    await fs.readFile(task.path, { encoding: "utf8" }),
+  );
+  return validateDocument(textDocument, task.schema);
+}
+
+/**
+ * Validates a document sent to a worker thread, see
+ * {@link getQuickValidation}.
+ */
+export function validateText(task: IValidationTask): Diagnostic[] {
+  const textDocument = TextDocument.create(
+    task.uri,
+    "ansible",
+    0,
+    new TextDecoder().decode(task.text),
+  );
+  return validateDocument(textDocument, task.schema);
+}
+
+function validateDocument(
+  textDocument: TextDocument,
+  schema: JSONSchema | undefined,
+): Diagnostic[] {
+  const diagnostics = getYamlValidation(textDocument);
+  if (schema) {
+    if (!schemaValidator) {
+      schemaValidator = new SchemaValidator();
+    }
+    diagnostics.push(...schemaValidator.validate(textDocument, schema));
+  }
+  return diagnostics;
+}
@@ -21,6 +21,14 @@ export class AnsibleConfig {
     this.context = context;
   }
 
+  /**
+   * Makes the service work on behalf of another workspace folder sharing it,
+   * once the folder it has been created for no longer uses it.
+   */
+  public rebind(context: WorkspaceFolderContext): void {
+    this.context = context;
+  }
+
   public async initialize(): Promise<void> {
     try {
       const settings = await this.context.documentSettings.get(
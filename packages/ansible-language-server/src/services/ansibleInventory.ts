@@ -1,6 +1,10 @@
+import { createHash } from "crypto";
+import * as fs from "fs";
+import * as path from "path";
 import { Connection } from "vscode-languageserver";
 import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
 import { CommandRunner } from "@src/utils/commandRunner.js";
+import { getCacheBasePath } from "@src/utils/misc.js";
 import { URI } from "vscode-uri";
 
 export type HostType = { host: string; priority: number };
@@ -69,13 +73,45 @@ Example of more complex inventory.
 }
 */
 
+/**
+ * What `ansible-inventory` is run with, besides the sources: inventory
+ * plugins and their dependencies come from the interpreter or the image.
+ */
+type inventoryEnvironment = {
+  ansiblePath: string;
+  interpreterPath: string;
+  activationScript: string;
+  executionEnvironmentImage?: string;
+};
+
+type inventoryCacheEntry = {
+  sources: string[];
+  environment: inventoryEnvironment | undefined;
+  updated: number;
+  hostList: HostType[];
+};
+
 /**
  * Class to extend ansible-inventory executable as a service
+ *
+ * The parsed host list is persisted per set of inventory sources, so that it
+ * can be served right away on startup while `ansible-inventory` refreshes it
+ * in the background. Dynamic inventory scripts can take minutes to answer,
+ * hence the refresh is bounded by a timeout and never blocks completion when
+ * a cached host list is available.
  */
 export class AnsibleInventory {
   private connection: Connection;
   private context: WorkspaceFolderContext;
   private _hostList: HostType[] = [];
+  private sources: string[] = [];
+  private environment: inventoryEnvironment | undefined;
+  private timeout = 0;
+  private refreshTimer: ReturnType<typeof setInterval> | undefined;
+  private sourceChangeTimer: ReturnType<typeof setTimeout> | undefined;
+  private sourceWatchers: fs.FSWatcher[] = [];
+  private pendingRefresh: Promise<void> | undefined;
+  private disposed = false;
 
   constructor(connection: Connection, context: WorkspaceFolderContext) {
     this.connection = connection;
@@ -86,6 +122,73 @@ export class AnsibleInventory {
     const settings = await this.context.documentSettings.get(
       this.context.workspaceFolder.uri,
     );
+    this.timeout = settings.inventory.timeout * 1000;
+    this.sources = [
+      ...new Set((await this.context.ansibleConfig).default_host_list),
+    ].sort();
+    this.environment = {
+      ansiblePath: settings.ansible.path,
+      interpreterPath: settings.python.interpreterPath,
+      activationScript: settings.python.activationScript,
+      executionEnvironmentImage: settings.executionEnvironment.enabled
+        ? settings.executionEnvironment.image
+        : undefined,
+    };
+
+    const cachedHostList = await readInventoryCache(
+      this.sources,
+      this.environment,
+    );
+    if (cachedHostList) {
+      // serve the cached hosts right away and refresh in the background
+      this._hostList = cachedHostList;
+      void this.refresh();
+    } else {
+      await this.refresh();
+    }
+
+    if (settings.inventory.refreshInterval > 0) {
+      this.refreshTimer = setInterval(() => {
+        void this.refresh();
+      }, settings.inventory.refreshInterval * 1000);
+      this.refreshTimer.unref();
+    }
+    this.watchStaticSources();
+  }
+
+  /**
+   * Runs `ansible-inventory` and updates both the host list and its persisted
+   * copy. Concurrent calls share the same run.
+   */
+  public refresh(): Promise<void> {
+    if (!this.pendingRefresh) {
+      this.pendingRefresh = this.runInventory().finally(() => {
+        this.pendingRefresh = undefined;
+      });
+    }
+    return this.pendingRefresh;
+  }
+
+  public dispose(): void {
+    this.disposed = true;
+    if (this.refreshTimer) {
+      clearInterval(this.refreshTimer);
+      this.refreshTimer = undefined;
+    }
+    if (this.sourceChangeTimer) {
+      clearTimeout(this.sourceChangeTimer);
+      this.sourceChangeTimer = undefined;
+    }
+    for (const watcher of this.sourceWatchers) {
+      watcher.close();
+    }
+    this.sourceWatchers = [];
+  }
+
+  private async runInventory(): Promise<void> {
+    const settings = await this.context.documentSettings.get(
+      this.context.workspaceFolder.uri,
+    );
 
     const commandRunner = new CommandRunner(
       this.connection,
@@ -93,32 +196,83 @@ export class AnsibleInventory {
       settings,
     );
 
-    const defaultHostListPath = new Set(
-      (await this.context.ansibleConfig).default_host_list,
-    );
-
     const workingDirectory = URI.parse(this.context.workspaceFolder.uri).path;
 
-    // Get inventory hosts
-    const ansibleInventoryResult = await commandRunner.runCommand(
-      "ansible-inventory",
-      "--list",
-      workingDirectory,
-      defaultHostListPath,
-    );
-
-    let inventoryHostsObject = {} as inventoryType;
+    let inventoryHostsObject: inventoryType;
     try {
+      // Get inventory hosts
+      const ansibleInventoryResult = await commandRunner.runCommand(
+        "ansible-inventory",
+        "--list",
+        workingDirectory,
+        new Set(this.sources),
+        this.timeout || undefined,
+      );
       inventoryHostsObject = JSON.parse(
         ansibleInventoryResult.stdout,
       ) as inventoryType;
     } catch (error) {
+      const message = error instanceof Error ? error.message : String(error);
       this.connection.console.error(
-        `Exception in AnsibleInventory service: ${JSON.stringify(error)}`,
+        `Exception in AnsibleInventory service: ${message}`,
       );
+      return;
     }
 
+    if (this.disposed) {
+      return;
+    }
     this._hostList = parseInventoryHosts(inventoryHostsObject);
+    await writeInventoryCache(
+      this.sources,
+      this.environment,
+      this._hostList,
+    ).catch((error: unknown) => {
+      this.connection.console.warn(
+        `Failed to persist inventory cache: ${String(error)}`,
+      );
+    });
+  }
+
+  /**
+   * Refreshes the host list when one of the inventory files or directories
+   * changes. Executable sources are dynamic, so edits to them are only picked
+   * up by the periodic refresh.
+   */
+  private watchStaticSources(): void {
+    for (const source of this.sources) {
+      let stats;
+      try {
+        stats = fs.statSync(source);
+      } catch {
+        continue;
+      }
+      if (stats.isFile() && stats.mode & fs.constants.S_IXUSR) {
+        continue;
+      }
+      try {
+        const watcher = fs.watch(source, { persistent: false }, () => {
+          this.handleSourceChanged();
+        });
+        watcher.on("error", () => watcher.close());
+        this.sourceWatchers.push(watcher);
+      } catch (error) {
+        this.connection.console.warn(
+          `Unable to watch inventory source ${source}: ${String(error)}`,
+        );
+      }
+    }
+  }
+
+  private handleSourceChanged(): void {
+    // editors usually emit several events per save
+    if (this.sourceChangeTimer) {
+      clearTimeout(this.sourceChangeTimer);
+    }
+    this.sourceChangeTimer = setTimeout(() => {
+      this.sourceChangeTimer = undefined;
+      void this.refresh();
+    }, 500);
   }
 
   get hostList() {
@@ -126,6 +280,56 @@ export class AnsibleInventory {
   }
 }
 
+export function getInventoryCachePath(
+  sources: string[],
+  environment: inventoryEnvironment | undefined,
+): string {
+  const key = createHash("sha256")
+    .update(JSON.stringify({ sources, environment }))
+    .digest("hex");
+  return path.join(getCacheBasePath(), "inventory", `${key}.json`);
+}
+
+async function readInventoryCache(
+  sources: string[],
+  environment: inventoryEnvironment | undefined,
+): Promise<HostType[] | undefined> {
+  try {
+    const content = await fs.promises.readFile(
+      getInventoryCachePath(sources, environment),
+      { encoding: "utf8" },
+    );
+    const entry = JSON.parse(content) as inventoryCacheEntry;
+    if (Array.isArray(entry.hostList)) {
+      return entry.hostList;
+    }
+  } catch {
+    // no usable cache entry
+  }
+  return undefined;
+}
+
+async function writeInventoryCache(
+  sources: string[],
+  environment: inventoryEnvironment | undefined,
+  hostList: HostType[],
+): Promise<void> {
+  const cachePath = getInventoryCachePath(sources, environment);
+  const entry: inventoryCacheEntry = {
+    sources: sources,
+    environment: environment,
+    updated: Date.now(),
+    hostList: hostList,
+  };
+  await fs.promises.mkdir(path.dirname(cachePath), { recursive: true });
+  // write through a temporary file so readers never see a partial entry
+  const tmpPath = `${cachePath}.${process.pid}.tmp`;
+  await fs.promises.writeFile(tmpPath, JSON.stringify(entry), {
+    encoding: "utf8",
+  });
+  await fs.promises.rename(tmpPath, cachePath);
+}
+
 /**
  * A utility function to parse the hosts object from ansible-inventory executable
  * to a more usable structure that can be used during auto-completions
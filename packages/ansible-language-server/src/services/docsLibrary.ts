@@ -1,42 +1,123 @@
-import { Connection } from "vscode-languageserver";
+import { CancellationToken, Connection } from "vscode-languageserver";
 import { Node } from "yaml";
 import { getDeclaredCollections } from "@src/utils/yaml.js";
-import { findDocumentation, findPluginRouting } from "@src/utils/docsFinder.js";
+import {
+  findDocumentation,
+  findPluginRouting,
+  hasModuleFiles,
+  listCollections,
+  walkCollection,
+} from "@src/utils/docsFinder.js";
 import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
+import { AnsibleConfig } from "@src/services/ansibleConfig.js";
 import {
   IPluginRoute,
   IPluginRoutesByType,
   IPluginRoutingByCollection,
 } from "@src/interfaces/pluginRouting.js";
 import {
-  processDocumentationFragments,
-  processRawDocumentation,
+  IDocumentationTask,
+  IExtractedDocumentation,
+  LazyModuleDocumentation,
 } from "@src/utils/docsParser.js";
-import { IModuleMetadata } from "@src/interfaces/module.js";
+import { loadModuleDocumentation } from "@src/utils/docsStore.js";
+import {
+  IDocumentationDetail,
+  IModuleMetadata,
+} from "@src/interfaces/module.js";
 import * as path from "path";
-import { existsSync, lstatSync } from "fs";
+import { existsSync, FSWatcher, watch } from "fs";
 import { URI } from "vscode-uri";
 import {
   findModulesUtils,
   getModuleFqcnsUtils,
 } from "@src/services/docsLibraryUtilsForPAC.js";
-import { globArray } from "@src/utils/pathUtils.js";
+import { canonicalCollectionsPaths } from "@src/utils/pathUtils.js";
+import {
+  matchesModulePrefix,
+  ModuleCatalog,
+} from "@src/services/moduleCatalog.js";
+import { resolveWorkerScript, WorkerPool } from "@src/utils/workerPool.js";
+import { throwIfCancelled } from "@src/utils/cancellation.js";
+
+// generations are unique across all docs libraries
+let lastGeneration = 0;
+
+// configurations are shared between folders and outlive docs libraries, their
+// paths must be redirected to the plugin docs cache only once
+const configsWithPluginDocs = new WeakSet<AnsibleConfig>();
+
+let docsWorkerPool:
+  | WorkerPool<IDocumentationTask, IExtractedDocumentation>
+  | null
+  | undefined = undefined;
+
+/**
+ * Pool extracting documentation in worker threads, shared by all workspace
+ * folders. Null when no compiled worker script is available.
+ */
+function getDocsWorkerPool(): WorkerPool<
+  IDocumentationTask,
+  IExtractedDocumentation
+> | null {
+  if (docsWorkerPool === undefined) {
+    const scriptPath = resolveWorkerScript("docsWorker");
+    docsWorkerPool = scriptPath ? new WorkerPool(scriptPath) : null;
+  }
+  return docsWorkerPool;
+}
+/**
+ * Entries contributed to the library by a single collection, so that the
+ * collection can be replaced or removed without rebuilding the whole index.
+ */
+interface ICollectionEntries {
+  collectionsPath: string;
+  moduleFqcns: Set<string>;
+  docFragmentFqcns: Set<string>;
+  routedCollections: Set<string>;
+}
+
 export class DocsLibrary {
   private connection: Connection;
   private modules = new Map<string, IModuleMetadata>();
-  private _moduleFqcns = new Set<string>();
+  private _moduleFqcns = new ModuleCatalog();
   private docFragments = new Map<string, IModuleMetadata>();
   private context: WorkspaceFolderContext;
   private pluginRouting: IPluginRoutingByCollection = new Map<
     string,
     IPluginRoutesByType
   >();
+  private collections = new Map<string, ICollectionEntries>();
+  private collectionsPaths: string[] = [];
+  private preloadedCollections = new Set<string>();
+  private _generation = 0;
+  private collectionWatchers = new Map<string, FSWatcher>();
+  private pendingCollectionChanges = new Map<
+    string,
+    ReturnType<typeof setTimeout>
+  >();
 
   constructor(connection: Connection, context: WorkspaceFolderContext) {
     this.connection = connection;
     this.context = context;
   }
 
+  /**
+   * Makes the service work on behalf of another workspace folder sharing it,
+   * once the folder it has been created for no longer uses it.
+   */
+  public rebind(context: WorkspaceFolderContext): void {
+    this.context = context;
+  }
+
+  /**
+   * Number changed whenever the indexed modules or their routing change.
+   * Numbers are never reused, not even by other instances.
+   */
+  public get generation(): number {
+    return this._generation;
+  }
+
   public async initialize(): Promise<void> {
     try {
       const settings = await this.context.documentSettings.get(
@@ -44,10 +125,14 @@ export class DocsLibrary {
       );
       const ansibleConfig = await this.context.ansibleConfig;
       /* v8 ignore start */
-      if (settings.executionEnvironment.enabled) {
+      if (
+        settings.executionEnvironment.enabled &&
+        !configsWithPluginDocs.has(ansibleConfig)
+      ) {
         // ensure plugin/module cache is established
         const executionEnvironment = await this.context.executionEnvironment;
         await executionEnvironment.fetchPluginDocs(ansibleConfig);
+        configsWithPluginDocs.add(ansibleConfig);
       }
       /* v8 ignore end */
       /* v8 ignore next */
@@ -56,12 +141,17 @@ export class DocsLibrary {
       }
 
       (
-        await findPluginRouting(ansibleConfig.ansible_location, "builtin")
-      ).forEach((r, collection) => this.pluginRouting.set(collection, r));
+        await findPluginRouting(ansibleConfig.ansible_location)
+      ).forEach((r, collection) => this.setPluginRouting(collection, r));
 
-      for (const collectionsPath of ansibleConfig.collections_paths) {
+      this.collectionsPaths = canonicalCollectionsPaths(
+        ansibleConfig.collections_paths,
+      );
+      for (const collectionsPath of this.collectionsPaths) {
         await this.findDocumentationInCollectionsPath(collectionsPath);
       }
+      this.watchCollectionsPaths();
+      void this.preloadDocumentation(["ansible.builtin"]);
       void this.connection.sendNotification("ansible/docsLibraryReady", {
         modulesCount: this.modules.size,
       });
@@ -85,11 +175,17 @@ export class DocsLibrary {
    *
    * Returns the module if found and an FQCN for which either a module or a
    * route has been found.
+   *
+   * The search is abandoned as soon as the `token` reports cancellation.
+   * With the `options` detail, the documentation of the module is loaded
+   * without the descriptions, which is enough to recognize its options.
    */
   public async findModule(
     searchText: string,
     contextPath?: Node[],
     documentUri?: string,
+    token?: CancellationToken,
+    detail: IDocumentationDetail = "full",
   ): Promise<[IModuleMetadata | undefined, string | undefined]> {
     // support playbook adjacent collections
     const playbookDirectory = URI.parse(String(documentUri)).path.split(
@@ -100,26 +196,22 @@ export class DocsLibrary {
 
     const playbookAdjacentCollectionsPath = playbookDirectory.join(path.sep);
 
-    const isAdjacentCollectionAvailable = existsSync(
-      playbookAdjacentCollectionsPath,
-    );
-
-    // check if a module code is actually present or not
-    const moduleFiles = globArray([
-      `${playbookAdjacentCollectionsPath}/ansible_collections/*/*/plugins/modules/*.py`,
-      `${playbookAdjacentCollectionsPath}/ansible_collections/*/*/plugins/modules/**/*.py`,
-      `!${playbookAdjacentCollectionsPath}/ansible_collections/*/*/plugins/modules/_*.py`,
-      `!${playbookAdjacentCollectionsPath}/ansible_collections/*/*/plugins/modules/**/_*.py`,
-    ]).filter((item) => !lstatSync(item).isSymbolicLink());
+    // check that module code is actually present before walking the
+    // collections
+    const isAdjacentCollectionAvailable =
+      existsSync(playbookAdjacentCollectionsPath) &&
+      hasModuleFiles(playbookAdjacentCollectionsPath);
 
-    if (isAdjacentCollectionAvailable && moduleFiles.length !== 0) {
+    if (isAdjacentCollectionAvailable) {
       const [PAModule, PAHitFqcn] = await findModulesUtils(
         playbookAdjacentCollectionsPath,
         searchText,
         this.context,
         contextPath,
         documentUri,
+        detail,
       );
+      throwIfCancelled(token);
       if (PAModule) {
         // return early if module found in playbook adjacent collection
         return [PAModule, PAHitFqcn];
@@ -133,6 +225,7 @@ export class DocsLibrary {
       documentUri,
       contextPath,
     );
+    throwIfCancelled(token);
 
     // check routing
     let moduleRoute;
@@ -161,21 +254,13 @@ export class DocsLibrary {
     }
 
     if (module) {
-      if (!module.fragments) {
-        // collect information from documentation fragments
-        processDocumentationFragments(module, this.docFragments);
-      }
-      if (!module.documentation) {
-        // translate raw documentation into a typed structure
-        module.documentation = processRawDocumentation(
-          module.rawDocumentationFragments,
-        );
-      }
+      loadModuleDocumentation(module, this.docFragments, detail);
     }
     return [module, hitFqcn];
   }
 
   private findDocumentationInModulesPath(modulesPath: string) {
+    this._generation = ++lastGeneration;
     findDocumentation(modulesPath, "builtin").forEach((doc) => {
       this.modules.set(doc.fqcn, doc);
       this._moduleFqcns.add(doc.fqcn);
@@ -187,35 +272,255 @@ export class DocsLibrary {
   }
 
   private async findDocumentationInCollectionsPath(collectionsPath: string) {
-    findDocumentation(collectionsPath, "collection").forEach((doc) => {
+    for (const collectionName of listCollections(collectionsPath)) {
+      if (this.collections.has(collectionName)) {
+        // shadowed by a collections path that takes precedence
+        continue;
+      }
+      await this.addCollection(collectionsPath, collectionName);
+    }
+  }
+
+  /**
+   * Indexes a single collection found in the given collections path,
+   * replacing whatever has been indexed for it before.
+   */
+  public async addCollection(
+    collectionsPath: string,
+    collectionName: string,
+  ): Promise<void> {
+    this.removeCollection(collectionName);
+    this._generation = ++lastGeneration;
+    const entries: ICollectionEntries = {
+      collectionsPath: collectionsPath,
+      moduleFqcns: new Set<string>(),
+      docFragmentFqcns: new Set<string>(),
+      routedCollections: new Set<string>(),
+    };
+    this.collections.set(collectionName, entries);
+
+    const contents = await walkCollection(collectionsPath, collectionName);
+    for (const doc of contents.modules) {
       this.modules.set(doc.fqcn, doc);
       this._moduleFqcns.add(doc.fqcn);
+      entries.moduleFqcns.add(doc.fqcn);
+    }
+    for (const doc of contents.docFragments) {
+      this.docFragments.set(doc.fqcn, doc);
+      entries.docFragmentFqcns.add(doc.fqcn);
+    }
+    contents.pluginRouting.forEach((r, collection) => {
+      this.setPluginRouting(collection, r);
+      entries.routedCollections.add(collection);
     });
+  }
+
+  /**
+   * Drops everything a collection has contributed to the library.
+   */
+  public removeCollection(collectionName: string): void {
+    const entries = this.collections.get(collectionName);
+    if (!entries) {
+      return;
+    }
+    this._generation = ++lastGeneration;
+    for (const fqcn of entries.moduleFqcns) {
+      this.modules.delete(fqcn);
+      this._moduleFqcns.delete(fqcn);
+    }
+    for (const fqcn of entries.docFragmentFqcns) {
+      this.docFragments.delete(fqcn);
+    }
+    for (const collection of entries.routedCollections) {
+      this.setPluginRouting(collection, undefined);
+    }
+    this.collections.delete(collectionName);
+    this.preloadedCollections.delete(collectionName);
+  }
 
-    /* v8 ignore start */
-    findDocumentation(collectionsPath, "collection_doc_fragment").forEach(
-      (doc) => {
-        this.docFragments.set(doc.fqcn, doc);
-      },
+  /**
+   * Extracts documentation of all modules and documentation fragments of the
+   * given collections in worker threads, so that it is ready by the time it
+   * is first needed. Without worker threads, documentation keeps being
+   * extracted lazily on first use.
+   */
+  public async preloadDocumentation(collections: string[]): Promise<void> {
+    const pool = getDocsWorkerPool();
+    const pendingCollections = new Set(
+      collections.filter((c) => !this.preloadedCollections.has(c)),
+    );
+    if (!pool || pendingCollections.size === 0) {
+      return;
+    }
+    pendingCollections.forEach((c) => this.preloadedCollections.add(c));
+    const docs = [...this.modules.values(), ...this.docFragments.values()]
+      .filter((doc) => doc instanceof LazyModuleDocumentation)
+      .filter(
+        (doc) =>
+          !doc.isLoaded &&
+          !doc.documentation &&
+          pendingCollections.has(
+            `${doc.namespace}.${doc.collection.split(".")[0]}`,
+          ),
+      );
+    await Promise.all(
+      docs.map(async (doc) => {
+        try {
+          const extracted = await pool.run({
+            source: doc.source,
+            blocks: doc.blocks,
+          });
+          if (!doc.isLoaded && !doc.documentation) {
+            doc.load(extracted);
+          }
+        } catch {
+          // extracted on first use instead
+        }
+      }),
     );
-    /* v8 ignore end */
+  }
+
+  /**
+   * Re-indexes a collection after it has been installed, upgraded or removed
+   * in one of the collections paths.
+   */
+  public async refreshCollection(collectionName: string): Promise<void> {
+    const collectionsPath = this.resolveCollectionsPath(collectionName);
+    if (collectionsPath) {
+      await this.addCollection(collectionsPath, collectionName);
+    } else {
+      this.removeCollection(collectionName);
+    }
+  }
 
-    /* v8 ignore start */
-    (await findPluginRouting(collectionsPath, "collection")).forEach(
-      (r, collection) => this.pluginRouting.set(collection, r),
+  /**
+   * Finds the collections path that provides the collection. Like Ansible,
+   * the first path containing the collection wins.
+   */
+  private resolveCollectionsPath(collectionName: string): string | undefined {
+    return this.collectionsPaths.find((collectionsPath) =>
+      existsSync(
+        path.join(
+          collectionsPath,
+          "ansible_collections",
+          ...collectionName.split("."),
+        ),
+      ),
     );
-    /* v8 ignore end */
+  }
 
+  /**
+   * Replaces routing of a collection, keeping the redirect FQCNs offered for
+   * completion in sync.
+   */
+  private setPluginRouting(
+    collection: string,
+    routesByType: IPluginRoutesByType | undefined,
+  ): void {
+    this._generation = ++lastGeneration;
+    for (const [name, route] of this.pluginRouting
+      .get(collection)
+      ?.get("modules") || []) {
+      const fqcn = `${collection}.${name}`;
+      if (route.redirect && !route.tombstone && !this.modules.has(fqcn)) {
+        this._moduleFqcns.delete(fqcn);
+      }
+    }
+    if (!routesByType) {
+      this.pluginRouting.delete(collection);
+      return;
+    }
+    this.pluginRouting.set(collection, routesByType);
     // add all valid redirect routes as possible FQCNs
-    for (const [collection, routesByType] of this.pluginRouting) {
-      for (const [name, route] of routesByType.get("modules") || []) {
-        if (route.redirect && !route.tombstone) {
-          this._moduleFqcns.add(`${collection}.${name}`);
+    for (const [name, route] of routesByType.get("modules") || []) {
+      if (route.redirect && !route.tombstone) {
+        this._moduleFqcns.add(`${collection}.${name}`);
+      }
+    }
+  }
+
+  /**
+   * Watches `ansible_collections` directories for collections being
+   * installed or removed, e.g. by `ansible-galaxy collection install`.
+   */
+  private watchCollectionsPaths(): void {
+    for (const collectionsPath of this.collectionsPaths) {
+      const rootDir = path.join(collectionsPath, "ansible_collections");
+      if (!existsSync(rootDir)) {
+        continue;
+      }
+      this.watchDirectory(rootDir, (namespace) => {
+        // a namespace appeared or disappeared
+        this.watchNamespace(rootDir, namespace);
+        const collectionNames = new Set(
+          listCollections(collectionsPath).concat(...this.collections.keys()),
+        );
+        for (const collectionName of collectionNames) {
+          if (collectionName.startsWith(`${namespace}.`)) {
+            this.handleCollectionChanged(collectionName);
+          }
         }
+      });
+      for (const collectionName of listCollections(collectionsPath)) {
+        this.watchNamespace(rootDir, collectionName.split(".")[0]);
       }
     }
   }
 
+  private watchNamespace(rootDir: string, namespace: string): void {
+    const namespaceDir = path.join(rootDir, namespace);
+    if (existsSync(namespaceDir)) {
+      this.watchDirectory(namespaceDir, (collection) =>
+        this.handleCollectionChanged(`${namespace}.${collection}`),
+      );
+    }
+  }
+
+  private watchDirectory(dir: string, onChange: (entry: string) => void) {
+    if (this.collectionWatchers.has(dir)) {
+      return;
+    }
+    try {
+      const watcher = watch(dir, { persistent: false }, (_event, entry) => {
+        if (entry) {
+          onChange(entry.toString());
+        }
+      });
+      watcher.on("error", () => {
+        watcher.close();
+        this.collectionWatchers.delete(dir);
+      });
+      this.collectionWatchers.set(dir, watcher);
+    } catch (error) {
+      this.connection.console.warn(
+        `Unable to watch collections directory ${dir}: ${String(error)}`,
+      );
+    }
+  }
+
+  private handleCollectionChanged(collectionName: string): void {
+    // installation touches many files, re-index once it settles down
+    clearTimeout(this.pendingCollectionChanges.get(collectionName));
+    this.pendingCollectionChanges.set(
+      collectionName,
+      setTimeout(() => {
+        this.pendingCollectionChanges.delete(collectionName);
+        void this.refreshCollection(collectionName);
+      }, 1000),
+    );
+  }
+
+  public dispose(): void {
+    for (const watcher of this.collectionWatchers.values()) {
+      watcher.close();
+    }
+    this.collectionWatchers.clear();
+    for (const timer of this.pendingCollectionChanges.values()) {
+      clearTimeout(timer);
+    }
+    this.pendingCollectionChanges.clear();
+  }
+
   private async getCandidateFqcns(
     searchText: string,
     documentUri: string | undefined,
@@ -227,23 +532,23 @@ export class DocsLibrary {
     } else {
       candidateFqcns.push(`ansible.builtin.${searchText}`); // try searching built-in
 
+      const declaredCollections: string[] = [];
       if (documentUri) {
         const metadata = await this.context.documentMetadata.get(documentUri);
         if (metadata) {
           // try searching declared collections
-          candidateFqcns.push(
-            ...metadata.collections.map((c) => `${c}.${searchText}`),
-          );
+          declaredCollections.push(...metadata.collections);
         }
       }
 
       if (contextPath) {
-        candidateFqcns.push(
-          ...getDeclaredCollections(contextPath).map(
-            (c) => `${c}.${searchText}`,
-          ),
-        );
+        declaredCollections.push(...getDeclaredCollections(contextPath));
       }
+      candidateFqcns.push(
+        ...declaredCollections.map((c) => `${c}.${searchText}`),
+      );
+      // the other modules of declared collections are likely to follow
+      void this.preloadDocumentation(declaredCollections);
     }
     return candidateFqcns;
   }
@@ -261,6 +566,40 @@ export class DocsLibrary {
   }
 
   public async getModuleFqcns(documentUri: string): Promise<Set<string>> {
+    const paModuleFqcns = await this.getAdjacentModuleFqcns(documentUri);
+    if (paModuleFqcns) {
+      // return early if appended list
+      return new Set([...this._moduleFqcns, ...paModuleFqcns]);
+    }
+
+    return this._moduleFqcns;
+  }
+
+  /**
+   * Finds module FQCNs whose short name or FQCN starts with the prefix,
+   * including modules of playbook adjacent collections.
+   */
+  public async findModuleFqcns(
+    documentUri: string,
+    prefix: string,
+  ): Promise<string[]> {
+    const moduleFqcns = this._moduleFqcns.find(prefix);
+    const paModuleFqcns = await this.getAdjacentModuleFqcns(documentUri);
+    for (const fqcn of paModuleFqcns ?? []) {
+      if (!this._moduleFqcns.has(fqcn) && matchesModulePrefix(fqcn, prefix)) {
+        moduleFqcns.push(fqcn);
+      }
+    }
+    return moduleFqcns;
+  }
+
+  /**
+   * Lists the modules of the collections adjacent to the playbook, if there
+   * is such a `collections` directory.
+   */
+  private async getAdjacentModuleFqcns(
+    documentUri: string,
+  ): Promise<Set<string> | undefined> {
     // support playbook adjacent collections
     const playbookDirectory = URI.parse(documentUri).path.split(path.sep);
     playbookDirectory.pop();
@@ -268,18 +607,8 @@ export class DocsLibrary {
 
     const playbookAdjacentCollectionsPath = playbookDirectory.join(path.sep);
 
-    const isAdjacentCollectionAvailable = existsSync(
-      playbookAdjacentCollectionsPath,
-    );
-
-    if (isAdjacentCollectionAvailable) {
-      const paModuleFqcns = await getModuleFqcnsUtils(
-        playbookAdjacentCollectionsPath,
-      );
-      // return early if appended list
-      return new Set([...this._moduleFqcns, ...paModuleFqcns]);
+    if (existsSync(playbookAdjacentCollectionsPath)) {
+      return getModuleFqcnsUtils(playbookAdjacentCollectionsPath);
     }
-
-    return this._moduleFqcns;
   }
 }
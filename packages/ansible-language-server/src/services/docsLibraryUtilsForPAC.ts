@@ -6,17 +6,17 @@
  */
 
 import { Node } from "yaml";
-import { IModuleMetadata } from "@src/interfaces/module.js";
+import {
+  IDocumentationDetail,
+  IModuleMetadata,
+} from "@src/interfaces/module.js";
 import {
   IPluginRoute,
   IPluginRoutesByType,
   IPluginRoutingByCollection,
 } from "@src/interfaces/pluginRouting.js";
-import { findDocumentation, findPluginRouting } from "@src/utils/docsFinder.js";
-import {
-  processDocumentationFragments,
-  processRawDocumentation,
-} from "@src/utils/docsParser.js";
+import { walkCollections } from "@src/utils/docsFinder.js";
+import { loadModuleDocumentation } from "@src/utils/docsStore.js";
 import { getDeclaredCollections } from "@src/utils/yaml.js";
 import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
 
@@ -31,27 +31,20 @@ export async function findModulesUtils(
   context: WorkspaceFolderContext,
   contextPath?: Node[],
   documentUri?: string,
+  detail: IDocumentationDetail = "full",
 ): Promise<[IModuleMetadata | undefined, string | undefined]> {
   const playbookAdjacentModules = new Map<string, IModuleMetadata>();
   const playbookAdjacentDocFragments = new Map<string, IModuleMetadata>();
 
   // find documentation for PAC
-  findDocumentation(playbookAdjacentCollectionsPath, "collection").forEach(
-    (doc) => {
-      playbookAdjacentModules.set(doc.fqcn, doc);
-    },
-  );
-
-  findDocumentation(
-    playbookAdjacentCollectionsPath,
-    "collection_doc_fragment",
-  ).forEach((doc) => {
+  const contents = await walkCollections(playbookAdjacentCollectionsPath);
+  for (const doc of contents.modules) {
+    playbookAdjacentModules.set(doc.fqcn, doc);
+  }
+  for (const doc of contents.docFragments) {
     playbookAdjacentDocFragments.set(doc.fqcn, doc);
-  });
-
-  (
-    await findPluginRouting(playbookAdjacentCollectionsPath, "collection")
-  ).forEach((r, collection) =>
+  }
+  contents.pluginRouting.forEach((r, collection) =>
     playbookAdjacentPluginRouting.set(collection, r),
   );
 
@@ -91,16 +84,7 @@ export async function findModulesUtils(
   }
 
   if (module) {
-    if (!module.fragments) {
-      // collect information from documentation fragments
-      processDocumentationFragments(module, playbookAdjacentDocFragments);
-    }
-    if (!module.documentation) {
-      // translate raw documentation into a typed structure
-      module.documentation = processRawDocumentation(
-        module.rawDocumentationFragments,
-      );
-    }
+    loadModuleDocumentation(module, playbookAdjacentDocFragments, detail);
   }
 
   return [module, hitFqcn];
@@ -111,15 +95,11 @@ export async function getModuleFqcnsUtils(
 ): Promise<Set<string>> {
   const playbookAdjacentModuleFqcns = new Set<string>();
 
-  findDocumentation(playbookAdjacentCollectionsPath, "collection").forEach(
-    (doc) => {
-      playbookAdjacentModuleFqcns.add(doc.fqcn);
-    },
-  );
-
-  (
-    await findPluginRouting(playbookAdjacentCollectionsPath, "collection")
-  ).forEach((r, collection) =>
+  const contents = await walkCollections(playbookAdjacentCollectionsPath);
+  for (const doc of contents.modules) {
+    playbookAdjacentModuleFqcns.add(doc.fqcn);
+  }
+  contents.pluginRouting.forEach((r, collection) =>
     playbookAdjacentPluginRouting.set(collection, r),
   );
 
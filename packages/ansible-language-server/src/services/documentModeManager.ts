@@ -0,0 +1,84 @@
+import * as path from "path";
+import { Connection } from "vscode-languageserver";
+import { TextDocument } from "vscode-languageserver-textdocument";
+import { URI } from "vscode-uri";
+import { ILargeDocumentSettings } from "@src/interfaces/extensionSettings.js";
+
+/**
+ * How much work is spent on a document. In reduced mode, semantic tokens are
+ * only computed for the visible range, validation while typing is delayed
+ * and schema validation only runs on open and save.
+ */
+export type DocumentMode = "full" | "reduced";
+
+/**
+ * Tracks the cost of processing each open document and switches large or
+ * slow ones to the reduced mode, so that they do not stall the server.
+ *
+ * A document stays in reduced mode until it is closed or the thresholds
+ * change, not to flip between modes as the cheaper features make it look
+ * fast again.
+ */
+export class DocumentModeManager {
+  private connection: Connection;
+
+  /** last measured processing time per document, in milliseconds */
+  private costs = new Map<string, number>();
+  private reducedDocuments = new Set<string>();
+
+  constructor(connection: Connection) {
+    this.connection = connection;
+  }
+
+  public getMode(
+    document: TextDocument,
+    settings: ILargeDocumentSettings | undefined,
+  ): DocumentMode {
+    if (this.reducedDocuments.has(document.uri)) {
+      return "reduced";
+    }
+    if (!settings) {
+      return "full";
+    }
+    let reason: string | undefined;
+    if (document.lineCount > settings.lineThreshold) {
+      reason = `it has more than ${settings.lineThreshold} lines`;
+    } else if ((this.costs.get(document.uri) ?? 0) > settings.costThreshold) {
+      reason = `processing it takes more than ${settings.costThreshold} ms`;
+    }
+    if (!reason) {
+      return "full";
+    }
+    this.reducedDocuments.add(document.uri);
+    const name = path.basename(URI.parse(document.uri).path);
+    this.connection.console.log(`Reduced mode for ${document.uri}: ${reason}`);
+    void this.connection.window.showInformationMessage(
+      `${name} is handled in reduced mode as ${reason}: semantic ` +
+        "highlighting is limited to the visible range and validation runs " +
+        "when you pause typing.",
+    );
+    return "reduced";
+  }
+
+  /**
+   * Records how long the main thread spent parsing and checking the document
+   * on its last quick validation, not counting the time waiting for
+   * settings, schemas or worker threads.
+   */
+  public recordCost(uri: string, duration: number): void {
+    this.costs.set(uri, duration);
+  }
+
+  /**
+   * Lets the mode of the document be decided again on its next use, e.g.
+   * once the thresholds have changed.
+   */
+  public resetMode(uri: string): void {
+    this.reducedDocuments.delete(uri);
+  }
+
+  public handleDocumentClosed(uri: string): void {
+    this.costs.delete(uri);
+    this.reducedDocuments.delete(uri);
+  }
+}
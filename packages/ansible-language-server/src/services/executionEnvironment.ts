@@ -1,6 +1,5 @@
 import * as child_process from "child_process";
 import * as fs from "fs";
-import * as os from "node:os";
 import * as path from "path";
 import { URI } from "vscode-uri";
 import { Connection } from "vscode-languageserver";
@@ -15,7 +14,11 @@ import {
   validateContainerEngineSetting,
   validateExecutionEnvironmentSettings,
 } from "@src/utils/containerCommandSafety.js";
-import { asyncSpawn, spawnSyncWithResult } from "@src/utils/misc.js";
+import {
+  asyncSpawn,
+  getCacheBasePath,
+  spawnSyncWithResult,
+} from "@src/utils/misc.js";
 import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
 import type {
   ExtensionSettings,
@@ -140,11 +143,10 @@ export class ExecutionEnvironment {
           .split("\n")
           .map((line) => line.trim())
           .find((line) => line !== "") ?? "";
-      const cacheBase =
-        process.env.XDG_CACHE_HOME ||
-        `${process.env.HOME || os.homedir()}/.cache`;
       const hostCacheBasePath = path.resolve(
-        `${cacheBase}/ansible-language-server/${containerName}/${this._container_image_id}`,
+        getCacheBasePath(),
+        containerName,
+        this._container_image_id,
       );
 
       /* v8 ignore next 3 */
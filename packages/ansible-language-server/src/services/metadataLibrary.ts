@@ -2,14 +2,25 @@ import { promises as fs } from "fs";
 import { Connection } from "vscode-languageserver";
 import { DidChangeWatchedFilesParams } from "vscode-languageserver-protocol";
 import { URI } from "vscode-uri";
-import { parseAllDocuments } from "yaml";
 import { IDocumentMetadata } from "@src/interfaces/documentMeta.js";
-import { fileExists, hasOwnProperty } from "@src/utils/misc.js";
+import { fileExists, hasOwnProperty, lazyImport } from "@src/utils/misc.js";
+import { CACHE_BUDGET, LRUCache } from "@src/utils/lruCache.js";
+
+// the YAML parser is only needed once a role metadata file is read
+const loadYaml = lazyImport(() => import("yaml"));
 export class MetadataLibrary {
   private connection: Connection;
 
   // cache of metadata contents per metadata file
-  private metadata: Map<string, Thenable<IDocumentMetadata>> = new Map();
+  private metadata = new LRUCache<string, Thenable<IDocumentMetadata>>(
+    CACHE_BUDGET.metadata,
+    "metadata",
+  );
+  // cache of metadata file locations per document
+  private metadataUris = new LRUCache<string, string | undefined>(
+    CACHE_BUDGET.metadataUris,
+    "metadataUris",
+  );
 
   constructor(connection: Connection) {
     this.connection = connection;
@@ -42,6 +53,9 @@ export class MetadataLibrary {
    * metadata file.
    */
   private getAnsibleMetadataUri(uri: string): string | undefined {
+    if (this.metadataUris.has(uri)) {
+      return this.metadataUris.get(uri);
+    }
     let metaPath;
     const pathArray = uri.split("/");
 
@@ -54,6 +68,7 @@ export class MetadataLibrary {
           .join("/");
       }
     }
+    this.metadataUris.set(uri, metaPath);
     return metaPath;
   }
 
@@ -70,6 +85,7 @@ export class MetadataLibrary {
         const metaContents = await fs.readFile(metadataFilePath, {
           encoding: "utf8",
         });
+        const { parseAllDocuments } = await loadYaml();
         parseAllDocuments(metaContents).forEach((metaDoc) => {
           const metaObject: unknown = metaDoc.toJSON();
           if (
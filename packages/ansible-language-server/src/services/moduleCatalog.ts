@@ -0,0 +1,121 @@
+/**
+ * Set of module FQCNs offered for completion, with a sorted index over short
+ * module names and FQCNs for prefix lookups. The index is rebuilt lazily on
+ * the first lookup after the set has changed.
+ */
+export class ModuleCatalog extends Set<string> {
+  private index: [string, string][] | undefined;
+
+  public add(fqcn: string): this {
+    if (!this.has(fqcn)) {
+      this.index = undefined;
+    }
+    return super.add(fqcn);
+  }
+
+  public delete(fqcn: string): boolean {
+    const deleted = super.delete(fqcn);
+    if (deleted) {
+      this.index = undefined;
+    }
+    return deleted;
+  }
+
+  public clear(): void {
+    super.clear();
+    this.index = undefined;
+  }
+
+  /**
+   * Finds FQCNs whose short module name or FQCN starts with the prefix,
+   * ignoring case.
+   */
+  public find(prefix: string): string[] {
+    const index = this.getIndex();
+    const key = prefix.toLowerCase();
+    let low = 0;
+    let high = index.length;
+    while (low < high) {
+      const mid = (low + high) >>> 1;
+      if (index[mid][0] < key) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+    const found = new Set<string>();
+    for (let i = low; i < index.length && index[i][0].startsWith(key); i++) {
+      found.add(index[i][1]);
+    }
+    return [...found];
+  }
+
+  private getIndex(): [string, string][] {
+    if (!this.index) {
+      const index: [string, string][] = [];
+      for (const fqcn of this) {
+        index.push([getModuleName(fqcn).toLowerCase(), fqcn]);
+        index.push([fqcn.toLowerCase(), fqcn]);
+      }
+      index.sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0));
+      this.index = index;
+    }
+    return this.index;
+  }
+}
+
+/**
+ * Checks whether the short module name or the FQCN starts with the prefix,
+ * ignoring case. Matches the lookups done by {@link ModuleCatalog.find}.
+ */
+export function matchesModulePrefix(fqcn: string, prefix: string): boolean {
+  const key = prefix.toLowerCase();
+  return (
+    getModuleName(fqcn).toLowerCase().startsWith(key) ||
+    fqcn.toLowerCase().startsWith(key)
+  );
+}
+
+/**
+ * Checks whether the characters typed appear in order in a word of the
+ * completion filter text, starting with its first character, ignoring case.
+ * Words are separated by spaces and the parts of an FQCN by dots. This
+ * approximates the fuzzy matching done by clients on `filterText`, so that
+ * e.g. `dbg` matches `debug` and `builtin` the modules of that collection.
+ */
+export function matchesModuleFilter(
+  filterText: string,
+  typed: string,
+): boolean {
+  const key = typed.toLowerCase();
+  if (!key) {
+    return true;
+  }
+  const text = filterText.toLowerCase();
+  for (let start = 0; start < text.length; start++) {
+    if (
+      text[start] !== key[0] ||
+      (start > 0 && text[start - 1] !== " " && text[start - 1] !== ".")
+    ) {
+      continue;
+    }
+    let matched = 1;
+    for (
+      let i = start + 1;
+      i < text.length && text[i] !== " " && matched < key.length;
+      i++
+    ) {
+      if (text[i] === key[matched]) {
+        matched++;
+      }
+    }
+    if (matched === key.length) {
+      return true;
+    }
+  }
+  return false;
+}
+
+function getModuleName(fqcn: string): string {
+  return fqcn.split(".")[2] ?? fqcn;
+}
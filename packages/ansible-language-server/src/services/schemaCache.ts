@@ -19,11 +19,13 @@ export interface JSONSchema {
  * Simple in-memory cache for JSON schemas with 24h TTL.
  */
 export class SchemaCache {
-  private connection: Connection;
+  private connection: Connection | null;
   private cache = new Map<string, { schema: JSONSchema; expires: number }>();
+  /** Fetches in progress, shared by documents needing the same schema. */
+  private pending = new Map<string, Promise<JSONSchema | undefined>>();
   private readonly TTL = 24 * 60 * 60 * 1000;
 
-  constructor(connection: Connection) {
+  constructor(connection: Connection | null) {
     this.connection = connection;
   }
 
@@ -33,6 +35,16 @@ export class SchemaCache {
       return cached.schema;
     }
 
+    let fetching = this.pending.get(url);
+    if (!fetching) {
+      fetching = this.fetchSchema(url).finally(() => this.pending.delete(url));
+      this.pending.set(url, fetching);
+    }
+    return fetching;
+  }
+
+  private async fetchSchema(url: string): Promise<JSONSchema | undefined> {
+    const cached = this.cache.get(url);
     try {
       const resp = await fetch(url);
       if (!resp.ok) {
@@ -40,10 +52,10 @@ export class SchemaCache {
       }
       const schema = (await resp.json()) as JSONSchema;
       this.cache.set(url, { schema, expires: Date.now() + this.TTL });
-      this.connection.console.info(`Fetched schema: ${url}`);
+      this.connection?.console.info(`Fetched schema: ${url}`);
       return schema;
     } catch (err) {
-      this.connection.console.warn(
+      this.connection?.console.warn(
         `Failed to fetch schema ${url}: ${err instanceof Error ? err.message : String(err)}`,
       );
       // Return stale cache if available
@@ -34,7 +34,7 @@ const SCHEMA_MAPPINGS = [
 export class SchemaService {
   private cache: SchemaCache;
 
-  constructor(connection: Connection) {
+  constructor(connection: Connection | null) {
     this.cache = new SchemaCache(connection);
   }
 
@@ -56,7 +56,11 @@ export class SchemaService {
   async getSchemaForDocument(
     doc: TextDocument,
   ): Promise<JSONSchema | undefined> {
-    const url = this.getSchemaUrlForUri(doc.uri);
+    return this.getSchemaForUri(doc.uri);
+  }
+
+  async getSchemaForUri(uri: string): Promise<JSONSchema | undefined> {
+    const url = this.getSchemaUrlForUri(uri);
     if (!url) return undefined;
     return this.cache.getSchema(url);
   }
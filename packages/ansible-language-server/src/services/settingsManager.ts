@@ -7,11 +7,32 @@ import type {
   SettingsEntry,
 } from "@src/interfaces/extensionSettings";
 import { isObject } from "@src/utils/misc.js";
+import { perfStats } from "@src/utils/perfStats.js";
+import { CACHE_BUDGET, LRUCache } from "@src/utils/lruCache.js";
 
 interface LegacyConfigurationSettings {
   ansible?: ExtensionSettings;
 }
 
+/**
+ * Called with the settings of the watched URI before and after they changed.
+ */
+export type ConfigurationChangeHandler = (
+  previous: ExtensionSettings,
+  current: ExtensionSettings,
+) => void;
+
+/**
+ * Tells whether the URI is the folder URI or one of its descendants, not a
+ * sibling sharing the same prefix such as `file:///workspace2`.
+ */
+function isInFolder(uri: string, folderUri: string): boolean {
+  return (
+    uri === folderUri ||
+    uri.startsWith(folderUri.endsWith("/") ? folderUri : `${folderUri}/`)
+  );
+}
+
 function hasLegacyAnsibleSettings(
   settings: unknown,
 ): settings is LegacyConfigurationSettings {
@@ -21,11 +42,16 @@ function hasLegacyAnsibleSettings(
 export class SettingsManager {
   private connection: Connection | null;
   private clientSupportsConfigRequests;
-  private configurationChangeHandlers: Map<string, () => void> = new Map();
+  private scopeUri: string | undefined;
+  private configurationChangeHandlers: Map<
+    string,
+    ConfigurationChangeHandler
+  > = new Map();
 
-  // cache of document settings per workspace file
-  private documentSettings: Map<string, Thenable<ExtensionSettings>> =
-    new Map();
+  // cache of settings per scope, the workspace folder or a single file
+  private documentSettings = this.createDocumentSettingsCache();
+  // settings of URIs watched for configuration changes, never evicted
+  private watchedSettings = new Map<string, Thenable<ExtensionSettings>>();
 
   // settings with their default values and descriptions
   // default values of settings to be updated here
@@ -101,6 +127,35 @@ export class SettingsManager {
         description: "Toggle alias provider when completing module options",
       },
     },
+    inventory: {
+      refreshInterval: {
+        default: 0,
+        description:
+          "Interval in seconds at which the cached inventory host list is refreshed in the background. Set to 0 to only refresh on startup and when a static inventory source changes",
+      },
+      timeout: {
+        default: 30,
+        description:
+          "Maximum time in seconds to wait for ansible-inventory before falling back to the cached host list",
+      },
+    },
+    largeDocuments: {
+      lineThreshold: {
+        default: 5000,
+        description:
+          "Number of lines above which a document is handled in reduced mode: semantic highlighting is limited to the visible range, validation while typing is delayed and schema validation only runs on open and save",
+      },
+      costThreshold: {
+        default: 200,
+        description:
+          "Time in milliseconds that parsing and checking a document while typing may take before it is handled in reduced mode, whatever its number of lines",
+      },
+      validationDelay: {
+        default: 500,
+        description:
+          "Time in milliseconds without changes after which a document in reduced mode is validated",
+      },
+    },
     validation: {
       enabled: {
         default: true,
@@ -137,12 +192,18 @@ export class SettingsManager {
 
   public globalSettings: ExtensionSettings = this.defaultSettings;
 
+  /**
+   * @param scopeUri - URI of the workspace folder whose documents share the
+   * same settings
+   */
   constructor(
     connection: Connection | null,
     clientSupportsConfigRequests: boolean,
+    scopeUri?: string,
   ) {
     this.connection = connection;
     this.clientSupportsConfigRequests = clientSupportsConfigRequests;
+    this.scopeUri = scopeUri;
   }
 
   /**
@@ -151,7 +212,10 @@ export class SettingsManager {
    * Change detection is cache-based. If the client does not support the
    * configuration requests, all handlers will be fired.
    */
-  public onConfigurationChanged(uri: string, handler: { (): void }): void {
+  public onConfigurationChanged(
+    uri: string,
+    handler: ConfigurationChangeHandler,
+  ): void {
     this.configurationChangeHandlers.set(uri, handler);
   }
 
@@ -159,22 +223,32 @@ export class SettingsManager {
     if (!this.clientSupportsConfigRequests) {
       return Promise.resolve(this.globalSettings);
     }
-    let result = this.documentSettings.get(uri);
-    if (!result && this.connection) {
-      const clientSettings: unknown =
-        await this.connection.workspace.getConfiguration({
-          scopeUri: uri,
+    const scope = this.getScope(uri);
+    let result = this.getCachedSettings(scope);
+    if (result) {
+      perfStats.recordCacheHit("settings");
+    } else if (this.connection) {
+      perfStats.recordCacheMiss("settings");
+      // cached before being resolved, for concurrent callers to share the
+      // same request
+      const request = this.connection.workspace
+        .getConfiguration({
+          scopeUri: scope,
           section: "ansible",
-        });
-      // Recursively merge globalSettings with clientSettings to use:
-      //  - setting from client when provided
-      //  - default value of setting otherwise
-      const mergedSettings: ExtensionSettings = _.merge(
-        _.cloneDeep(this.globalSettings),
-        clientSettings,
-      );
-      result = Promise.resolve(mergedSettings);
-      this.documentSettings.set(uri, result);
+        })
+        .then((clientSettings: unknown) => this.mergeSettings(clientSettings));
+      this.setCachedSettings(scope, request);
+      request.then(undefined, () => {
+        // not to keep a failed request, the next call retries; a newer
+        // request cached meanwhile is kept
+        if (this.watchedSettings.get(scope) === request) {
+          this.watchedSettings.delete(scope);
+        }
+        if (this.documentSettings.get(scope) === request) {
+          this.documentSettings.delete(scope);
+        }
+      });
+      result = request;
     }
     /* v8 ignore start */
     if (!result) {
@@ -185,32 +259,99 @@ export class SettingsManager {
   }
 
   public handleDocumentClosed(uri: string): void {
-    this.documentSettings.delete(uri);
+    // the snapshot of the folder is shared with its other documents
+    if (this.getScope(uri) === uri) {
+      this.documentSettings.delete(uri);
+    }
   }
 
-  private async refreshConfigWithClient(): Promise<void> {
-    const newDocumentSettings: Map<
-      string,
-      Thenable<ExtensionSettings>
-    > = new Map();
-    const handlersToFire: { (): void }[] = [];
+  /**
+   * Tells which scope the settings of the URI are resolved for. Clients only
+   * scope resource settings to workspace folders, so documents of the folder
+   * share its snapshot, while other URIs are resolved on their own.
+   */
+  private getScope(uri: string): string {
+    if (this.scopeUri && isInFolder(uri, this.scopeUri)) {
+      return this.scopeUri;
+    }
+    return uri;
+  }
 
-    for (const [uri, handler] of this.configurationChangeHandlers) {
-      const config = await this.documentSettings.get(uri);
-      if (config && this.connection) {
-        const newConfigPromise = this.connection.workspace.getConfiguration({
-          scopeUri: uri,
-          section: "ansible",
-        });
-        newDocumentSettings.set(uri, newConfigPromise);
+  private getCachedSettings(
+    uri: string,
+  ): Thenable<ExtensionSettings> | undefined {
+    return this.watchedSettings.get(uri) ?? this.documentSettings.get(uri);
+  }
 
-        if (!_.isEqual(config, await newConfigPromise)) {
-          handlersToFire.push(handler);
-        }
-      }
+  private setCachedSettings(
+    uri: string,
+    settings: Thenable<ExtensionSettings>,
+  ): void {
+    // the settings of watched URIs are the reference to detect changes
+    if (this.configurationChangeHandlers.has(uri)) {
+      this.watchedSettings.set(uri, settings);
+    } else {
+      this.documentSettings.set(uri, settings);
     }
+  }
+
+  private createDocumentSettingsCache() {
+    return new LRUCache<string, Thenable<ExtensionSettings>>(
+      CACHE_BUDGET.settings,
+      "settings",
+    );
+  }
 
-    this.documentSettings = newDocumentSettings;
+  /**
+   * Recursively merges the client settings into the global settings, to use
+   * the setting from the client when provided and its default value otherwise.
+   */
+  private mergeSettings(clientSettings: unknown): ExtensionSettings {
+    return _.merge(_.cloneDeep(this.globalSettings), clientSettings);
+  }
+
+  /**
+   * Fetches the settings of all the resolved scopes in a single request and
+   * fires the handlers of the watched URIs whose settings have changed.
+   */
+  private async refreshConfigWithClient(): Promise<void> {
+    if (!this.connection) {
+      return;
+    }
+    const scopes = [
+      ...new Set([
+        ...this.configurationChangeHandlers.keys(),
+        ...this.documentSettings.keys(),
+      ]),
+    ].filter((scope) => this.getCachedSettings(scope));
+    if (scopes.length === 0) {
+      return;
+    }
+    const previousSettings = new Map(
+      await Promise.all(
+        scopes.map(
+          async (scope) =>
+            [scope, await this.getCachedSettings(scope)] as const,
+        ),
+      ),
+    );
+    const clientSettings: unknown[] =
+      await this.connection.workspace.getConfiguration(
+        scopes.map((scope) => ({ scopeUri: scope, section: "ansible" })),
+      );
+
+    const handlersToFire: { (): void }[] = [];
+    this.documentSettings = this.createDocumentSettingsCache();
+    this.watchedSettings = new Map();
+    scopes.forEach((scope, index) => {
+      const settings = this.mergeSettings(clientSettings[index]);
+      this.setCachedSettings(scope, Promise.resolve(settings));
+      const handler = this.configurationChangeHandlers.get(scope);
+      const previous = previousSettings.get(scope);
+      if (handler && previous && !_.isEqual(previous, settings)) {
+        handlersToFire.push(() => handler(previous, settings));
+      }
+    });
     handlersToFire.forEach((h) => {
       h();
     });
@@ -222,18 +363,19 @@ export class SettingsManager {
     if (this.clientSupportsConfigRequests) {
       await this.refreshConfigWithClient();
     } else {
+      const previous = this.globalSettings;
+      this.globalSettings =
+        (hasLegacyAnsibleSettings(params.settings) &&
+          params.settings.ansible) ||
+        this.defaultSettings;
       if (
         hasLegacyAnsibleSettings(params.settings) &&
         params.settings.ansible
       ) {
         this.configurationChangeHandlers.forEach((h) => {
-          h();
+          h(previous, this.globalSettings);
         });
       }
-      this.globalSettings =
-        (hasLegacyAnsibleSettings(params.settings) &&
-          params.settings.ansible) ||
-        this.defaultSettings;
     }
   }
 
@@ -0,0 +1,99 @@
+/**
+ * Reference to a shared service, to be released once no longer used.
+ */
+export interface ISharedServiceLease<T> {
+  service: Thenable<T>;
+  release(): void;
+}
+
+interface ISharedServiceEntry<T, O> {
+  service: Thenable<T>;
+  /**
+   * one holder per lease, the first one being the owner the service works
+   * on behalf of
+   */
+  holders: { owner?: O }[];
+}
+
+/**
+ * Shares services between workspace folder contexts that operate on the same
+ * environment. Services are identified by a fingerprint of that environment
+ * and disposed once the last context has released them.
+ *
+ * Services working on behalf of the context that created them are handed
+ * over to another context using them when that one releases its lease.
+ */
+export class SharedServiceRegistry<T, O = never> {
+  private entries = new Map<string, ISharedServiceEntry<T, O>>();
+  private disposeService: (service: T) => void;
+  private rebindService: (service: T, owner: O) => void;
+
+  constructor(
+    disposeService: (service: T) => void = () => undefined,
+    rebindService: (service: T, owner: O) => void = () => undefined,
+  ) {
+    this.disposeService = disposeService;
+    this.rebindService = rebindService;
+  }
+
+  /** Number of services currently shared. */
+  public get size(): number {
+    return this.entries.size;
+  }
+
+  /**
+   * Provides the service for the fingerprint, creating it when no context
+   * uses it yet.
+   * @param owner - context acquiring the service
+   */
+  public acquire(
+    fingerprint: string,
+    create: () => Thenable<T>,
+    owner?: O,
+  ): ISharedServiceLease<T> {
+    let entry = this.entries.get(fingerprint);
+    if (!entry) {
+      const newEntry: ISharedServiceEntry<T, O> = {
+        service: create(),
+        holders: [],
+      };
+      newEntry.service.then(undefined, () => {
+        // let the next context try again
+        if (this.entries.get(fingerprint) === newEntry) {
+          this.entries.delete(fingerprint);
+        }
+      });
+      this.entries.set(fingerprint, newEntry);
+      entry = newEntry;
+    }
+    const acquiredEntry = entry;
+    const holder = { owner: owner };
+    acquiredEntry.holders.push(holder);
+    let released = false;
+    return {
+      service: acquiredEntry.service,
+      release: () => {
+        if (released) {
+          return;
+        }
+        released = true;
+        const index = acquiredEntry.holders.indexOf(holder);
+        acquiredEntry.holders.splice(index, 1);
+        if (acquiredEntry.holders.length === 0) {
+          if (this.entries.get(fingerprint) === acquiredEntry) {
+            this.entries.delete(fingerprint);
+            acquiredEntry.service.then(this.disposeService, () => undefined);
+          }
+        } else if (index === 0) {
+          const nextOwner = acquiredEntry.holders[0].owner;
+          if (nextOwner !== undefined && nextOwner !== owner) {
+            acquiredEntry.service.then(
+              (service) => this.rebindService(service, nextOwner),
+              () => undefined,
+            );
+          }
+        }
+      },
+    };
+  }
+}
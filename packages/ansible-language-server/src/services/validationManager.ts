@@ -1,12 +1,13 @@
-import { IntervalTree } from "@flatten-js/interval-tree";
 import {
   Connection,
   Diagnostic,
-  integer,
   TextDocumentContentChangeEvent,
   TextDocuments,
 } from "vscode-languageserver";
 import { TextDocument } from "vscode-languageserver-textdocument";
+import { perfStats } from "@src/utils/perfStats.js";
+import { DiagnosticLineTree } from "@src/utils/diagnosticLineTree.js";
+import { CACHE_BUDGET, LRUCache } from "@src/utils/lruCache.js";
 
 /**
  * Provides cache for selected diagnostics.
@@ -20,8 +21,21 @@ export class ValidationManager {
   private connection: Connection;
   private documents: TextDocuments<TextDocument>;
 
-  private readonly validationCache: Map<string, IntervalTree<Diagnostic>> =
-    new Map();
+  /**
+   * Diagnostics of the files of open documents. They are used on each quick
+   * validation and are never evicted, much like the settings of watched
+   * scopes.
+   */
+  private readonly openFileDiagnostics = new Map<string, DiagnosticLineTree>();
+
+  /**
+   * Diagnostics of other files, such as those only referenced by a lint
+   * report or whose document has been closed.
+   */
+  private readonly validationCache = new LRUCache<
+    string,
+    DiagnosticLineTree
+  >(CACHE_BUDGET.validation, "validation");
 
   /**
    * Mapping from file that generated diagnostics (origin), to files included in
@@ -38,6 +52,17 @@ export class ValidationManager {
   constructor(connection: Connection, documents: TextDocuments<TextDocument>) {
     this.connection = connection;
     this.documents = documents;
+    perfStats.trackCacheSize("validation", this.openFileDiagnostics);
+  }
+
+  /**
+   * Tells whether the document has been changed since it was validated, so
+   * that the diagnostics are left to the validation of its newer version.
+   * Validations may complete out of order, e.g. on worker threads.
+   */
+  public isOutdated(textDocument: TextDocument): boolean {
+    const current = this.documents.get(textDocument.uri);
+    return !!current && current.version !== textDocument.version;
   }
 
   /**
@@ -97,64 +122,35 @@ export class ValidationManager {
     }
     for (const [fileUri, fileDiagnostics] of cacheableDiagnostics) {
       // save validation cache for each impacted file
-      const diagnosticTree = new IntervalTree<Diagnostic>();
-      this.validationCache.set(fileUri, diagnosticTree);
-
-      for (const diagnostic of fileDiagnostics) {
-        diagnosticTree.insert(
-          [diagnostic.range.start.line, diagnostic.range.end.line],
-          diagnostic,
-        );
-      }
+      this.setCachedDiagnostics(
+        fileUri,
+        new DiagnosticLineTree(fileDiagnostics),
+      );
     }
   }
 
+  /**
+   * Keeps the cached diagnostics of the file in line with its edits. Those
+   * overlapping an edit are dropped, those below it are moved lazily.
+   */
   public reconcileCacheItems(
     fileUri: string,
     changes: TextDocumentContentChangeEvent[],
   ): void {
-    const diagnosticTree = this.validationCache.get(fileUri);
+    const diagnosticTree = this.getCachedDiagnostics(fileUri);
     if (diagnosticTree) {
       for (const change of changes) {
         if ("range" in change) {
-          const invalidatedDiagnostics = diagnosticTree.search([
-            change.range.start.line,
-            change.range.end.line,
-          ]);
-          if (invalidatedDiagnostics) {
-            for (const diagnostic of invalidatedDiagnostics) {
-              diagnosticTree.remove(
-                [diagnostic.range.start.line, diagnostic.range.end.line],
-                diagnostic,
-              );
-            }
-          }
-
           // determine whether lines have been added or removed by subtracting
           // change lines count from number of newline characters in the change
           let displacement = 0;
           displacement -= change.range.end.line - change.range.start.line;
           displacement += change.text.match(/\n|\r\n|\r/g)?.length || 0;
-          if (displacement) {
-            const displacedDiagnostics = diagnosticTree.search([
-              change.range.start.line,
-              integer.MAX_VALUE,
-            ]);
-            if (displacedDiagnostics) {
-              for (const diagnostic of displacedDiagnostics) {
-                diagnosticTree.remove(
-                  [diagnostic.range.start.line, diagnostic.range.end.line],
-                  diagnostic,
-                );
-                diagnostic.range.start.line += displacement;
-                diagnostic.range.end.line += displacement;
-                diagnosticTree.insert(
-                  [diagnostic.range.start.line, diagnostic.range.end.line],
-                  diagnostic,
-                );
-              }
-            }
-          }
+          diagnosticTree.applyChange(
+            change.range.start.line,
+            change.range.end.line,
+            displacement,
+          );
         }
       }
     }
@@ -164,18 +160,27 @@ export class ValidationManager {
     fileUri: string,
   ): Map<string, Diagnostic[]> | undefined {
     const referencedFiles = this.referencedFilesByOrigin.get(fileUri);
+    if (
+      referencedFiles ||
+      this.openFileDiagnostics.has(fileUri) ||
+      this.validationCache.has(fileUri)
+    ) {
+      perfStats.recordCacheHit("validation");
+    } else {
+      perfStats.recordCacheMiss("validation");
+    }
     if (referencedFiles) {
       // hit on origin of diagnostics
       const diagnosticsByFile: Map<string, Diagnostic[]> = new Map();
       for (const referencedFileUri of referencedFiles) {
-        const diagnostics = this.validationCache.get(referencedFileUri);
+        const diagnostics = this.getCachedDiagnostics(referencedFileUri);
         if (diagnostics) {
           diagnosticsByFile.set(referencedFileUri, diagnostics.values);
         }
       }
       return diagnosticsByFile;
     } else {
-      const diagnostics = this.validationCache.get(fileUri);
+      const diagnostics = this.getCachedDiagnostics(fileUri);
       if (diagnostics) {
         // direct hit on given file
         return new Map([[fileUri, diagnostics.values]]);
@@ -184,6 +189,12 @@ export class ValidationManager {
   }
 
   public handleDocumentClosed(fileUri: string): void {
+    const diagnostics = this.openFileDiagnostics.get(fileUri);
+    if (diagnostics) {
+      // may still be referenced by other open documents, but can be evicted
+      this.openFileDiagnostics.delete(fileUri);
+      this.validationCache.set(fileUri, diagnostics);
+    }
     const referencedFiles = this.referencedFilesByOrigin.get(fileUri);
     if (referencedFiles) {
       referencedFiles.forEach((f) => {
@@ -194,6 +205,34 @@ export class ValidationManager {
     }
   }
 
+  private getCachedDiagnostics(
+    fileUri: string,
+  ): DiagnosticLineTree | undefined {
+    let diagnostics = this.openFileDiagnostics.get(fileUri);
+    if (!diagnostics) {
+      diagnostics = this.validationCache.get(fileUri);
+      if (diagnostics && this.documents.get(fileUri)) {
+        // the document has been opened since its diagnostics were cached
+        this.validationCache.delete(fileUri);
+        this.openFileDiagnostics.set(fileUri, diagnostics);
+      }
+    }
+    return diagnostics;
+  }
+
+  private setCachedDiagnostics(
+    fileUri: string,
+    diagnostics: DiagnosticLineTree,
+  ): void {
+    if (this.documents.get(fileUri)) {
+      this.validationCache.delete(fileUri);
+      this.openFileDiagnostics.set(fileUri, diagnostics);
+    } else {
+      this.openFileDiagnostics.delete(fileUri);
+      this.validationCache.set(fileUri, diagnostics);
+    }
+  }
+
   private handleFileReferenced(fileUri: string) {
     this.referencedFileRefCounter.set(fileUri, this.getRefCounter(fileUri) + 1);
   }
@@ -202,6 +241,7 @@ export class ValidationManager {
     const counter = this.getRefCounter(fileUri) - 1;
     if (counter <= 0) {
       // clear diagnostics of files that are no longer referenced
+      this.openFileDiagnostics.delete(fileUri);
       this.validationCache.delete(fileUri);
       void this.connection.sendDiagnostics({
         uri: fileUri,
@@ -6,16 +6,94 @@ import {
   WorkspaceFolder,
   WorkspaceFoldersChangeEvent,
 } from "vscode-languageserver";
-import { AnsibleConfig } from "@src/services/ansibleConfig.js";
-import { AnsibleLint } from "@src/services/ansibleLint.js";
-import { AnsiblePlaybook } from "@src/services/ansiblePlaybook.js";
-import { DocsLibrary } from "@src/services/docsLibrary.js";
-import { ExecutionEnvironment } from "@src/services/executionEnvironment.js";
+import type { AnsibleConfig } from "@src/services/ansibleConfig.js";
+import type { AnsibleLint } from "@src/services/ansibleLint.js";
+import type { AnsiblePlaybook } from "@src/services/ansiblePlaybook.js";
+import type { DocsLibrary } from "@src/services/docsLibrary.js";
+import type { ExecutionEnvironment } from "@src/services/executionEnvironment.js";
 import { MetadataLibrary } from "@src/services/metadataLibrary.js";
 import { SettingsManager } from "@src/services/settingsManager.js";
 import * as path from "path";
+import { existsSync } from "fs";
 import { URI } from "vscode-uri";
-import { AnsibleInventory } from "@src/services/ansibleInventory.js";
+import type { AnsibleInventory } from "@src/services/ansibleInventory.js";
+import {
+  ISharedServiceLease,
+  SharedServiceRegistry,
+} from "@src/services/sharedServiceRegistry.js";
+import { ExtensionSettings } from "@src/interfaces/extensionSettings.js";
+import { lazyImport } from "@src/utils/misc.js";
+
+// Services pull in ini parsing, container tooling and the command runner.
+// They are loaded once a folder first needs them, not with the server.
+const loadAnsibleConfig = lazyImport(
+  () => import("@src/services/ansibleConfig.js"),
+);
+const loadAnsibleInventory = lazyImport(
+  () => import("@src/services/ansibleInventory.js"),
+);
+const loadAnsibleLint = lazyImport(
+  () => import("@src/services/ansibleLint.js"),
+);
+const loadAnsiblePlaybook = lazyImport(
+  () => import("@src/services/ansiblePlaybook.js"),
+);
+const loadDocsLibrary = lazyImport(
+  () => import("@src/services/docsLibrary.js"),
+);
+const loadExecutionEnvironment = lazyImport(
+  () => import("@src/services/executionEnvironment.js"),
+);
+
+/**
+ * Services of a workspace folder that depend on the settings:
+ * - `environment`: execution environment, Ansible configuration, docs library
+ *   and inventory, all resolved from the Ansible installation in use;
+ * - `inventory`: the cached inventory alone;
+ * - `validation`: diagnostics of the open documents;
+ * - `documentModes`: full or reduced mode of the open documents.
+ *
+ * Other settings, such as the completion toggles, are read on each request
+ * and need no invalidation.
+ */
+export type SettingsDependent =
+  | "environment"
+  | "inventory"
+  | "validation"
+  | "documentModes";
+
+/** Settings sections, as lodash paths, and the services depending on them. */
+const SETTINGS_DEPENDENTS: [string, SettingsDependent[]][] = [
+  ["ansible.path", ["environment", "validation"]],
+  ["python", ["environment", "validation"]],
+  ["executionEnvironment", ["environment", "validation"]],
+  ["inventory", ["inventory"]],
+  // autoFixOnSave only applies to the next save, diagnostics stay valid
+  ["validation.enabled", ["validation"]],
+  ["validation.lint.enabled", ["validation"]],
+  ["validation.lint.path", ["validation"]],
+  ["validation.lint.arguments", ["validation"]],
+  ["largeDocuments", ["documentModes"]],
+];
+
+/** Services depending on the settings that are handled by the server. */
+type ServerSettingsDependent = "validation" | "documentModes";
+
+/**
+ * Lists the services affected by a change of the settings.
+ */
+export function getSettingsDependents(
+  previous: ExtensionSettings,
+  current: ExtensionSettings,
+): Set<SettingsDependent> {
+  const dependents = new Set<SettingsDependent>();
+  for (const [section, sectionDependents] of SETTINGS_DEPENDENTS) {
+    if (!_.isEqual(_.get(previous, section), _.get(current, section))) {
+      sectionDependents.forEach((dependent) => dependents.add(dependent));
+    }
+  }
+  return dependents;
+}
 
 /**
  * Holds the overall context for the whole workspace.
@@ -27,10 +105,59 @@ export class WorkspaceManager {
     new Map();
   public clientCapabilities: ClientCapabilities = {};
 
+  /** Configurations shared by folders resolving to the same environment. */
+  public readonly ansibleConfigs = new SharedServiceRegistry<
+    AnsibleConfig,
+    WorkspaceFolderContext
+  >(
+    () => undefined,
+    (ansibleConfig, context) => ansibleConfig.rebind(context),
+  );
+  /** Docs libraries shared by folders resolving to the same environment. */
+  public readonly docsLibraries = new SharedServiceRegistry<
+    DocsLibrary,
+    WorkspaceFolderContext
+  >(
+    (docsLibrary) => docsLibrary.dispose(),
+    (docsLibrary, context) => docsLibrary.rebind(context),
+  );
+
+  private settingsChangeHandlers = new Map<
+    ServerSettingsDependent,
+    ((context: WorkspaceFolderContext) => void)[]
+  >();
+
   constructor(connection: Connection) {
     this.connection = connection;
   }
 
+  /**
+   * Registers a handler called when what the server keeps for the documents
+   * of a workspace folder, such as their diagnostics or modes, has to be
+   * reset after a change of its settings.
+   */
+  public onSettingsChanged(
+    dependent: ServerSettingsDependent,
+    handler: (context: WorkspaceFolderContext) => void,
+  ): void {
+    const handlers = this.settingsChangeHandlers.get(dependent) ?? [];
+    handlers.push(handler);
+    this.settingsChangeHandlers.set(dependent, handlers);
+  }
+
+  public handleSettingsChanged(
+    dependent: ServerSettingsDependent,
+    context: WorkspaceFolderContext,
+  ): void {
+    this.settingsChangeHandlers.get(dependent)?.forEach((handler) => {
+      handler(context);
+    });
+  }
+
+  public get workspaceFolders(): readonly WorkspaceFolder[] {
+    return this.sortedWorkspaceFolders;
+  }
+
   public setWorkspaceFolders(workspaceFolders: WorkspaceFolder[]): void {
     this.sortedWorkspaceFolders = this.sortWorkspaceFolders(workspaceFolders);
   }
@@ -106,6 +233,7 @@ export class WorkspaceManager {
 
     // We only keep contexts of existing workspace folders
     for (const removedUri of removedUris) {
+      this.folderContexts.get(removedUri)?.clearCachedServices();
       this.folderContexts.delete(removedUri);
     }
 
@@ -130,6 +258,7 @@ export class WorkspaceManager {
  */
 export class WorkspaceFolderContext {
   private connection: Connection;
+  private workspaceManager: WorkspaceManager;
   public clientCapabilities: ClientCapabilities;
   public workspaceFolder: WorkspaceFolder;
   public documentMetadata: MetadataLibrary;
@@ -138,11 +267,18 @@ export class WorkspaceFolderContext {
   // Lazy-loading anything that needs this context itself
   private _executionEnvironment: Thenable<ExecutionEnvironment> | undefined;
   private _docsLibrary: Thenable<DocsLibrary> | undefined;
+  private _docsLibraryLease:
+    | Promise<ISharedServiceLease<DocsLibrary>>
+    | undefined;
   private _ansibleConfig: Thenable<AnsibleConfig> | undefined;
+  private _ansibleConfigLease:
+    | Promise<ISharedServiceLease<AnsibleConfig>>
+    | undefined;
   private _ansibleInventory: Thenable<AnsibleInventory> | undefined;
-  private _ansibleLint: AnsibleLint | undefined;
-  private _ansiblePlaybook: AnsiblePlaybook | undefined;
+  private _ansibleLint: Thenable<AnsibleLint> | undefined;
+  private _ansiblePlaybook: Thenable<AnsiblePlaybook> | undefined;
   private _configChangeTimer: ReturnType<typeof setTimeout> | undefined;
+  private _pendingDependents = new Set<SettingsDependent>();
 
   constructor(
     connection: Connection,
@@ -150,33 +286,63 @@ export class WorkspaceFolderContext {
     workspaceManager: WorkspaceManager,
   ) {
     this.connection = connection;
+    this.workspaceManager = workspaceManager;
     this.clientCapabilities = workspaceManager.clientCapabilities;
     this.workspaceFolder = workspaceFolder;
     this.documentMetadata = new MetadataLibrary(connection);
     this.documentSettings = new SettingsManager(
       connection,
       !!this.clientCapabilities.workspace?.configuration,
+      workspaceFolder.uri,
     );
     this.documentSettings.onConfigurationChanged(
       this.workspaceFolder.uri,
-      () => {
+      (previous, current) => {
         // Debounce: multiple didChangeConfiguration notifications can arrive
         // in rapid succession (e.g. when several settings are updated at once).
         // Without debouncing, each fires the invalidation callback while a
         // previous docsLibrary.initialize() may still be in flight, orphaning
         // its result and leaving subsequent requests with an empty module index.
+        getSettingsDependents(previous, current).forEach((dependent) =>
+          this._pendingDependents.add(dependent),
+        );
         if (this._configChangeTimer) {
           clearTimeout(this._configChangeTimer);
           this._configChangeTimer = undefined;
         }
         this._configChangeTimer = setTimeout(() => {
-          this.clearCachedServices();
           this._configChangeTimer = undefined;
+          this.invalidateServices();
         }, 500);
       },
     );
   }
 
+  /**
+   * Resets the services depending on the changed settings, those pending
+   * from the debounced configuration changes when none are given.
+   */
+  public invalidateServices(
+    dependents: Iterable<SettingsDependent> = [],
+  ): void {
+    clearTimeout(this._configChangeTimer);
+    this._configChangeTimer = undefined;
+    const invalidated = new Set([...this._pendingDependents, ...dependents]);
+    this._pendingDependents.clear();
+
+    if (invalidated.has("environment")) {
+      this.clearCachedServices();
+    } else if (invalidated.has("inventory")) {
+      this.clearAnsibleInventory();
+    }
+    if (invalidated.has("documentModes")) {
+      this.workspaceManager.handleSettingsChanged("documentModes", this);
+    }
+    if (invalidated.has("validation")) {
+      this.workspaceManager.handleSettingsChanged("validation", this);
+    }
+  }
+
   public handleWatchedDocumentChange(
     params: DidChangeWatchedFilesParams,
   ): void {
@@ -186,75 +352,215 @@ export class WorkspaceFolderContext {
         // in case the configuration changes for this folder, we should
         // invalidate the services that rely on it in initialization
         this._executionEnvironment = undefined;
-        this._ansibleConfig = undefined;
-        this._docsLibrary = undefined;
+        this.clearAnsibleConfig();
+        this.clearDocsLibrary();
       }
     }
   }
 
+  /**
+   * Docs library shared with other workspace folders that resolve to the
+   * same Ansible environment.
+   */
   public get docsLibrary(): Thenable<DocsLibrary> {
     if (!this._docsLibrary) {
-      const docsLibrary = new DocsLibrary(this.connection, this);
-      this._docsLibrary = docsLibrary.initialize().then(() => docsLibrary);
+      const lease = this.acquireDocsLibrary();
+      this._docsLibraryLease = lease;
+      this._docsLibrary = lease.then((l) => l.service);
     }
     return this._docsLibrary;
   }
 
+  /**
+   * Ansible configuration shared with other workspace folders that resolve
+   * to the same Ansible environment.
+   */
   public get ansibleConfig(): Thenable<AnsibleConfig> {
     if (!this._ansibleConfig) {
-      const ansibleConfig = new AnsibleConfig(this.connection, this);
-      this._ansibleConfig = ansibleConfig
-        .initialize()
-        .then(() => ansibleConfig);
+      const lease = this.acquireAnsibleConfig();
+      this._ansibleConfigLease = lease;
+      this._ansibleConfig = lease.then((l) => l.service);
     }
     return this._ansibleConfig;
   }
 
+  private async acquireAnsibleConfig(): Promise<
+    ISharedServiceLease<AnsibleConfig>
+  > {
+    const settings = await this.documentSettings.get(this.workspaceFolder.uri);
+    return this.workspaceManager.ansibleConfigs.acquire(
+      JSON.stringify(this.getEnvironmentFingerprint(settings)),
+      async () => {
+        const { AnsibleConfig } = await loadAnsibleConfig();
+        const ansibleConfig = new AnsibleConfig(this.connection, this);
+        await ansibleConfig.initialize();
+        return ansibleConfig;
+      },
+      this,
+    );
+  }
+
+  private async acquireDocsLibrary(): Promise<
+    ISharedServiceLease<DocsLibrary>
+  > {
+    const settings = await this.documentSettings.get(this.workspaceFolder.uri);
+    const environment = this.getEnvironmentFingerprint(settings);
+    let fingerprint;
+    if (settings.executionEnvironment.enabled) {
+      // plugin docs are copied from the image, whatever the local paths are
+      fingerprint = { executionEnvironment: environment.executionEnvironment };
+    } else {
+      const ansibleConfig = await this.ansibleConfig;
+      fingerprint = {
+        interpreterPath: environment.interpreterPath,
+        activationScript: environment.activationScript,
+        ansibleLocation: ansibleConfig.ansible_location,
+        moduleLocations: ansibleConfig.module_locations,
+        collectionsPaths: ansibleConfig.collections_paths,
+      };
+    }
+    return this.workspaceManager.docsLibraries.acquire(
+      JSON.stringify(fingerprint),
+      async () => {
+        // loaded on demand, together with the documentation stack
+        const { DocsLibrary } = await loadDocsLibrary();
+        const docsLibrary = new DocsLibrary(this.connection, this);
+        await docsLibrary.initialize();
+        return docsLibrary;
+      },
+      this,
+    );
+  }
+
+  /**
+   * Describes what the Ansible configuration of this folder depends on.
+   * Folders with equal fingerprints get the same configuration.
+   */
+  private getEnvironmentFingerprint(settings: ExtensionSettings) {
+    const folderPath = URI.parse(this.workspaceFolder.uri).path;
+    const executionEnvironment = settings.executionEnvironment;
+    return {
+      ansiblePath: resolveFolderPath(settings.ansible.path, folderPath),
+      interpreterPath: resolveFolderPath(
+        settings.python.interpreterPath,
+        folderPath,
+      ),
+      activationScript: resolveFolderPath(
+        settings.python.activationScript,
+        folderPath,
+      ),
+      executionEnvironment: executionEnvironment.enabled
+        ? {
+            containerEngine: executionEnvironment.containerEngine,
+            image: executionEnvironment.image,
+            volumeMounts: executionEnvironment.volumeMounts,
+            containerOptions: executionEnvironment.containerOptions,
+          }
+        : undefined,
+      // ansible.cfg in the working directory takes precedence over the user
+      // and system wide ones
+      configFolder: existsSync(path.join(folderPath, "ansible.cfg"))
+        ? folderPath
+        : undefined,
+    };
+  }
+
   public get ansibleInventory(): Thenable<AnsibleInventory> {
     if (!this._ansibleInventory) {
-      const ansibleInventory = new AnsibleInventory(this.connection, this);
-      this._ansibleInventory = ansibleInventory
-        .initialize()
-        .then(() => ansibleInventory);
+      this._ansibleInventory = loadAnsibleInventory().then(
+        async ({ AnsibleInventory }) => {
+          const ansibleInventory = new AnsibleInventory(this.connection, this);
+          await ansibleInventory.initialize();
+          return ansibleInventory;
+        },
+      );
     }
     return this._ansibleInventory;
   }
 
   public clearAnsibleInventory(): void {
+    void this._ansibleInventory?.then((inventory) => inventory.dispose());
     this._ansibleInventory = undefined;
   }
 
+  /**
+   * Re-runs `ansible-inventory`, resolving once the fresh host list is
+   * available rather than the cached one.
+   */
+  public async refreshAnsibleInventory(): Promise<AnsibleInventory> {
+    const ansibleInventory = await this.ansibleInventory;
+    await ansibleInventory.refresh();
+    return ansibleInventory;
+  }
+
+  private clearDocsLibrary(): void {
+    void this._docsLibraryLease?.then(
+      (lease) => lease.release(),
+      () => undefined,
+    );
+    this._docsLibraryLease = undefined;
+    this._docsLibrary = undefined;
+  }
+
+  private clearAnsibleConfig(): void {
+    void this._ansibleConfigLease?.then(
+      (lease) => lease.release(),
+      () => undefined,
+    );
+    this._ansibleConfigLease = undefined;
+    this._ansibleConfig = undefined;
+  }
+
   public clearCachedServices(): void {
     this._executionEnvironment = undefined;
-    this._ansibleConfig = undefined;
-    this._docsLibrary = undefined;
-    this._ansibleInventory = undefined;
+    this.clearAnsibleConfig();
+    this.clearDocsLibrary();
+    this.clearAnsibleInventory();
   }
 
-  public get ansibleLint(): AnsibleLint {
+  public get ansibleLint(): Thenable<AnsibleLint> {
     if (!this._ansibleLint) {
-      this._ansibleLint = new AnsibleLint(this.connection, this);
+      this._ansibleLint = loadAnsibleLint().then(
+        ({ AnsibleLint }) => new AnsibleLint(this.connection, this),
+      );
     }
     return this._ansibleLint;
   }
 
-  public get ansiblePlaybook(): AnsiblePlaybook {
+  public get ansiblePlaybook(): Thenable<AnsiblePlaybook> {
     if (!this._ansiblePlaybook) {
-      this._ansiblePlaybook = new AnsiblePlaybook(this.connection, this);
+      this._ansiblePlaybook = loadAnsiblePlaybook().then(
+        ({ AnsiblePlaybook }) => new AnsiblePlaybook(this.connection, this),
+      );
     }
     return this._ansiblePlaybook;
   }
 
   public get executionEnvironment(): Thenable<ExecutionEnvironment> {
     if (!this._executionEnvironment) {
-      const executionEnvironment = new ExecutionEnvironment(
-        this.connection,
-        this,
+      this._executionEnvironment = loadExecutionEnvironment().then(
+        async ({ ExecutionEnvironment }) => {
+          const executionEnvironment = new ExecutionEnvironment(
+            this.connection,
+            this,
+          );
+          await executionEnvironment.initialize();
+          return executionEnvironment;
+        },
       );
-      this._executionEnvironment = executionEnvironment
-        .initialize()
-        .then(() => executionEnvironment);
     }
     return this._executionEnvironment;
   }
 }
+
+/**
+ * Resolves a path setting the way commands of the folder would see it. Bare
+ * executable names are kept, as they are looked up on PATH.
+ */
+function resolveFolderPath(value: string, folderPath: string): string {
+  const resolved = value.replace("${workspaceFolder}", folderPath);
+  if (resolved.includes("/") && !path.isAbsolute(resolved)) {
+    return path.resolve(folderPath, resolved);
+  }
+  return resolved;
+}
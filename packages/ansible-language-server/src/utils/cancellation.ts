@@ -0,0 +1,58 @@
+import {
+  CancellationToken,
+  LSPErrorCodes,
+  ResponseError,
+} from "vscode-languageserver";
+
+/**
+ * Abandons the work of a request once the client has cancelled it. To be
+ * called after each `await` that may take a while, so that stale requests
+ * stop early and leave the CPU to the most recent ones.
+ */
+export function throwIfCancelled(token: CancellationToken | undefined): void {
+  if (token?.isCancellationRequested) {
+    throw new ResponseError(
+      LSPErrorCodes.RequestCancelled,
+      "Request has been cancelled",
+    );
+  }
+}
+
+/**
+ * Creates a check for long computations to call on each unit of work.
+ *
+ * Once the computation has held the event loop for `timeSlice` milliseconds,
+ * the check yields to it with a macrotask, so that pending messages such as
+ * `$/cancelRequest` get processed, then abandons the request if it has been
+ * cancelled. Awaiting promises alone is not enough, as they resolve as
+ * microtasks, ahead of any I/O.
+ */
+export function createCancellationCheck(
+  token: CancellationToken | undefined,
+  timeSlice = 10,
+): () => Promise<void> {
+  let sliceStart = Date.now();
+  return async () => {
+    if (Date.now() - sliceStart >= timeSlice) {
+      await new Promise((resolve) => setImmediate(resolve));
+      sliceStart = Date.now();
+    }
+    throwIfCancelled(token);
+  };
+}
+
+/**
+ * Declines a request the server chose not to compute. Unlike an empty
+ * result, the client does not take it as the final answer.
+ */
+export function serverCancelled(message: string): ResponseError<void> {
+  return new ResponseError(LSPErrorCodes.ServerCancelled, message);
+}
+
+export function isCancellation(error: unknown): boolean {
+  return (
+    error instanceof ResponseError &&
+    (error.code === LSPErrorCodes.RequestCancelled ||
+      error.code === LSPErrorCodes.ServerCancelled)
+  );
+}
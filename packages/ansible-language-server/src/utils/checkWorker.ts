@@ -0,0 +1,9 @@
+/**
+ * Worker thread entry point validating files for the `--check` mode of the
+ * CLI. Each task names a file and the schema it has to comply with.
+ */
+import { Diagnostic } from "vscode-languageserver";
+import { checkFile, ICheckTask } from "@src/providers/validationProvider.js";
+import { serveWorkerTasks } from "@src/utils/workerPool.js";
+
+serveWorkerTasks<ICheckTask, Diagnostic[]>(checkFile);
@@ -2,6 +2,7 @@ import { URI } from "vscode-uri";
 import { Connection } from "vscode-languageserver";
 import { withInterpreter, asyncExec, asyncSpawn } from "@src/utils/misc.js";
 import { getAnsibleCommandExecPath } from "@src/utils/execPath.js";
+import { perfStats } from "@src/utils/perfStats.js";
 import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
 import type { ExtensionSettings } from "@src/interfaces/extensionSettings.js";
 
@@ -20,11 +21,18 @@ export class CommandRunner {
     this.settings = settings;
   }
 
+  /**
+   * Runs the executable either locally or inside the execution environment.
+   *
+   * @param timeout - optional limit in milliseconds after which the process
+   * is terminated and the returned promise rejects
+   */
   public async runCommand(
     executable: string,
     args: string,
     workingDirectory?: string,
     mountPaths?: Set<string>,
+    timeout?: number,
   ): Promise<{
     stdout: string;
     stderr: string;
@@ -82,16 +90,22 @@ export class CommandRunner {
       cwd: currentWorkingDirectory,
       env: runEnv,
       maxBuffer: 10 * 1000 * 1000,
+      timeout: timeout,
     };
 
-    if (Array.isArray(command)) {
-      const [executable, ...args] = command;
-      return asyncSpawn(executable, args, spawnOptions);
-    }
+    const started = performance.now();
+    try {
+      if (Array.isArray(command)) {
+        const [program, ...programArgs] = command;
+        return await asyncSpawn(program, programArgs, spawnOptions);
+      }
 
-    const result = await asyncExec(command, spawnOptions);
+      const result = await asyncExec(command, spawnOptions);
 
-    return result;
+      return result;
+    } finally {
+      perfStats.recordProcess(executable, performance.now() - started);
+    }
   }
 
   /**
@@ -0,0 +1,222 @@
+import { Diagnostic } from "vscode-languageserver";
+
+/**
+ * Diagnostics of a file, kept in line with the edits of its document.
+ *
+ * Diagnostics are sorted by start line once, when cached. An edit adding or
+ * removing lines adds an offset to all the diagnostics below it, stored
+ * lazily in a segment tree, instead of moving each of them. It costs
+ * O(log n), plus the removal of the diagnostics overlapping the edit.
+ * Positions are resolved when the diagnostics are read.
+ */
+export class DiagnosticLineTree {
+  private readonly diagnostics: Diagnostic[];
+  /** start line of each diagnostic when cached */
+  private readonly lines: number[];
+  /** number of lines each diagnostic spans after its start line */
+  private readonly spans: number[];
+  private readonly removed: boolean[];
+  private readonly maxSpan: number;
+  private count: number;
+
+  /** offset applied to the whole subtree of each node */
+  private readonly offsets: Float64Array;
+  /**
+   * greatest start line of the diagnostics left in the subtree of each node,
+   * not counting the offsets of its ancestors
+   */
+  private readonly maxLines: Float64Array;
+
+  constructor(diagnostics: Diagnostic[]) {
+    this.diagnostics = [...diagnostics].sort(
+      (a, b) => a.range.start.line - b.range.start.line,
+    );
+    this.lines = this.diagnostics.map((d) => d.range.start.line);
+    this.spans = this.diagnostics.map(
+      (d) => d.range.end.line - d.range.start.line,
+    );
+    this.removed = new Array<boolean>(this.diagnostics.length).fill(false);
+    this.maxSpan = this.spans.reduce((a, b) => Math.max(a, b), 0);
+    this.count = this.diagnostics.length;
+    this.offsets = new Float64Array(4 * Math.max(1, this.count));
+    this.maxLines = new Float64Array(4 * Math.max(1, this.count));
+    if (this.count > 0) {
+      this.build(1, 0, this.count - 1);
+    }
+  }
+
+  public get size(): number {
+    return this.count;
+  }
+
+  /**
+   * Diagnostics left, with their positions in the current document.
+   */
+  public get values(): Diagnostic[] {
+    const values: Diagnostic[] = [];
+    if (this.diagnostics.length > 0) {
+      this.collect(1, 0, this.diagnostics.length - 1, 0, values);
+    }
+    return values;
+  }
+
+  /**
+   * Reconciles the diagnostics with a change replacing the lines from
+   * `startLine` to `endLine` of the document: diagnostics overlapping them
+   * are dropped, those below are moved by `displacement` lines.
+   */
+  public applyChange(
+    startLine: number,
+    endLine: number,
+    displacement: number,
+  ): void {
+    if (this.count === 0) {
+      return;
+    }
+    const last = this.diagnostics.length - 1;
+    // diagnostics starting above the change may still reach into it
+    const first = this.findFirst(startLine - this.maxSpan);
+    const next = this.findFirst(endLine + 1);
+    for (let index = first; index < next; index++) {
+      if (
+        !this.removed[index] &&
+        this.getLine(index) + this.spans[index] >= startLine
+      ) {
+        this.remove(1, 0, last, index);
+      }
+    }
+    if (displacement && next <= last) {
+      this.shift(1, 0, last, next, displacement);
+    }
+  }
+
+  private build(node: number, low: number, high: number): void {
+    if (low === high) {
+      this.maxLines[node] = this.lines[low];
+      return;
+    }
+    const middle = (low + high) >> 1;
+    this.build(2 * node, low, middle);
+    this.build(2 * node + 1, middle + 1, high);
+    this.update(node);
+  }
+
+  private update(node: number): void {
+    this.maxLines[node] =
+      Math.max(this.maxLines[2 * node], this.maxLines[2 * node + 1]) +
+      this.offsets[node];
+  }
+
+  /** Adds the displacement to the diagnostics from index `from` on. */
+  private shift(
+    node: number,
+    low: number,
+    high: number,
+    from: number,
+    displacement: number,
+  ): void {
+    if (high < from) {
+      return;
+    }
+    if (low >= from) {
+      this.offsets[node] += displacement;
+      this.maxLines[node] += displacement;
+      return;
+    }
+    const middle = (low + high) >> 1;
+    this.shift(2 * node, low, middle, from, displacement);
+    this.shift(2 * node + 1, middle + 1, high, from, displacement);
+    this.update(node);
+  }
+
+  private remove(
+    node: number,
+    low: number,
+    high: number,
+    index: number,
+  ): void {
+    if (low === high) {
+      this.removed[index] = true;
+      this.maxLines[node] = -Infinity;
+      this.count--;
+      return;
+    }
+    const middle = (low + high) >> 1;
+    if (index <= middle) {
+      this.remove(2 * node, low, middle, index);
+    } else {
+      this.remove(2 * node + 1, middle + 1, high, index);
+    }
+    this.update(node);
+  }
+
+  /** Current start line of the diagnostic at the given index. */
+  private getLine(index: number): number {
+    let node = 1;
+    let low = 0;
+    let high = this.diagnostics.length - 1;
+    let offset = 0;
+    while (low !== high) {
+      offset += this.offsets[node];
+      const middle = (low + high) >> 1;
+      if (index <= middle) {
+        node = 2 * node;
+        high = middle;
+      } else {
+        node = 2 * node + 1;
+        low = middle + 1;
+      }
+    }
+    return this.lines[index] + offset + this.offsets[node];
+  }
+
+  /**
+   * Index of the first diagnostic left starting at or below the given line,
+   * or the number of diagnostics if there is none. Relies on diagnostics
+   * left staying sorted, as edits move all those below them alike.
+   */
+  private findFirst(line: number): number {
+    let node = 1;
+    let low = 0;
+    let high = this.diagnostics.length - 1;
+    let offset = 0;
+    if (this.maxLines[node] < line) {
+      return this.diagnostics.length;
+    }
+    while (low !== high) {
+      offset += this.offsets[node];
+      const middle = (low + high) >> 1;
+      if (this.maxLines[2 * node] + offset >= line) {
+        node = 2 * node;
+        high = middle;
+      } else {
+        node = 2 * node + 1;
+        low = middle + 1;
+      }
+    }
+    return low;
+  }
+
+  private collect(
+    node: number,
+    low: number,
+    high: number,
+    offset: number,
+    values: Diagnostic[],
+  ): void {
+    if (this.maxLines[node] === -Infinity) {
+      return;
+    }
+    offset += this.offsets[node];
+    if (low === high) {
+      const diagnostic = this.diagnostics[low];
+      diagnostic.range.start.line = this.lines[low] + offset;
+      diagnostic.range.end.line = this.lines[low] + offset + this.spans[low];
+      values.push(diagnostic);
+      return;
+    }
+    const middle = (low + high) >> 1;
+    this.collect(2 * node, low, middle, offset, values);
+    this.collect(2 * node + 1, middle + 1, high, offset, values);
+  }
+}
@@ -3,6 +3,7 @@ import * as path from "path";
 import { parseDocument } from "yaml";
 import {
   LazyModuleDocumentation,
+  MODULE_DOCUMENTATION_BLOCKS,
   parseRawRouting,
 } from "@src/utils/docsParser.js";
 import { IModuleMetadata } from "@src/interfaces/module.js";
@@ -12,13 +13,248 @@ import {
 } from "@src/interfaces/pluginRouting.js";
 import { globArray } from "@src/utils/pathUtils.js";
 
+/**
+ * Lists the `namespace.collection` names installed in a collections path.
+ */
+export function listCollections(dir: string): string[] {
+  const collections: string[] = [];
+  const rootDir = path.join(dir, "ansible_collections");
+  for (const namespace of readSubdirectories(rootDir)) {
+    for (const collection of readSubdirectories(
+      path.join(rootDir, namespace),
+    )) {
+      collections.push(`${namespace}.${collection}`);
+    }
+  }
+  return collections;
+}
+
+/**
+ * Tells whether any collection installed in a collections path ships a
+ * module, stopping at the first one found.
+ */
+export function hasModuleFiles(dir: string): boolean {
+  return listCollections(dir).some((collectionName) =>
+    containsPluginFile(
+      path.join(
+        dir,
+        "ansible_collections",
+        ...collectionName.split("."),
+        "plugins",
+        "modules",
+      ),
+    ),
+  );
+}
+
+function containsPluginFile(dir: string): boolean {
+  let entries: fs.Dirent[];
+  try {
+    entries = fs.readdirSync(dir, { withFileTypes: true });
+  } catch {
+    return false;
+  }
+  return (
+    entries.some((entry) => entry.isFile() && isPluginFile(entry.name)) ||
+    entries.some(
+      (entry) =>
+        entry.isDirectory() && containsPluginFile(path.join(dir, entry.name)),
+    )
+  );
+}
+
+function readSubdirectories(dir: string): string[] {
+  try {
+    return fs
+      .readdirSync(dir, { withFileTypes: true })
+      .filter((entry) => !entry.name.startsWith("."))
+      .filter(
+        (entry) =>
+          entry.isDirectory() ||
+          (entry.isSymbolicLink() &&
+            fs.statSync(path.join(dir, entry.name)).isDirectory()),
+      )
+      .map((entry) => entry.name);
+  } catch {
+    return [];
+  }
+}
+
+/**
+ * Everything a single traversal of one or more collections has found.
+ */
+export interface ICollectionContents {
+  modules: IModuleMetadata[];
+  docFragments: IModuleMetadata[];
+  pluginRouting: IPluginRoutingByCollection;
+}
+
+/**
+ * Walks all collections installed in a collections path.
+ */
+export async function walkCollections(
+  dir: string,
+): Promise<ICollectionContents> {
+  const contents: ICollectionContents = {
+    modules: [],
+    docFragments: [],
+    pluginRouting: new Map<string, IPluginRoutesByType>(),
+  };
+  for (const collectionName of listCollections(dir)) {
+    await walkCollectionInto(dir, collectionName, contents);
+  }
+  return contents;
+}
+
+/**
+ * Walks the directory tree of a single collection once, collecting its
+ * modules, documentation fragments and plugin routing.
+ */
+export async function walkCollection(
+  dir: string,
+  collectionName: string,
+): Promise<ICollectionContents> {
+  const contents: ICollectionContents = {
+    modules: [],
+    docFragments: [],
+    pluginRouting: new Map<string, IPluginRoutesByType>(),
+  };
+  await walkCollectionInto(dir, collectionName, contents);
+  return contents;
+}
+
+async function walkCollectionInto(
+  dir: string,
+  collectionName: string,
+  contents: ICollectionContents,
+): Promise<void> {
+  const [namespace, collection] = collectionName.split(".");
+  const collectionDir = path.join(
+    dir,
+    "ansible_collections",
+    namespace,
+    collection,
+  );
+  const entries = await readEntries(collectionDir);
+  if (
+    entries.some((e) => e.name === "plugins" && isDirectory(collectionDir, e))
+  ) {
+    const pluginsDir = path.join(collectionDir, "plugins");
+    for (const pluginType of await readEntries(pluginsDir)) {
+      if (!isDirectory(pluginsDir, pluginType)) {
+        continue;
+      }
+      switch (pluginType.name) {
+        case "modules":
+          await walkModules(
+            path.join(pluginsDir, "modules"),
+            namespace,
+            [collection],
+            contents.modules,
+          );
+          break;
+        case "doc_fragments":
+          for (const entry of await readEntries(
+            path.join(pluginsDir, "doc_fragments"),
+          )) {
+            if (
+              (entry.isFile() || entry.isSymbolicLink()) &&
+              isPluginFile(entry.name)
+            ) {
+              const name = path.basename(entry.name, ".py");
+              contents.docFragments.push(
+                new LazyModuleDocumentation(
+                  path.join(pluginsDir, "doc_fragments", entry.name),
+                  `${namespace}.${collection}.${name}`,
+                  namespace,
+                  collection,
+                  name,
+                ),
+              );
+            }
+          }
+          break;
+      }
+    }
+  }
+  if (entries.some((e) => e.name === "meta" && isDirectory(collectionDir, e))) {
+    const runtimeFile = path.join(collectionDir, "meta", "runtime.yml");
+    let runtimeContent;
+    try {
+      runtimeContent = await fs.promises.readFile(runtimeFile, {
+        encoding: "utf8",
+      });
+    } catch {
+      return;
+    }
+    const document: unknown = parseDocument(runtimeContent).toJSON();
+    contents.pluginRouting.set(collectionName, parseRawRouting(document));
+  }
+}
+
+/**
+ * Collects modules recursively. Modules in subdirectories are exposed under
+ * a nested collection name, e.g. `namespace.collection.subdir.module`.
+ * Symlinked modules are aliases and are skipped.
+ */
+async function walkModules(
+  dir: string,
+  namespace: string,
+  collectionPath: string[],
+  modules: IModuleMetadata[],
+): Promise<void> {
+  for (const entry of await readEntries(dir)) {
+    if (entry.isDirectory()) {
+      await walkModules(
+        path.join(dir, entry.name),
+        namespace,
+        [...collectionPath, entry.name],
+        modules,
+      );
+    } else if (entry.isFile() && isPluginFile(entry.name)) {
+      const name = path.basename(entry.name, ".py");
+      const collection = collectionPath.join(".");
+      modules.push(
+        new LazyModuleDocumentation(
+          path.join(dir, entry.name),
+          `${namespace}.${collection}.${name}`,
+          namespace,
+          collection,
+          name,
+          MODULE_DOCUMENTATION_BLOCKS,
+        ),
+      );
+    }
+  }
+}
+
+async function readEntries(dir: string): Promise<fs.Dirent[]> {
+  try {
+    return (await fs.promises.readdir(dir, { withFileTypes: true })).filter(
+      (entry) => !entry.name.startsWith("."),
+    );
+  } catch {
+    return [];
+  }
+}
+
+function isDirectory(dir: string, entry: fs.Dirent): boolean {
+  return (
+    entry.isDirectory() ||
+    (entry.isSymbolicLink() &&
+      fs.statSync(path.join(dir, entry.name), {
+        throwIfNoEntry: false,
+      })?.isDirectory() === true)
+  );
+}
+
+function isPluginFile(name: string): boolean {
+  return name.endsWith(".py") && !name.startsWith("_");
+}
+
 export function findDocumentation(
   dir: string,
-  kind:
-    | "builtin"
-    | "collection"
-    | "builtin_doc_fragment"
-    | "collection_doc_fragment",
+  kind: "builtin" | "builtin_doc_fragment",
 ): IModuleMetadata[] {
   if (!fs.existsSync(dir) || fs.lstatSync(dir).isFile()) {
     return [];
@@ -34,95 +270,34 @@ export function findDocumentation(
         "!/**/_*.py",
       ]);
       break;
-    case "collection":
-      files = globArray([
-        `${dir}/ansible_collections/*/*/plugins/modules/*.py`,
-        `${dir}/ansible_collections/*/*/plugins/modules/**/*.py`,
-        `!${dir}/ansible_collections/*/*/plugins/modules/_*.py`,
-        `!${dir}/ansible_collections/*/*/plugins/modules/**/_*.py`,
-      ]).filter((item) => !fs.lstatSync(item).isSymbolicLink());
-      break;
-    case "collection_doc_fragment":
-      files = globArray([
-        `${dir}/ansible_collections/*/*/plugins/doc_fragments/*.py`,
-        `!${dir}/ansible_collections/*/*/plugins/doc_fragments/_*.py`,
-      ]);
-      break;
   }
   return files.map((file) => {
     const name = path.basename(file, ".py");
-    let namespace;
-    let collection;
-    switch (kind) {
-      case "builtin":
-      case "builtin_doc_fragment":
-        namespace = "ansible";
-        collection = "builtin";
-        break;
-      case "collection":
-      case "collection_doc_fragment": {
-        const pathArray = file.split(path.sep);
-        const pluginsDirIndex = pathArray.indexOf("plugins");
-        namespace = pathArray[pluginsDirIndex - 2];
-        collection = pathArray[pluginsDirIndex - 1];
-        if (pathArray.length > pluginsDirIndex + 3) {
-          const subCollectionArray = pathArray.slice(
-            pluginsDirIndex + 2,
-            pathArray.length - 1,
-          );
-          collection = `${collection}.${subCollectionArray.join(".")}`;
-        }
-        break;
-      }
-    }
-
     return new LazyModuleDocumentation(
       file,
-      `${namespace}.${collection}.${name}`,
-      namespace,
-      collection,
+      `ansible.builtin.${name}`,
+      "ansible",
+      "builtin",
       name,
+      kind === "builtin" ? MODULE_DOCUMENTATION_BLOCKS : undefined,
     );
   });
 }
 
 export async function findPluginRouting(
   dir: string,
-  kind: "builtin" | "collection",
 ): Promise<IPluginRoutingByCollection> {
   const pluginRouting = new Map<string, IPluginRoutesByType>();
   if (!fs.existsSync(dir) || fs.lstatSync(dir).isFile()) {
     return pluginRouting;
   }
-  let files;
-  switch (kind) {
-    case "builtin":
-      files = globArray([`${dir}/config/ansible_builtin_runtime.yml`]);
-      break;
-    case "collection":
-      files = globArray([`${dir}/ansible_collections/*/*/meta/runtime.yml`]);
-      break;
-  }
+  const files = globArray([`${dir}/config/ansible_builtin_runtime.yml`]);
   for (const file of files) {
-    let collection;
-    switch (kind) {
-      case "builtin": {
-        collection = "ansible.builtin";
-        break;
-      }
-      case "collection": {
-        const pathArray = file.split(path.sep);
-        collection = `${pathArray[pathArray.length - 4]}.${
-          pathArray[pathArray.length - 3]
-        }`;
-        break;
-      }
-    }
     const runtimeContent = await fs.promises.readFile(file, {
       encoding: "utf8",
     });
     const document: unknown = parseDocument(runtimeContent).toJSON();
-    pluginRouting.set(collection, parseRawRouting(document));
+    pluginRouting.set("ansible.builtin", parseRawRouting(document));
   }
 
   return pluginRouting;
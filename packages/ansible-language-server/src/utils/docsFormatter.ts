@@ -7,6 +7,66 @@ import {
   IOption,
 } from "@src/interfaces/module.js";
 import { IPluginRoute } from "@src/interfaces/pluginRouting.js";
+import { CACHE_BUDGET, LRUCache } from "@src/utils/lruCache.js";
+import { perfStats } from "@src/utils/perfStats.js";
+
+/**
+ * Identifies a piece of rendered documentation.
+ */
+export interface IRenderedDocsKey {
+  /** generation of the docs index the documentation comes from */
+  generation: number;
+  /** FQCN the module has been looked up with */
+  fqcn: string;
+  /** source file of the module */
+  source: string;
+  /**
+   * stamp of the source file, from `getFileStamp`, taken once per request by
+   * the caller
+   */
+  stamp: string | undefined;
+  /** option followed by its parent options, if an option is rendered */
+  optionPath?: string[];
+  /** variant of the rendering, e.g. with or without details */
+  variant?: string;
+}
+
+const renderedDocsCache = new LRUCache<string, MarkupContent>(
+  CACHE_BUDGET.renderedDocs,
+  "renderedDocs",
+);
+
+/**
+ * Returns documentation rendered before under the same key. Otherwise renders
+ * it with `render` and remembers the result. Entries of older generations of
+ * the docs index are never hit again and fall out of the cache over time.
+ *
+ * The stamp of the source file is part of the key, as modules outside of the
+ * index, e.g. in playbook adjacent collections, can change without the
+ * generation being bumped.
+ */
+export function getRenderedDocs(
+  key: IRenderedDocsKey,
+  render: () => MarkupContent,
+): MarkupContent {
+  const cacheKey = [
+    key.generation,
+    key.fqcn,
+    key.source,
+    key.stamp ?? "",
+    (key.optionPath || []).join("."),
+    key.variant || "",
+  ].join("\0");
+  let rendered = renderedDocsCache.get(cacheKey);
+  if (!rendered) {
+    perfStats.recordCacheMiss("renderedDocs");
+    rendered = render();
+    renderedDocsCache.set(cacheKey, rendered);
+  } else {
+    perfStats.recordCacheHit("renderedDocs");
+  }
+  return rendered;
+}
 
 export function formatModule(
   module: IModuleDocumentation,
@@ -3,6 +3,7 @@ import * as fs from "fs";
 import { parseDocument, YAMLError } from "yaml";
 import {
   IDescription,
+  IDocumentationDetail,
   IModuleDocumentation,
   IModuleMetadata,
   IOption,
@@ -17,10 +18,23 @@ import {
 
 const DOCUMENTATION = "DOCUMENTATION";
 
+/**
+ * Documentation blocks used from modules. Blocks such as `EXAMPLES` and
+ * `RETURN` are not used by the server and are not parsed at all.
+ */
+export const MODULE_DOCUMENTATION_BLOCKS: ReadonlySet<string> = new Set([
+  DOCUMENTATION,
+]);
+
+/**
+ * Merges the documentation fragments listed in
+ * `extends_documentation_fragment` into the main documentation of the module.
+ * @returns names of the listed fragments
+ */
 export function processDocumentationFragments(
   module: IModuleMetadata,
   docFragments: Map<string, IModuleMetadata>,
-): void {
+): string[] {
   module.fragments = [];
   const mainDocumentationFragment =
     module.rawDocumentationFragments.get(DOCUMENTATION);
@@ -39,17 +53,10 @@ export function processDocumentationFragments(
         : [];
     const resultContents = {};
     for (const docFragmentName of docFragmentNames) {
-      const fragmentNameArray = docFragmentName.split(".");
-      let fragmentPartName: string;
-      if (fragmentNameArray.length === 2 || fragmentNameArray.length === 4) {
-        fragmentPartName = fragmentNameArray.pop()?.toUpperCase() as string;
-      } else {
-        fragmentPartName = DOCUMENTATION;
-      }
-      const docFragmentCatalogueName = fragmentNameArray.join(".");
-      const docFragment =
-        docFragments.get(docFragmentCatalogueName) ||
-        docFragments.get(`ansible.builtin.${docFragmentCatalogueName}`);
+      const [docFragment, fragmentPartName] = resolveDocumentationFragment(
+        docFragmentName,
+        docFragments,
+      );
       if (
         docFragment &&
         docFragment.rawDocumentationFragments.has(fragmentPartName)
@@ -68,7 +75,33 @@ export function processDocumentationFragments(
       docFragmentMergeCustomizer,
     );
     module.rawDocumentationFragments.set(DOCUMENTATION, resultContents);
+    return docFragmentNames;
+  }
+  return [];
+}
+
+/**
+ * Finds the documentation fragment referred to by a name used in
+ * `extends_documentation_fragment`.
+ * @returns the fragment, if found, and the name of the documentation part
+ * to take from it
+ */
+export function resolveDocumentationFragment(
+  docFragmentName: string,
+  docFragments: Map<string, IModuleMetadata>,
+): [IModuleMetadata | undefined, string] {
+  const fragmentNameArray = docFragmentName.split(".");
+  let fragmentPartName: string;
+  if (fragmentNameArray.length === 2 || fragmentNameArray.length === 4) {
+    fragmentPartName = fragmentNameArray.pop()?.toUpperCase() as string;
+  } else {
+    fragmentPartName = DOCUMENTATION;
   }
+  const docFragmentCatalogueName = fragmentNameArray.join(".");
+  const docFragment =
+    docFragments.get(docFragmentCatalogueName) ||
+    docFragments.get(`ansible.builtin.${docFragmentCatalogueName}`);
+  return [docFragment, fragmentPartName];
 }
 
 function docFragmentMergeCustomizer(
@@ -225,6 +258,67 @@ function parseRawDeprecationOrTombstone(
   };
 }
 
+/**
+ * Request to extract the documentation of a module source in a worker thread.
+ */
+export interface IDocumentationTask {
+  source: string;
+  blocks?: ReadonlySet<string>;
+}
+
+/**
+ * Documentation blocks extracted from a module source, in a form that can be
+ * passed between threads.
+ */
+export interface IExtractedDocumentation {
+  fragments: Map<string, Record<string, unknown>>;
+  sourceLineRange: [number, number];
+  errors: YAMLError[];
+}
+
+/**
+ * Extracts and parses the documentation blocks (`DOCUMENTATION`, `EXAMPLES`,
+ * etc.) of a module source.
+ * @param blocks - names of the blocks to parse, all blocks when omitted
+ */
+export function extractDocumentation(
+  contents: string,
+  blocks?: ReadonlySet<string>,
+): IExtractedDocumentation {
+  const extracted: IExtractedDocumentation = {
+    fragments: new Map<string, Record<string, unknown>>(),
+    sourceLineRange: [0, 0],
+    errors: [],
+  };
+  const docsRegex = new RegExp(LazyModuleDocumentation.docsRegex);
+  let m;
+  while ((m = docsRegex.exec(contents)) !== null) {
+    if (m && m.groups && m.groups.name && m.groups.doc && m.groups.pre) {
+      if (blocks && !blocks.has(m.groups.name)) {
+        continue;
+      }
+      if (m.groups.name === DOCUMENTATION) {
+        // determine documentation start/end lines for definition provider
+        let startLine =
+          contents.substring(0, m.index).match(/\n/g)?.length || 0;
+        startLine += m.groups.pre.match(/\n/g)?.length || 0;
+        const endLine = startLine + (m.groups.doc.match(/\n/g)?.length || 0);
+        extracted.sourceLineRange = [startLine, endLine];
+      }
+
+      const document = parseDocument(m.groups.doc);
+      // There's about 20 modules (out of ~3200) in Ansible 2.9 libs that contain YAML syntax errors
+      // Still, document.toJSON() works on them
+      extracted.fragments.set(
+        m.groups.name,
+        document.toJSON() as Record<string, unknown>,
+      );
+      extracted.errors = document.errors;
+    }
+  }
+  return extracted;
+}
+
 export class LazyModuleDocumentation implements IModuleMetadata {
   public static docsRegex =
     /(?<pre>[ \t]*(?<name>[A-Z0-9_]+)\s*=\s*r?(?<quotes>'''|""")(?:\n---)?\n?)(?<doc>(?:(?!\k<quotes>)[\s\S])*)\k<quotes>/g;
@@ -235,7 +329,12 @@ export class LazyModuleDocumentation implements IModuleMetadata {
   namespace: string;
   collection: string;
   name: string;
+  documentation?: IModuleDocumentation;
+  documentationDetail?: IDocumentationDetail;
+  fragments?: IModuleMetadata[];
   errors: YAMLError[] = [];
+  /** names of the documentation blocks to parse, all blocks when undefined */
+  readonly blocks: ReadonlySet<string> | undefined;
 
   private _contents: Map<string, Record<string, unknown>> | undefined;
 
@@ -245,43 +344,44 @@ export class LazyModuleDocumentation implements IModuleMetadata {
     namespace: string,
     collection: string,
     name: string,
+    blocks?: ReadonlySet<string>,
   ) {
     this.source = source;
     this.fqcn = fqcn;
     this.namespace = namespace;
     this.collection = collection;
     this.name = name;
+    this.blocks = blocks;
+  }
+
+  public get isLoaded(): boolean {
+    return this._contents !== undefined;
+  }
+
+  /**
+   * Drops the parsed documentation blocks. They are extracted again from the
+   * source if accessed later on.
+   */
+  public releaseRawDocumentation(): void {
+    this._contents = undefined;
+  }
+
+  /**
+   * Uses documentation that has been extracted elsewhere, e.g. in a worker
+   * thread, instead of reading the source on first access.
+   */
+  public load(extracted: IExtractedDocumentation): void {
+    this._contents = extracted.fragments;
+    this.sourceLineRange = extracted.sourceLineRange;
+    this.errors = extracted.errors;
   }
 
   public get rawDocumentationFragments(): Map<string, Record<string, unknown>> {
     if (!this._contents) {
-      this._contents = new Map<string, Record<string, unknown>>();
       const contents = fs.readFileSync(this.source, { encoding: "utf8" });
-      let m;
-      while ((m = LazyModuleDocumentation.docsRegex.exec(contents)) !== null) {
-        if (m && m.groups && m.groups.name && m.groups.doc && m.groups.pre) {
-          if (m.groups.name === DOCUMENTATION) {
-            // determine documentation start/end lines for definition provider
-            let startLine =
-              contents.substring(0, m.index).match(/\n/g)?.length || 0;
-            startLine += m.groups.pre.match(/\n/g)?.length || 0;
-            const endLine =
-              startLine + (m.groups.doc.match(/\n/g)?.length || 0);
-            this.sourceLineRange = [startLine, endLine];
-          }
-
-          const document = parseDocument(m.groups.doc);
-          // There's about 20 modules (out of ~3200) in Ansible 2.9 libs that contain YAML syntax errors
-          // Still, document.toJSON() works on them
-          this._contents.set(
-            m.groups.name,
-            document.toJSON() as Record<string, unknown>,
-          );
-          this.errors = document.errors;
-        }
-      }
+      this.load(extractDocumentation(contents, this.blocks));
     }
-    return this._contents;
+    return this._contents as Map<string, Record<string, unknown>>;
   }
 
   public set rawDocumentationFragments(
@@ -0,0 +1,384 @@
+import * as crypto from "crypto";
+import * as fs from "fs";
+import * as path from "path";
+import {
+  IDocumentationDetail,
+  IModuleDocumentation,
+  IModuleMetadata,
+  IOption,
+} from "@src/interfaces/module.js";
+import {
+  LazyModuleDocumentation,
+  processDocumentationFragments,
+  processRawDocumentation,
+  resolveDocumentationFragment,
+} from "@src/utils/docsParser.js";
+import { getCacheBasePath, getFileStamp } from "@src/utils/misc.js";
+import { perfStats } from "@src/utils/perfStats.js";
+
+/** Bumped whenever the stored format or the processing changes. */
+const STORE_VERSION = 1;
+
+type ISerializedOption = Omit<IOption, "suboptions"> & {
+  suboptions?: ISerializedOption[];
+};
+
+type ISerializedModuleDocumentation = Omit<IModuleDocumentation, "options"> & {
+  options: ISerializedOption[];
+};
+
+interface IStoredFragment {
+  name: string;
+  source?: string;
+  stamp?: string;
+}
+
+interface IStoredModuleDocumentation {
+  version: number;
+  source: string;
+  stamp: string;
+  fragments: IStoredFragment[];
+  sourceLineRange: [number, number];
+  documentation?: ISerializedModuleDocumentation;
+}
+
+interface IProcessedModuleDocumentation {
+  /** stored entry, without the serialized documentation */
+  stored: IStoredModuleDocumentation;
+  documentation?: IModuleDocumentation;
+  detail: IDocumentationDetail;
+}
+
+// documentation processed by this process, shared by all docs libraries
+const processedDocumentation = new Map<string, IProcessedModuleDocumentation>();
+
+// the same option names, types, choices, etc. repeat across many modules;
+// only such short strings are interned, up to a bounded number of them
+const MAX_INTERNED_LENGTH = 32;
+const MAX_INTERNED_STRINGS = 20000;
+const internedStrings = new Map<string, string>();
+
+/**
+ * Provides the typed documentation of a module with its documentation
+ * fragments merged in.
+ *
+ * The result is stored by module source, along with the fragments it has
+ * been merged from. It is reused, also by other docs libraries and later
+ * server processes, as long as neither the module nor the fragments it
+ * resolves to have changed.
+ *
+ * With the `options` detail, only the options are loaded, without their
+ * descriptions. They are stored apart from the full documentation, which is
+ * loaded once a caller asks for it.
+ */
+export function loadModuleDocumentation(
+  module: IModuleMetadata,
+  docFragments: Map<string, IModuleMetadata>,
+  detail: IDocumentationDetail = "full",
+): void {
+  if (hasDocumentation(module, detail)) {
+    return; // already processed
+  }
+  let processed = processedDocumentation.get(module.source);
+  if (
+    !processed ||
+    !covers(processed.detail, detail) ||
+    !isUpToDate(processed.stored, docFragments)
+  ) {
+    processed = readProcessedDocumentation(module.source, docFragments, detail);
+  }
+  if (processed) {
+    perfStats.recordCacheHit("documentation");
+    processedDocumentation.set(module.source, processed);
+    module.fragments = [];
+    module.sourceLineRange = processed.stored.sourceLineRange;
+    module.documentation = processed.documentation;
+    module.documentationDetail = processed.detail;
+    return;
+  }
+
+  perfStats.recordCacheMiss("documentation");
+  const stamp = getFileStamp(module.source);
+  // collect information from documentation fragments
+  const fragmentNames = processDocumentationFragments(module, docFragments);
+  // translate raw documentation into a typed structure
+  const documentation = processRawDocumentation(
+    module.rawDocumentationFragments,
+  );
+  const fullDocumentation = documentation && internDocumentation(documentation);
+  const optionsDocumentation =
+    fullDocumentation && getOptionsDocumentation(fullDocumentation);
+  module.documentation =
+    detail === "full" ? fullDocumentation : optionsDocumentation;
+  module.documentationDetail = detail;
+  if (module instanceof LazyModuleDocumentation) {
+    // the typed documentation is all that is needed from now on
+    module.releaseRawDocumentation();
+  }
+  if (stamp === undefined) {
+    return;
+  }
+  const stored: IStoredModuleDocumentation = {
+    version: STORE_VERSION,
+    source: module.source,
+    stamp: stamp,
+    fragments: fragmentNames.map((name) => {
+      const [fragment] = resolveDocumentationFragment(name, docFragments);
+      return {
+        name: name,
+        source: fragment?.source,
+        stamp: fragment ? getFileStamp(fragment.source) : undefined,
+      };
+    }),
+    sourceLineRange: module.sourceLineRange,
+  };
+  processedDocumentation.set(module.source, {
+    stored: stored,
+    documentation: module.documentation,
+    detail: detail,
+  });
+  // both details are stored, so that either is found by later lookups
+  void writeStoredDocumentation(stored, "full", fullDocumentation);
+  void writeStoredDocumentation(stored, "options", optionsDocumentation);
+}
+
+function hasDocumentation(
+  module: IModuleMetadata,
+  detail: IDocumentationDetail,
+): boolean {
+  if (module.documentationDetail) {
+    return covers(module.documentationDetail, detail);
+  }
+  // documentation provided by other means is complete
+  return !!(module.fragments || module.documentation);
+}
+
+/** Tells whether documentation loaded with one detail serves another. */
+function covers(
+  loaded: IDocumentationDetail,
+  requested: IDocumentationDetail,
+): boolean {
+  return loaded === "full" || requested === "options";
+}
+
+/**
+ * Reads the documentation stored with the requested detail, falling back to
+ * the full documentation for the options.
+ */
+function readProcessedDocumentation(
+  source: string,
+  docFragments: Map<string, IModuleMetadata>,
+  detail: IDocumentationDetail,
+): IProcessedModuleDocumentation | undefined {
+  const details: IDocumentationDetail[] =
+    detail === "options" ? ["options", "full"] : ["full"];
+  for (const storedDetail of details) {
+    const stored = readStoredDocumentation(source, storedDetail);
+    if (stored && isUpToDate(stored, docFragments)) {
+      let documentation = stored.documentation
+        ? internDocumentation(deserializeDocumentation(stored.documentation))
+        : undefined;
+      if (documentation && storedDetail !== detail) {
+        documentation = getOptionsDocumentation(documentation);
+      }
+      return {
+        stored: { ...stored, documentation: undefined },
+        documentation: documentation,
+        detail: detail,
+      };
+    }
+  }
+}
+
+/**
+ * Keeps the part of the documentation needed to recognize the options of
+ * the module, leaving out the texts that are only rendered for the user.
+ */
+function getOptionsDocumentation(
+  documentation: IModuleDocumentation,
+): IModuleDocumentation {
+  return {
+    module: documentation.module,
+    deprecated: documentation.deprecated,
+    options: getOptionsWithoutDescriptions(documentation.options),
+  };
+}
+
+function getOptionsWithoutDescriptions(
+  options: Map<string, IOption>,
+): Map<string, IOption> {
+  // aliases refer to the same option, keep it that way
+  const copies = new Map<IOption, IOption>();
+  const result = new Map<string, IOption>();
+  for (const [name, option] of options) {
+    let copy = copies.get(option);
+    if (!copy) {
+      copy = {
+        ...option,
+        suboptions:
+          option.suboptions &&
+          getOptionsWithoutDescriptions(option.suboptions),
+      };
+      delete copy.description;
+      copies.set(option, copy);
+    }
+    result.set(name, copy);
+  }
+  return result;
+}
+
+function intern<T>(value: T): T {
+  if (typeof value !== "string" || value.length > MAX_INTERNED_LENGTH) {
+    return value;
+  }
+  let interned = internedStrings.get(value);
+  if (interned === undefined) {
+    interned = value;
+    if (internedStrings.size < MAX_INTERNED_STRINGS) {
+      internedStrings.set(value, interned);
+    }
+  }
+  return interned as T;
+}
+
+/**
+ * Replaces the repeating vocabulary of the options, such as their names,
+ * types and choices, by a single shared copy. Descriptions are mostly unique
+ * and are kept as they are.
+ */
+function internDocumentation(
+  documentation: IModuleDocumentation,
+): IModuleDocumentation {
+  internOptions(documentation.options);
+  return documentation;
+}
+
+function internOptions(options: Map<string, IOption>): void {
+  for (const option of new Set(options.values())) {
+    option.name = intern(option.name);
+    option.type = intern(option.type);
+    option.elements = intern(option.elements);
+    option.versionAdded = intern(option.versionAdded);
+    option.default = intern(option.default);
+    option.choices = option.choices?.map(intern);
+    option.aliases = option.aliases?.map(intern);
+    if (option.suboptions) {
+      internOptions(option.suboptions);
+    }
+  }
+}
+
+function isUpToDate(
+  stored: IStoredModuleDocumentation,
+  docFragments: Map<string, IModuleMetadata>,
+): boolean {
+  return (
+    stored.version === STORE_VERSION &&
+    getFileStamp(stored.source) === stored.stamp &&
+    stored.fragments.every((storedFragment) => {
+      const [fragment] = resolveDocumentationFragment(
+        storedFragment.name,
+        docFragments,
+      );
+      return (
+        fragment?.source === storedFragment.source &&
+        (!fragment || getFileStamp(fragment.source) === storedFragment.stamp)
+      );
+    })
+  );
+}
+
+function serializeDocumentation(
+  documentation: IModuleDocumentation,
+): ISerializedModuleDocumentation {
+  return {
+    ...documentation,
+    options: serializeOptions(documentation.options),
+  };
+}
+
+function serializeOptions(options: Map<string, IOption>): ISerializedOption[] {
+  // aliases refer to the same option, store it only once
+  return [...new Set(options.values())].map((option) => ({
+    ...option,
+    suboptions: option.suboptions?.size
+      ? serializeOptions(option.suboptions)
+      : undefined,
+  }));
+}
+
+function deserializeDocumentation(
+  documentation: ISerializedModuleDocumentation,
+): IModuleDocumentation {
+  return {
+    ...documentation,
+    options: deserializeOptions(documentation.options),
+  };
+}
+
+function deserializeOptions(
+  serializedOptions: ISerializedOption[] = [],
+): Map<string, IOption> {
+  const options = new Map<string, IOption>();
+  for (const serializedOption of serializedOptions) {
+    const option: IOption = {
+      ...serializedOption,
+      suboptions: deserializeOptions(serializedOption.suboptions),
+    };
+    options.set(option.name, option);
+    for (const alias of option.aliases || []) {
+      options.set(alias, option);
+    }
+  }
+  return options;
+}
+
+function getStoredDocumentationPath(
+  source: string,
+  detail: IDocumentationDetail,
+): string {
+  const hash = crypto.createHash("sha256").update(source).digest("hex");
+  const suffix = detail === "full" ? "" : `.${detail}`;
+  return path.join(getCacheBasePath(), "docs", `${hash}${suffix}.json`);
+}
+
+function readStoredDocumentation(
+  source: string,
+  detail: IDocumentationDetail,
+): IStoredModuleDocumentation | undefined {
+  try {
+    const stored = JSON.parse(
+      fs.readFileSync(getStoredDocumentationPath(source, detail), "utf8"),
+    ) as IStoredModuleDocumentation;
+    if (stored.source === source) {
+      return stored;
+    }
+  } catch {
+    // not stored yet or unreadable, process the module again
+  }
+}
+
+async function writeStoredDocumentation(
+  stored: IStoredModuleDocumentation,
+  detail: IDocumentationDetail,
+  documentation: IModuleDocumentation | undefined,
+): Promise<void> {
+  const storedPath = getStoredDocumentationPath(stored.source, detail);
+  const tmpPath = `${storedPath}.${process.pid}.tmp`;
+  try {
+    await fs.promises.mkdir(path.dirname(storedPath), { recursive: true });
+    await fs.promises.writeFile(
+      tmpPath,
+      JSON.stringify({
+        ...stored,
+        documentation: documentation
+          ? serializeDocumentation(documentation)
+          : undefined,
+      }),
+    );
+    await fs.promises.rename(tmpPath, storedPath);
+  } catch {
+    // storing is an optimization only
+    await fs.promises.rm(tmpPath, { force: true }).catch(() => undefined);
+  }
+}
@@ -0,0 +1,31 @@
+/**
+ * Worker thread entry point extracting module documentation off the main
+ * thread. Each task names a module source and the blocks to parse.
+ */
+import { promises as fs } from "fs";
+import { YAMLError } from "yaml";
+import {
+  extractDocumentation,
+  IDocumentationTask,
+  IExtractedDocumentation,
+} from "@src/utils/docsParser.js";
+import { serveWorkerTasks } from "@src/utils/workerPool.js";
+
+serveWorkerTasks<IDocumentationTask, IExtractedDocumentation>(async (task) => {
+  const extracted = extractDocumentation(
+    await fs.readFile(task.source, { encoding: "utf8" }),
+    task.blocks,
+  );
+  // errors do not survive structured cloning, pass their data instead
+  extracted.errors = extracted.errors.map(
+    (error) =>
+      ({
+        name: error.name,
+        code: error.code,
+        message: error.message,
+        pos: error.pos,
+        linePos: error.linePos,
+      }) as YAMLError,
+  );
+  return extracted;
+});
@@ -189,8 +189,9 @@ async function getAnsibleLintInfo() {
   ansibleLintInfo["location"] =
     ansibleLintPathResult?.stdout.trim() || undefined;
 
-  ansibleLintInfo["config file path"] =
-    context.ansibleLint.ansibleLintConfigFilePath;
+  ansibleLintInfo["config file path"] = (
+    await context.ansibleLint
+  ).ansibleLintConfigFilePath;
 
   return ansibleLintInfo;
 }
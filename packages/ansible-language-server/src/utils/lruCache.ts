@@ -0,0 +1,84 @@
+import { perfStats } from "@src/utils/perfStats.js";
+
+/**
+ * Maximum number of entries of the caches growing with the number of files
+ * seen during a session. Together they bound what is kept for documents that
+ * have been closed or were only referenced by lint reports. Budgets count
+ * entries, not bytes: an entry costs as much as the file it is kept for.
+ */
+export const CACHE_BUDGET = {
+  /** settings per scope */
+  settings: 500,
+  /** cached diagnostics per file */
+  validation: 1000,
+  /** parsed role metadata files */
+  metadata: 200,
+  /** location of the metadata file per document */
+  metadataUris: 5000,
+  /** rendered module documentation */
+  renderedDocs: 1000,
+};
+
+/**
+ * Map bounded to a maximum number of entries, evicting the least recently
+ * used entry first. Relies on `Map` keeping insertion order.
+ *
+ * Named caches report their number of entries and evictions in the
+ * performance statistics.
+ */
+export class LRUCache<K, V> {
+  private cache = new Map<K, V>();
+  private maxSize: number;
+  private name: string | undefined;
+
+  constructor(maxSize: number, name?: string) {
+    this.maxSize = maxSize;
+    this.name = name;
+    if (name) {
+      perfStats.trackCacheSize(name, this);
+    }
+  }
+
+  public get size(): number {
+    return this.cache.size;
+  }
+
+  public get(key: K): V | undefined {
+    const value = this.cache.get(key);
+    if (value !== undefined) {
+      // move to the most recently used position
+      this.cache.delete(key);
+      this.cache.set(key, value);
+    }
+    return value;
+  }
+
+  public has(key: K): boolean {
+    return this.cache.has(key);
+  }
+
+  public set(key: K, value: V): void {
+    this.cache.delete(key);
+    this.cache.set(key, value);
+    while (this.cache.size > this.maxSize) {
+      const oldestKey = this.cache.keys().next().value as K;
+      this.cache.delete(oldestKey);
+      if (this.name) {
+        perfStats.recordCacheEviction(this.name);
+      }
+    }
+  }
+
+  /** Keys from the least to the most recently used. */
+  public keys(): IterableIterator<K> {
+    return this.cache.keys();
+  }
+
+  public delete(key: K): boolean {
+    return this.cache.delete(key);
+  }
+
+  public clear(): void {
+    this.cache.clear();
+  }
+}
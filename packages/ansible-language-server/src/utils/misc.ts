@@ -8,6 +8,27 @@ import { TextDocument } from "vscode-languageserver-textdocument";
 import { Range } from "vscode-languageserver-types";
 import * as path from "node:path";
 
+/**
+ * Returns the base directory where the language server keeps its host-side
+ * caches, honoring `XDG_CACHE_HOME`.
+ */
+export function getCacheBasePath(): string {
+  const cacheBase =
+    process.env.XDG_CACHE_HOME || `${process.env.HOME || homedir()}/.cache`;
+  return path.resolve(`${cacheBase}/ansible-language-server`);
+}
+
+/**
+ * Identifies the current version of a file by its modification time and
+ * size, or returns undefined if it does not exist.
+ */
+export function getFileStamp(file: string): string | undefined {
+  const stats = statSync(file, { throwIfNoEntry: false });
+  if (stats) {
+    return `${stats.mtimeMs}-${stats.size}`;
+  }
+}
+
 export async function fileExists(filePath: string): Promise<boolean> {
   return !!(await fs.stat(filePath).catch(() => false));
 }
@@ -143,6 +164,15 @@ export function isObject<X>(obj: X): obj is X & Record<PropertyKey, unknown> {
   return obj && typeof obj === "object";
 }
 
+/**
+ * Memoizes a dynamic import, so that the module is only loaded when first
+ * needed.
+ */
+export function lazyImport<T>(load: () => Promise<T>): () => Promise<T> {
+  let module: Promise<T> | undefined;
+  return () => (module ??= load());
+}
+
 export function insert(str: string, index: number, val: string): string {
   return `${str.substring(0, index)}${val}${str.substring(index)}`;
 }
@@ -1,4 +1,6 @@
 import { sync } from "glob";
+import * as fs from "fs";
+import * as path from "path";
 
 /**
  * A glob utility function that that accepts array of patterns and also
@@ -38,3 +40,36 @@ export function globArray(arrayOfPatterns: string[]): string[] {
     return [...matchFilesAfterExclusionSet];
   }
 }
+
+/**
+ * Canonicalizes collections search paths so that each directory is indexed
+ * only once. Paths are resolved through symlinks, paths pointing at an
+ * `ansible_collections` directory itself are mapped to its parent and paths
+ * without any installed collections are dropped. The original order is kept,
+ * as Ansible uses the first path providing a collection.
+ * @param collectionsPaths - collections paths in resolution order
+ * @returns existing, unique collections paths
+ */
+export function canonicalCollectionsPaths(
+  collectionsPaths: string[],
+): string[] {
+  const canonicalPaths = new Set<string>();
+  for (const collectionsPath of collectionsPaths) {
+    let dir = collectionsPath;
+    if (path.basename(dir) === "ansible_collections") {
+      dir = path.dirname(dir);
+    }
+    try {
+      dir = fs.realpathSync(dir);
+    } catch {
+      continue;
+    }
+    if (
+      !canonicalPaths.has(dir) &&
+      fs.existsSync(path.join(dir, "ansible_collections"))
+    ) {
+      canonicalPaths.add(dir);
+    }
+  }
+  return [...canonicalPaths];
+}
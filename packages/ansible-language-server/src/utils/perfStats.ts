@@ -0,0 +1,239 @@
+import { performance } from "perf_hooks";
+
+/** Upper bounds of the latency buckets, in milliseconds. */
+const BUCKET_BOUNDS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000];
+
+export interface ILatencySummary {
+  count: number;
+  mean: number;
+  max: number;
+  p50: number;
+  p90: number;
+  p99: number;
+  /** count per bucket, keyed by its upper bound in milliseconds */
+  buckets: Record<string, number>;
+}
+
+export interface ICacheSummary {
+  hits: number;
+  misses: number;
+  /** entries dropped to stay within the cache budget */
+  evictions: number;
+  /**
+   * current number of entries, for caches tracking their size; entries are
+   * counted, their sizes in memory are not measured
+   */
+  entries?: number;
+}
+
+export interface IPerfStats {
+  /** milliseconds since the statistics have been (re)started */
+  uptime: number;
+  requests: Record<string, ILatencySummary>;
+  processes: Record<string, ILatencySummary>;
+  caches: Record<string, ICacheSummary>;
+}
+
+/**
+ * Latency histogram with fixed exponential buckets. Percentiles are reported
+ * as the upper bound of the bucket they fall in.
+ */
+export class LatencyHistogram {
+  private counts = new Array<number>(BUCKET_BOUNDS.length + 1).fill(0);
+  private count = 0;
+  private sum = 0;
+  private max = 0;
+
+  public record(duration: number): void {
+    let bucket = BUCKET_BOUNDS.findIndex((bound) => duration <= bound);
+    if (bucket === -1) {
+      bucket = BUCKET_BOUNDS.length;
+    }
+    this.counts[bucket]++;
+    this.count++;
+    this.sum += duration;
+    this.max = Math.max(this.max, duration);
+  }
+
+  public summarize(): ILatencySummary {
+    const buckets: Record<string, number> = {};
+    this.counts.forEach((count, index) => {
+      if (count > 0) {
+        buckets[String(BUCKET_BOUNDS[index] ?? "inf")] = count;
+      }
+    });
+    return {
+      count: this.count,
+      mean: this.count ? round(this.sum / this.count) : 0,
+      max: round(this.max),
+      p50: this.percentile(0.5),
+      p90: this.percentile(0.9),
+      p99: this.percentile(0.99),
+      buckets: buckets,
+    };
+  }
+
+  private percentile(fraction: number): number {
+    const rank = Math.ceil(this.count * fraction);
+    let seen = 0;
+    for (let index = 0; index < this.counts.length; index++) {
+      seen += this.counts[index];
+      if (rank > 0 && seen >= rank) {
+        return Math.min(BUCKET_BOUNDS[index] ?? Infinity, round(this.max));
+      }
+    }
+    return 0;
+  }
+}
+
+/**
+ * Collects request latencies, external process timings and cache
+ * efficiency of the server.
+ */
+export class PerfStats {
+  private started = performance.now();
+  private requests = new Map<string, LatencyHistogram>();
+  private processes = new Map<string, LatencyHistogram>();
+  private caches = new Map<string, ICacheSummary>();
+  // caches are referenced weakly, not to outlive the services owning them
+  private cacheSizes = new Map<string, Set<WeakRef<{ size: number }>>>();
+
+  /**
+   * Starts timing a request.
+   * @returns function recording and returning the elapsed time when called
+   */
+  public startTimer(method: string): () => number {
+    const started = performance.now();
+    return () => {
+      const duration = performance.now() - started;
+      this.recordRequest(method, duration);
+      return duration;
+    };
+  }
+
+  public recordRequest(method: string, duration: number): void {
+    getHistogram(this.requests, method).record(duration);
+  }
+
+  public recordProcess(executable: string, duration: number): void {
+    getHistogram(this.processes, executable).record(duration);
+  }
+
+  public recordCacheHit(cache: string): void {
+    this.getCache(cache).hits++;
+  }
+
+  public recordCacheMiss(cache: string): void {
+    this.getCache(cache).misses++;
+  }
+
+  public recordCacheEviction(cache: string): void {
+    this.getCache(cache).evictions++;
+  }
+
+  /**
+   * Reports the number of entries of the given cache in the snapshots.
+   * Caches of the same name, e.g. one per workspace folder, are summed up.
+   */
+  public trackCacheSize(cache: string, sized: { size: number }): void {
+    let sizes = this.cacheSizes.get(cache);
+    if (!sizes) {
+      sizes = new Set();
+      this.cacheSizes.set(cache, sizes);
+    }
+    sizes.add(new WeakRef(sized));
+  }
+
+  public snapshot(): IPerfStats {
+    const caches = Object.fromEntries(
+      [...this.caches].map(([name, cache]) => [name, { ...cache }]),
+    );
+    for (const [name, sizes] of this.cacheSizes) {
+      let entries = 0;
+      for (const ref of sizes) {
+        const sized = ref.deref();
+        if (sized) {
+          entries += sized.size;
+        } else {
+          sizes.delete(ref);
+        }
+      }
+      caches[name] = {
+        ...(caches[name] ?? { hits: 0, misses: 0, evictions: 0 }),
+        entries,
+      };
+    }
+    return {
+      uptime: round(performance.now() - this.started),
+      requests: summarize(this.requests),
+      processes: summarize(this.processes),
+      caches: caches,
+    };
+  }
+
+  /** One-line digest of the statistics, suitable for logs. */
+  public format(): string {
+    const stats = this.snapshot();
+    const latencies = (summaries: Record<string, ILatencySummary>) =>
+      Object.entries(summaries)
+        .map(
+          ([name, s]) => `${name} n=${s.count} p50=${s.p50} p99=${s.p99}ms`,
+        )
+        .join(", ") || "none";
+    const caches =
+      Object.entries(stats.caches)
+        .map(
+          ([name, c]) =>
+            `${name} ${c.hits}/${c.hits + c.misses} hits` +
+            (c.entries !== undefined ? ` ${c.entries} entries` : ""),
+        )
+        .join(", ") || "none";
+    return (
+      `requests: ${latencies(stats.requests)}; ` +
+      `processes: ${latencies(stats.processes)}; caches: ${caches}`
+    );
+  }
+
+  public reset(): void {
+    this.started = performance.now();
+    this.requests.clear();
+    this.processes.clear();
+    this.caches.clear();
+  }
+
+  private getCache(cache: string): ICacheSummary {
+    let summary = this.caches.get(cache);
+    if (!summary) {
+      summary = { hits: 0, misses: 0, evictions: 0 };
+      this.caches.set(cache, summary);
+    }
+    return summary;
+  }
+}
+
+function getHistogram(
+  histograms: Map<string, LatencyHistogram>,
+  name: string,
+): LatencyHistogram {
+  let histogram = histograms.get(name);
+  if (!histogram) {
+    histogram = new LatencyHistogram();
+    histograms.set(name, histogram);
+  }
+  return histogram;
+}
+
+function summarize(
+  histograms: Map<string, LatencyHistogram>,
+): Record<string, ILatencySummary> {
+  return Object.fromEntries(
+    [...histograms].map(([name, histogram]) => [name, histogram.summarize()]),
+  );
+}
+
+function round(value: number): number {
+  return Math.round(value * 100) / 100;
+}
+
+/** Statistics of this server process. */
+export const perfStats = new PerfStats();
@@ -0,0 +1,12 @@
+/**
+ * Worker thread entry point validating the YAML syntax and the schema of
+ * large documents off the main thread.
+ */
+import { Diagnostic } from "vscode-languageserver";
+import {
+  IValidationTask,
+  validateText,
+} from "@src/providers/validationProvider.js";
+import { serveWorkerTasks } from "@src/utils/workerPool.js";
+
+serveWorkerTasks<IValidationTask, Diagnostic[]>(validateText);
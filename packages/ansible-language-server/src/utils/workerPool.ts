@@ -0,0 +1,174 @@
+import * as fs from "fs";
+import * as os from "os";
+import * as path from "path";
+import { fileURLToPath } from "url";
+import { parentPort, TransferListItem, Worker } from "worker_threads";
+
+type WorkerResponse<TResult> = { result: TResult } | { error: string };
+
+interface IPendingTask<TTask, TResult> {
+  task: TTask;
+  transferList?: readonly TransferListItem[];
+  resolve: (result: TResult) => void;
+  reject: (error: Error) => void;
+}
+
+/**
+ * Time after which workers that have nothing to do are terminated, so that
+ * the pool does not hold memory once the burst of work is over.
+ */
+const IDLE_TIMEOUT = 10000;
+
+/**
+ * A small pool of worker threads running the same script. Tasks are queued
+ * and dispatched to the first idle worker. Workers are started on demand and
+ * never keep the process alive.
+ */
+export class WorkerPool<TTask, TResult> {
+  private scriptPath: string;
+  private size: number;
+  private workers = new Set<Worker>();
+  private idleWorkers: Worker[] = [];
+  private runningTasks = new Map<Worker, IPendingTask<TTask, TResult>>();
+  private queue: IPendingTask<TTask, TResult>[] = [];
+  private idleTimer: ReturnType<typeof setTimeout> | undefined;
+
+  constructor(
+    scriptPath: string,
+    size = Math.max(1, Math.min(4, os.availableParallelism() - 1)),
+  ) {
+    this.scriptPath = scriptPath;
+    this.size = size;
+  }
+
+  /**
+   * Runs the task on the first idle worker.
+   * @param transferList - buffers of the task moved to the worker instead of
+   * being copied, they become unusable in the current thread
+   */
+  public run(
+    task: TTask,
+    transferList?: readonly TransferListItem[],
+  ): Promise<TResult> {
+    return new Promise<TResult>((resolve, reject) => {
+      this.queue.push({ task, transferList, resolve, reject });
+      this.schedule();
+    });
+  }
+
+  public dispose(): void {
+    clearTimeout(this.idleTimer);
+    for (const pendingTask of this.queue) {
+      pendingTask.reject(new Error("Worker pool has been disposed"));
+    }
+    this.queue = [];
+    for (const worker of this.workers) {
+      void worker.terminate();
+    }
+  }
+
+  private schedule(): void {
+    clearTimeout(this.idleTimer);
+    while (this.queue.length > 0) {
+      const worker = this.idleWorkers.pop() || this.spawn();
+      if (!worker) {
+        return;
+      }
+      const pendingTask = this.queue.shift() as IPendingTask<TTask, TResult>;
+      this.runningTasks.set(worker, pendingTask);
+      worker.postMessage(pendingTask.task, pendingTask.transferList);
+    }
+    if (this.runningTasks.size === 0 && this.idleWorkers.length > 0) {
+      this.idleTimer = setTimeout(() => {
+        for (const worker of this.idleWorkers) {
+          void worker.terminate();
+        }
+      }, IDLE_TIMEOUT);
+      this.idleTimer.unref();
+    }
+  }
+
+  private spawn(): Worker | undefined {
+    if (this.workers.size >= this.size) {
+      return;
+    }
+    const worker = new Worker(this.scriptPath);
+    worker.unref();
+    worker.on("message", (response: WorkerResponse<TResult>) => {
+      const pendingTask = this.runningTasks.get(worker);
+      this.runningTasks.delete(worker);
+      this.idleWorkers.push(worker);
+      if (pendingTask) {
+        if ("error" in response) {
+          pendingTask.reject(new Error(response.error));
+        } else {
+          pendingTask.resolve(response.result);
+        }
+      }
+      this.schedule();
+    });
+    worker.on("error", (error) => {
+      this.runningTasks.get(worker)?.reject(error);
+      this.runningTasks.delete(worker);
+    });
+    worker.on("exit", (exitCode) => {
+      this.workers.delete(worker);
+      this.idleWorkers = this.idleWorkers.filter((w) => w !== worker);
+      const pendingTask = this.runningTasks.get(worker);
+      if (pendingTask) {
+        this.runningTasks.delete(worker);
+        pendingTask.reject(
+          new Error(`Worker stopped with exit code ${exitCode}`),
+        );
+      }
+      this.schedule();
+    });
+    this.workers.add(worker);
+    return worker;
+  }
+}
+
+/**
+ * Answers tasks posted by a {@link WorkerPool}. To be called from the worker
+ * script.
+ */
+export function serveWorkerTasks<TTask, TResult>(
+  handler: (task: TTask) => TResult | Promise<TResult>,
+): void {
+  parentPort?.on("message", async (task: TTask) => {
+    let response: WorkerResponse<TResult>;
+    try {
+      response = { result: await handler(task) };
+    } catch (error) {
+      response = {
+        error: error instanceof Error ? error.message : String(error),
+      };
+    }
+    parentPort?.postMessage(response);
+  });
+}
+
+/**
+ * Locates a compiled worker script shipped next to this module. Returns
+ * undefined when running from TypeScript sources, in which case the work
+ * should be done on the current thread.
+ */
+export function resolveWorkerScript(name: string): string | undefined {
+  const modulePath = fileURLToPath(import.meta.url);
+  const extension = path.extname(modulePath);
+  if (extension === ".ts") {
+    return;
+  }
+  const moduleDir = path.dirname(modulePath);
+  // depending on the build, this module is either bundled or left in utils
+  for (const dir of [
+    moduleDir,
+    path.join(moduleDir, "utils"),
+    path.join(moduleDir, "..", "utils"),
+  ]) {
+    const scriptPath = path.join(dir, `${name}${extension}`);
+    if (fs.existsSync(scriptPath)) {
+      return scriptPath;
+    }
+  }
+}
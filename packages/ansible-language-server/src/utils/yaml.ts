@@ -13,10 +13,15 @@ import {
   ParseOptions,
   Schema,
   SchemaOptions,
+  visit,
   YAMLMap,
   YAMLSeq,
 } from "yaml";
-import { IModuleMetadata, IOption } from "@src/interfaces/module.js";
+import {
+  IDocumentationDetail,
+  IModuleMetadata,
+  IOption,
+} from "@src/interfaces/module.js";
 import { DocsLibrary } from "@src/services/docsLibrary.js";
 import {
   isTaskKeyword,
@@ -25,6 +30,7 @@ import {
   taskKeywords,
 } from "@src/utils/ansible.js";
 import { Range, Position } from "vscode-languageserver";
+import { insert } from "@src/utils/misc.js";
 
 type Options = ParseOptions & DocumentOptions & SchemaOptions;
 
@@ -187,7 +193,8 @@ function getPathAtOffset(
   if (path) {
     const currentNode = path.at(-1);
     if (isMap(currentNode)) {
-      let pair = _.find(currentNode.items, (p) =>
+      const pairs = findItemsAt(currentNode, offset, inclusive);
+      let pair = _.find(pairs, (p) =>
         contains(p.key as Node, offset, inclusive),
       );
       if (pair) {
@@ -198,9 +205,7 @@ function getPathAtOffset(
           doc,
         );
       }
-      pair = _.find(currentNode.items, (p) =>
-        contains(p.value as Node, offset, inclusive),
-      );
+      pair = _.find(pairs, (p) => contains(p.value as Node, offset, inclusive));
       if (pair) {
         return getPathAtOffset(
           path.concat(pair as unknown as Node, pair.value as Node),
@@ -209,7 +214,7 @@ function getPathAtOffset(
           doc,
         );
       }
-      pair = _.find(currentNode.items, (p) => {
+      pair = _.find(pairs, (p) => {
         const inBetweenNode = doc.createNode(null);
         const start = getOrigRange(p.key as Node)?.[1];
         const end = getOrigRange(p.value as Node)?.[0];
@@ -222,9 +227,8 @@ function getPathAtOffset(
         return path.concat(pair as unknown as Node, doc.createNode(null));
       }
     } else if (isSeq(currentNode)) {
-      const item = _.find(currentNode.items, (n) =>
-        contains(n as Node, offset, inclusive),
-      );
+      const items = findItemsAt(currentNode, offset, inclusive);
+      const item = _.find(items, (n) => contains(n as Node, offset, inclusive));
       if (item) {
         return getPathAtOffset(
           path.concat(item as Node),
@@ -241,6 +245,77 @@ function getPathAtOffset(
   return null;
 }
 
+interface IItemSpans {
+  starts: number[];
+  ends: number[];
+}
+
+// null marks collections whose items cannot be searched by position
+const itemSpansCache = new WeakMap<YAMLMap | YAMLSeq, IItemSpans | null>();
+
+/**
+ * Finds the items of a collection whose source span, including both key and
+ * value of a pair, contains the offset. Items of a parsed collection follow
+ * source order, so their spans are indexed once per collection node and
+ * searched by bisection. All items are returned if they are not in order.
+ */
+function findItemsAt<T>(
+  collection: YAMLMap<unknown, unknown> | YAMLSeq<unknown>,
+  offset: number,
+  inclusive: boolean,
+): T[] {
+  const items = collection.items as T[];
+  let spans = itemSpansCache.get(collection);
+  if (spans === undefined) {
+    spans = getItemSpans(collection);
+    itemSpansCache.set(collection, spans);
+  }
+  if (!spans || spans.ends.length !== items.length) {
+    return items;
+  }
+  const { starts, ends } = spans;
+  let low = 0;
+  let high = ends.length;
+  while (low < high) {
+    const mid = (low + high) >>> 1;
+    if (ends[mid] < offset || (!inclusive && ends[mid] === offset)) {
+      low = mid + 1;
+    } else {
+      high = mid;
+    }
+  }
+  const found: T[] = [];
+  for (let i = low; i < items.length && starts[i] <= offset; i++) {
+    found.push(items[i]);
+  }
+  return found;
+}
+
+function getItemSpans(
+  collection: YAMLMap<unknown, unknown> | YAMLSeq<unknown>,
+): IItemSpans | null {
+  const starts: number[] = [];
+  const ends: number[] = [];
+  for (const item of collection.items) {
+    const ranges = (
+      isPair(item) ? [item.key as Node, item.value as Node] : [item as Node]
+    )
+      .map((node) => getOrigRange(node))
+      .filter((range) => range !== undefined);
+    if (ranges.length === 0) {
+      return null;
+    }
+    const start = Math.min(...ranges.map((range) => range[0]));
+    const end = Math.max(...ranges.map((range) => range[1]));
+    if (start < (starts.at(-1) ?? 0) || end < (ends.at(-1) ?? 0)) {
+      return null;
+    }
+    starts.push(start);
+    ends.push(end);
+  }
+  return { starts, ends };
+}
+
 const tasksKey = /^(tasks|pre_tasks|post_tasks|block|rescue|always|handlers)$/;
 
 /**
@@ -272,12 +347,21 @@ export function isTaskParam(path: Node[]): boolean {
   return false;
 }
 
+// declared collections per task, valid as long as the parsed document is
+const declaredCollectionsCache = new WeakMap<YAMLMap, string[]>();
+
 /**
  * Tries to find the list of collections declared at the Ansible play/block/task level.
+ * The result is shared by all lookups within the same task and must not be
+ * modified.
  */
 export function getDeclaredCollections(modulePath: Node[] | null): string[] {
-  const declaredCollections: string[] = [];
   const taskParamsNode = new AncestryBuilder(modulePath).parent(YAMLMap).get();
+  const cached = taskParamsNode && declaredCollectionsCache.get(taskParamsNode);
+  if (cached) {
+    return cached;
+  }
+  const declaredCollections: string[] = [];
   declaredCollections.push(...getDeclaredCollectionsForMap(taskParamsNode));
 
   let path: Node[] | null = new AncestryBuilder(modulePath)
@@ -301,7 +385,11 @@ export function getDeclaredCollections(modulePath: Node[] | null): string[] {
     .get();
   declaredCollections.push(...getDeclaredCollectionsForMap(playParamsNode));
 
-  return [...new Set(declaredCollections)]; // deduplicate
+  const uniqueCollections = [...new Set(declaredCollections)]; // deduplicate
+  if (taskParamsNode) {
+    declaredCollectionsCache.set(taskParamsNode, uniqueCollections);
+  }
+  return uniqueCollections;
 }
 
 function getDeclaredCollectionsForMap(playNode: YAMLMap | null): string[] {
@@ -395,6 +483,28 @@ export async function getPossibleOptionsForPath(
   document: TextDocument,
   docsLibrary: DocsLibrary,
 ): Promise<Map<string, IOption> | null> {
+  return (
+    (await getOptionsContextForPath(path, document, docsLibrary))?.options ??
+    null
+  );
+}
+
+export interface IOptionsContext {
+  module: IModuleMetadata;
+  /** names of the options leading to the suboptions, if any */
+  optionPath: string[];
+  options: Map<string, IOption>;
+}
+
+/**
+ * Like {@link getPossibleOptionsForPath}, but also provides the module the
+ * options belong to and the names of the options leading to them.
+ */
+export async function getOptionsContextForPath(
+  path: Node[],
+  document: TextDocument,
+  docsLibrary: DocsLibrary,
+): Promise<IOptionsContext | null> {
   const [taskParamPath, suboptionTrace] = getTaskParamPathWithTrace(path);
   if (!taskParamPath) return null;
 
@@ -433,7 +543,11 @@ export async function getPossibleOptionsForPath(
     }
   }
 
-  return options;
+  return {
+    module: module,
+    optionPath: suboptionTrace.map(([optionName]) => optionName),
+    options: options,
+  };
 }
 
 /**
@@ -485,6 +599,7 @@ export async function findProvidedModule(
   taskParamPath: Node[],
   document: TextDocument,
   docsLibrary: DocsLibrary,
+  detail: IDocumentationDetail = "full",
 ): Promise<IModuleMetadata | undefined> {
   const taskParameterMap = new AncestryBuilder(taskParamPath)
     .parent(YAMLMap)
@@ -503,6 +618,8 @@ export async function findProvidedModule(
         m,
         taskParamPath,
         document.uri,
+        undefined,
+        detail,
       );
       if (module) {
         return module;
@@ -546,18 +663,150 @@ export function parseAllDocuments(str: string, options?: Options): Document[] {
   return [doc];
 }
 
+const parsedDocumentsCache = new WeakMap<
+  TextDocument,
+  { version: number; docs: Document[] }
+>();
+
+/**
+ * Parses the text document, reusing the result for the same document version.
+ * The returned documents are shared and must not be modified.
+ */
+export function parseTextDocument(textDocument: TextDocument): Document[] {
+  const cached = parsedDocumentsCache.get(textDocument);
+  if (cached && cached.version === textDocument.version) {
+    return cached.docs;
+  }
+  const docs = parseAllDocuments(textDocument.getText());
+  parsedDocumentsCache.set(textDocument, {
+    version: textDocument.version,
+    docs: docs,
+  });
+  return docs;
+}
+
+const rootSequenceItem = /^-(?:\s|$)/;
+const documentMarker = /^(?:---|\.\.\.)(?:\s|$)/;
+
+/**
+ * Parses only the top-level sequence item (e.g. a play or a task) enclosing
+ * the offset, after inserting `insertion` at the offset. Node ranges are
+ * relative to the whole document, as if the whole modified text was parsed.
+ *
+ * Falls back to parsing the whole modified text when the enclosing item
+ * cannot be told apart from the top-level structure by its indentation.
+ */
+export function parseScopeAt(
+  document: TextDocument,
+  offset: number,
+  insertion: string,
+): Document[] {
+  const cursorLine = document.positionAt(offset).line;
+  const getLine = (line: number) =>
+    document.getText({
+      start: { line: line, character: 0 },
+      end: { line: line + 1, character: 0 },
+    });
+  // a line starting at the first column that does not delimit the scope
+  const isRootContent = (line: string) =>
+    /^[^\s#]/.test(line) && !rootSequenceItem.test(line);
+
+  let startLine: number | undefined;
+  const linePrefix = `${document.getText({
+    start: { line: cursorLine, character: 0 },
+    end: document.positionAt(offset),
+  })}${insertion}`;
+  if (!isRootContent(linePrefix) && !documentMarker.test(linePrefix)) {
+    for (let line = cursorLine; line >= 0; line--) {
+      const text = line === cursorLine ? linePrefix : getLine(line);
+      if (rootSequenceItem.test(text)) {
+        startLine = line;
+        break;
+      }
+      if (isRootContent(text) || documentMarker.test(text)) {
+        break;
+      }
+    }
+  }
+
+  let endOffset: number | undefined;
+  if (startLine !== undefined) {
+    endOffset = document.getText().length;
+    for (let line = cursorLine + 1; line < document.lineCount; line++) {
+      const text = getLine(line);
+      if (rootSequenceItem.test(text) || documentMarker.test(text)) {
+        endOffset = document.offsetAt({ line: line, character: 0 });
+        break;
+      }
+      if (isRootContent(text)) {
+        endOffset = undefined;
+        break;
+      }
+    }
+  }
+
+  if (startLine === undefined || endOffset === undefined) {
+    return parseAllDocuments(insert(document.getText(), offset, insertion));
+  }
+  const startOffset = document.offsetAt({ line: startLine, character: 0 });
+  const scopeText = document.getText({
+    start: { line: startLine, character: 0 },
+    end: document.positionAt(endOffset),
+  });
+  const docs = parseAllDocuments(
+    insert(scopeText, offset - startOffset, insertion),
+  );
+  for (const doc of docs) {
+    visit(doc, {
+      Node(_key, node) {
+        if (node.range) {
+          node.range = [
+            node.range[0] + startOffset,
+            node.range[1] + startOffset,
+            node.range[2] + startOffset,
+          ];
+        }
+      },
+    });
+    doc.range = [
+      doc.range[0] + startOffset,
+      doc.range[1] + startOffset,
+      doc.range[2] + startOffset,
+    ];
+  }
+  return docs;
+}
+
+const playbookCache = new WeakMap<
+  TextDocument,
+  { version: number; isPlaybook: boolean }
+>();
+
 /**
  * For a given yaml file that is recognized as Ansible file, the function
  * checks whether the file is a playbook or not
  * @param textDocument - the text document to check
  */
 export function isPlaybook(textDocument: TextDocument): boolean {
+  const cached = playbookCache.get(textDocument);
+  if (cached && cached.version === textDocument.version) {
+    return cached.isPlaybook;
+  }
+  const isPlaybookValue = checkPlaybook(textDocument);
+  playbookCache.set(textDocument, {
+    version: textDocument.version,
+    isPlaybook: isPlaybookValue,
+  });
+  return isPlaybookValue;
+}
+
+function checkPlaybook(textDocument: TextDocument): boolean {
   // Check for empty file
   if (textDocument.getText().trim().length === 0) {
     return false;
   }
 
-  const yamlDocs = parseAllDocuments(textDocument.getText());
+  const yamlDocs = parseTextDocument(textDocument);
   const path = getPathAt(textDocument, { line: 1, character: 1 }, yamlDocs);
 
   //   Check if keys are present or not
@@ -164,6 +164,36 @@ describe("CLI run() (source)", () => {
     expect(content).toContain("# Language Server Settings");
   });
 
+  it("checks YAML files under a directory with --check", async () => {
+    tempDir = mkdtempSync(join(tmpdir(), "als-cli-check-"));
+    writeFileSync(join(tempDir, "valid.yml"), "- hosts: all\n  tasks: []\n");
+    writeFileSync(join(tempDir, "invalid.yml"), "- hosts: all\n  tasks: [\n");
+    writeFileSync(join(tempDir, "notes.txt"), "not: [yaml\n");
+    const log = vi.spyOn(console, "log").mockImplementation(() => undefined);
+
+    await expect(run(["--check", tempDir, "--format", "sarif"])).resolves.toBe(
+      1,
+    );
+    const sarif = JSON.parse(log.mock.calls[0][0] as string);
+    const results = sarif.runs[0].results;
+    expect(results.length).toBeGreaterThan(0);
+    for (const result of results) {
+      expect(result.ruleId).toBe("Ansible [YAML]");
+      expect(result.level).toBe("error");
+      expect(
+        result.locations[0].physicalLocation.artifactLocation.uri,
+      ).toMatch(/invalid\.yml$/);
+    }
+  });
+
+  it("returns 1 and prints usage when --check has no path", async () => {
+    const err = vi.spyOn(console, "error").mockImplementation(() => undefined);
+    await expect(run(["--check", "--format", "json"])).resolves.toBe(1);
+    expect(err).toHaveBeenCalledWith(
+      "Usage: ansible-language-server --check <paths...> [--format json|sarif]",
+    );
+  });
+
   it("returns 1 when settings docs cannot be written", async () => {
     tempDir = mkdtempSync(join(tmpdir(), "als-cli-run-docs-fail-"));
     const blocker = join(tempDir, "not-a-dir");
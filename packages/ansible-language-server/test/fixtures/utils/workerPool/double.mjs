@@ -0,0 +1,9 @@
+import { parentPort } from "worker_threads";
+
+parentPort.on("message", (task) => {
+  if (typeof task !== "number") {
+    parentPort.postMessage({ error: `Not a number: ${task}` });
+  } else {
+    parentPort.postMessage({ result: task * 2 });
+  }
+});
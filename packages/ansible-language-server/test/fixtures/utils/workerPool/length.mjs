@@ -0,0 +1,5 @@
+import { parentPort } from "worker_threads";
+
+parentPort.on("message", (task) => {
+  parentPort.postMessage({ result: task.byteLength });
+});
@@ -4,12 +4,14 @@ import sinon from "sinon";
 import { CompletionItemKind, CompletionItem } from "vscode-languageserver";
 import {
   doCompletion,
+  doCompletionList,
   doCompletionResolve,
   hasCompletionDocumentUri,
 } from "@src/providers/completionProvider.js";
 import {} from "@src/providers/validationProvider.js";
 import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
 import { SchemaService } from "@src/services/schemaService.js";
+import { matchesModulePrefix } from "@src/services/moduleCatalog.js";
 import {
   createTestWorkspaceManager,
   getDoc,
@@ -1364,6 +1366,79 @@ describe("doCompletion()", function () {
       );
     });
 
+    it("returns short module lists whole for the client to filter", async function () {
+      const textDoc = getDoc("completion/simple_tasks.yml");
+      const context = workspaceManager.getContext(textDoc.uri);
+      expect(context).toBeDefined();
+      if (!context) return;
+
+      const content = "- hosts: localhost\n  tasks:\n    - org_1\n";
+      const doc = TextDocument.create(textDoc.uri, "ansible", 1, content);
+      const position = { line: 2, character: 11 };
+      const list = await doCompletionList(doc, position, context);
+      const allItems = await doCompletion(doc, position, context);
+      expect(list.items.map((i) => i.label)).toContain(
+        "org_1.coll_1.module_1",
+      );
+      // the client matches fuzzily on the filter text
+      expect(list.items.length).toBe(allItems.length);
+      expect(list.isIncomplete).toBe(false);
+    });
+
+    it("narrows long module lists with fuzzy matches", async function () {
+      const textDoc = getDoc("completion/simple_tasks.yml");
+      const context = workspaceManager.getContext(textDoc.uri);
+      expect(context).toBeDefined();
+      if (!context) return;
+
+      const docsLibrary = await context.docsLibrary;
+      const moduleFqcns = new Set(
+        Array.from({ length: 300 }, (_, i) => `org_9.coll_9.module_${i}`),
+      );
+      moduleFqcns.add("ansible.builtin.debug");
+      const getModuleFqcns = sinon
+        .stub(docsLibrary, "getModuleFqcns")
+        .resolves(moduleFqcns);
+      const findModuleFqcns = sinon
+        .stub(docsLibrary, "findModuleFqcns")
+        .callsFake(async (_uri, prefix) =>
+          [...moduleFqcns].filter((fqcn) => matchesModulePrefix(fqcn, prefix)),
+        );
+      try {
+        for (const typed of ["dbg", "builtin"]) {
+          const content = `- hosts: localhost\n  tasks:\n    - ${typed}\n`;
+          const doc = TextDocument.create(textDoc.uri, "ansible", 1, content);
+          const list = await doCompletionList(
+            doc,
+            { line: 2, character: 6 + typed.length },
+            context,
+          );
+          expect(list.items.map((i) => i.label)).toContain(
+            "ansible.builtin.debug",
+          );
+          expect(list.isIncomplete).toBe(true);
+        }
+      } finally {
+        getModuleFqcns.restore();
+        findModuleFqcns.restore();
+      }
+    });
+
+    it("marks complete module lists without prefix", async function () {
+      const textDoc = getDoc("completion/simple_tasks.yml");
+      const context = workspaceManager.getContext(textDoc.uri);
+      expect(context).toBeDefined();
+      if (!context) return;
+
+      const content = "- hosts: localhost\n  tasks:\n    - \n";
+      const doc = TextDocument.create(textDoc.uri, "ansible", 1, content);
+      const position = { line: 2, character: 6 };
+      const list = await doCompletionList(doc, position, context);
+      const allItems = await doCompletion(doc, position, context);
+      // only a truncated list is incomplete
+      expect(list.isIncomplete).toBe(list.items.length < allItems.length);
+    });
+
     it("offers alias options when aliases are enabled", async function () {
       const textDoc = getDoc("completion/simple_tasks.yml");
       const context = workspaceManager.getContext(textDoc.uri);
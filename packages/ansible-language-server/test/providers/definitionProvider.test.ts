@@ -1,4 +1,5 @@
 import { TextDocument } from "vscode-languageserver-textdocument";
+import { CancellationToken, LSPErrorCodes } from "vscode-languageserver";
 import { expect, beforeAll, afterAll, vi } from "vitest";
 import {
   createTestWorkspaceManager,
@@ -167,5 +168,30 @@ describe("getDefinition()", function () {
       );
       expect(result).toBeNull();
     });
+
+    it("stops once the request has been cancelled", async function () {
+      const doc = TextDocument.create(
+        "file:///tmp/def3.yml",
+        "ansible",
+        1,
+        `- hosts: localhost
+  tasks:
+    - ansible.builtin.debug:
+        msg: hello
+`,
+      );
+      const docsLibrary = {
+        findModule: vi.fn().mockResolvedValue([undefined, undefined]),
+      } as unknown as DocsLibrary;
+
+      await expect(
+        getDefinition(
+          doc,
+          { line: 2, character: 8 },
+          docsLibrary,
+          CancellationToken.Cancelled,
+        ),
+      ).rejects.toMatchObject({ code: LSPErrorCodes.RequestCancelled });
+    });
   });
 });
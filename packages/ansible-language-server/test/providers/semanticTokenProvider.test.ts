@@ -1,5 +1,9 @@
 import { expect, beforeAll, afterAll } from "vitest";
-import { SemanticTokenTypes } from "vscode-languageserver";
+import {
+  CancellationTokenSource,
+  LSPErrorCodes,
+  SemanticTokenTypes,
+} from "vscode-languageserver";
 import { TextDocument } from "vscode-languageserver-textdocument";
 import {
   doSemanticTokens,
@@ -122,6 +126,32 @@ describe("doSemanticTokens()", () => {
     ).toBe(true);
   });
 
+  it("only marks tokens within the requested range", async () => {
+    expect(context).toBeDefined();
+    if (!context) {
+      return;
+    }
+
+    const range = {
+      start: { line: 12, character: 0 },
+      end: { line: 16, character: 0 },
+    };
+    const tokens = await doSemanticTokens(
+      textDoc,
+      await context.docsLibrary,
+      undefined,
+      range,
+    );
+
+    const decoded = decodeSemanticTokens(tokens.data);
+    expect(decoded.length).toBeGreaterThan(0);
+    // play keywords before the range are skipped, nodes overlapping it kept
+    expect(decoded.some((t) => t.line < 8)).toBe(false);
+    expect(
+      decoded.some((t) => t.line === 14 && t.typeIndex === classType),
+    ).toBe(true);
+  });
+
   it("marks module parameters for dict, list, unknown options and args", async () => {
     const options = new Map<string, IOption>([
       [
@@ -266,4 +296,36 @@ describe("doSemanticTokens()", () => {
     const tokens = await doSemanticTokens(commentOnly, docsLibrary);
     expect(tokens.data).toEqual([]);
   });
+
+  it("stops when cancelled while marking a large document", async () => {
+    const taskCount = 1000;
+    const tasks = Array.from(
+      { length: taskCount },
+      (_, i) => `    - module_${i}:\n        opt_1: value\n`,
+    ).join("");
+    const largeDoc = TextDocument.create(
+      "file:///tmp/large.yml",
+      "ansible",
+      1,
+      `- hosts: all\n  tasks:\n${tasks}`,
+    );
+    let lookups = 0;
+    const docsLibrary = {
+      findModule: async () => {
+        // keep the event loop busy, as processing real documentation does
+        const end = Date.now() + 1;
+        while (Date.now() < end);
+        lookups++;
+        return [undefined, undefined];
+      },
+    } as unknown as DocsLibrary;
+
+    const source = new CancellationTokenSource();
+    setTimeout(() => source.cancel(), 20);
+    await expect(
+      doSemanticTokens(largeDoc, docsLibrary, source.token),
+    ).rejects.toMatchObject({ code: LSPErrorCodes.RequestCancelled });
+    expect(lookups).toBeGreaterThan(0);
+    expect(lookups).toBeLessThan(taskCount);
+  });
 });
@@ -6,6 +6,8 @@ import {
 import { createTestWorkspaceManager } from "@test/helper.js";
 import type { ExtensionSettings } from "@src/interfaces/extensionSettings.js";
 import { ConfigurationItem } from "vscode-languageclient";
+import { Connection } from "vscode-languageserver";
+import { SettingsManager } from "@src/services/settingsManager.js";
 
 function simulateClientSettings(
   workspaceManager: WorkspaceManager,
@@ -92,3 +94,94 @@ describe("get()", function () {
     });
   });
 });
+
+describe("Settings snapshots", function () {
+  const folderUri = "file:///workspace";
+
+  function createSettingsManager(requests: unknown[]) {
+    const connection = {
+      workspace: {
+        getConfiguration: (items: ConfigurationItem | ConfigurationItem[]) => {
+          requests.push(items);
+          return Promise.resolve(
+            Array.isArray(items)
+              ? items.map(() => ({ validation: { lint: { enabled: false } } }))
+              : {},
+          );
+        },
+      },
+    } as unknown as Connection;
+    return new SettingsManager(connection, true, folderUri);
+  }
+
+  it("resolves the documents of the folder with a single request", async function () {
+    const requests: unknown[] = [];
+    const settingsManager = createSettingsManager(requests);
+
+    await Promise.all(
+      Array.from({ length: 20 }, (_, i) =>
+        settingsManager.get(`${folderUri}/playbook_${i}.yml`),
+      ),
+    );
+    expect(requests).toEqual([{ scopeUri: folderUri, section: "ansible" }]);
+  });
+
+  it("refreshes all scopes in one batch and fires changed handlers", async function () {
+    const requests: unknown[] = [];
+    const settingsManager = createSettingsManager(requests);
+    let fired = 0;
+    settingsManager.onConfigurationChanged(folderUri, () => fired++);
+    await settingsManager.get(`${folderUri}/playbook.yml`);
+    await settingsManager.get("file:///elsewhere/playbook.yml");
+
+    await settingsManager.handleConfigurationChanged({ settings: null });
+    expect(requests.length).toBe(3);
+    expect(requests[2]).toEqual([
+      { scopeUri: folderUri, section: "ansible" },
+      { scopeUri: "file:///elsewhere/playbook.yml", section: "ansible" },
+    ]);
+    expect(fired).toBe(1);
+
+    // refreshed settings are served without further requests
+    const settings = await settingsManager.get(`${folderUri}/playbook.yml`);
+    expect(settings.validation.lint.enabled).toBe(false);
+    expect(requests.length).toBe(3);
+  });
+
+  it("resolves folders sharing the prefix of the folder on their own", async function () {
+    const requests: unknown[] = [];
+    const settingsManager = createSettingsManager(requests);
+
+    await settingsManager.get("file:///workspace2/playbook.yml");
+    expect(requests).toEqual([
+      { scopeUri: "file:///workspace2/playbook.yml", section: "ansible" },
+    ]);
+  });
+
+  it("keeps a newer request when an earlier one fails", async function () {
+    const responses: {
+      resolve: (settings: unknown) => void;
+      reject: (error: Error) => void;
+    }[] = [];
+    const connection = {
+      workspace: {
+        getConfiguration: () =>
+          new Promise((resolve, reject) => responses.push({ resolve, reject })),
+      },
+    } as unknown as Connection;
+    const settingsManager = new SettingsManager(connection, true, folderUri);
+    const uri = "file:///elsewhere/playbook.yml";
+
+    const first = settingsManager.get(uri);
+    // closed and opened again while the first request is pending
+    settingsManager.handleDocumentClosed(uri);
+    const second = settingsManager.get(uri);
+    responses[0].reject(new Error("connection lost"));
+    await expect(first).rejects.toThrow("connection lost");
+    responses[1].resolve({});
+    await second;
+
+    void settingsManager.get(uri);
+    expect(responses.length).toBe(2);
+  });
+});
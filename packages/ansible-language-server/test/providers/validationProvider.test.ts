@@ -1,10 +1,16 @@
 import { TextDocument } from "vscode-languageserver-textdocument";
-import { expect, beforeAll, afterAll, afterEach } from "vitest";
+import { expect, beforeAll, afterAll, afterEach, vi } from "vitest";
 import sinon from "sinon";
-import { Connection, Diagnostic, integer } from "vscode-languageserver";
+import {
+  Connection,
+  Diagnostic,
+  integer,
+  TextDocuments,
+} from "vscode-languageserver";
 import {
   doValidate,
   getYamlValidation,
+  validateText,
 } from "@src/providers/validationProvider.js";
 import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
 import {
@@ -988,6 +994,105 @@ describe("doValidate()", function () {
       expect(result.has(textDocument.uri)).toBe(true);
     });
 
+    it("records the parsing cost without the schema fetch", async function () {
+      const metaUri = resolveDocUri("roles/dummy/meta/main.yml");
+      const textDocument = TextDocument.create(
+        metaUri,
+        "ansible",
+        1,
+        `galaxy_info:\n  author: test\n`,
+      );
+      const folderContext = workspaceManager.getContext(metaUri);
+      expect(folderContext).toBeDefined();
+      if (!folderContext) return;
+
+      await withLintDisabled(folderContext, textDocument.uri);
+
+      const schemaService = {
+        shouldValidateWithSchema: () => true,
+        getSchemaForDocument: async () => {
+          // a schema fetched from the network
+          await new Promise((resolve) => setTimeout(resolve, 300));
+          return { type: "object" };
+        },
+      } as unknown as SchemaService;
+      const recordCost = sinon.stub();
+
+      await doValidate(
+        textDocument,
+        validationManager,
+        true,
+        folderContext,
+        undefined,
+        schemaService,
+        recordCost,
+      );
+
+      expect(recordCost.calledOnce).toBe(true);
+      expect(recordCost.firstCall.args[0]).toBeLessThan(300);
+    });
+
+    it("publishes the diagnostics of the current version only", async function () {
+      const metaUri = resolveDocUri("roles/dummy/meta/main.yml");
+      const oldDocument = TextDocument.create(
+        metaUri,
+        "ansible",
+        1,
+        `galaxy_info: [\n`,
+      );
+      const currentDocument = TextDocument.create(
+        metaUri,
+        "ansible",
+        2,
+        `galaxy_info:\n  author: test\n`,
+      );
+      const folderContext = workspaceManager.getContext(metaUri);
+      expect(folderContext).toBeDefined();
+      if (!folderContext) return;
+
+      await withLintDisabled(folderContext, metaUri);
+
+      const sendDiagnostics = sinon.stub().resolves();
+      const openValidationManager = new ValidationManager(
+        { sendDiagnostics } as unknown as Connection,
+        {
+          get: (uri: string) =>
+            uri === metaUri ? currentDocument : undefined,
+        } as unknown as TextDocuments<TextDocument>,
+      );
+      const schemas = new Map<number, () => void>();
+      const schemaService = {
+        shouldValidateWithSchema: () => true,
+        getSchemaForDocument: (document: TextDocument) =>
+          new Promise((resolve) =>
+            schemas.set(document.version, () => resolve({ type: "object" })),
+          ),
+      } as unknown as SchemaService;
+
+      const validations = [oldDocument, currentDocument].map((document) =>
+        doValidate(
+          document,
+          openValidationManager,
+          false,
+          folderContext,
+          undefined,
+          schemaService,
+        ),
+      );
+      await vi.waitFor(() => expect(schemas.size).toBe(2));
+      // the validation of the older version completes last
+      schemas.get(2)?.();
+      await validations[1];
+      schemas.get(1)?.();
+      await validations[0];
+
+      expect(sendDiagnostics.calledOnce).toBe(true);
+      expect(sendDiagnostics.firstCall.args[0]).toEqual({
+        uri: metaUri,
+        diagnostics: [],
+      });
+    });
+
     it("returns empty schema diagnostics when schema should not validate", async function () {
       const textDocument = TextDocument.create(
         resolveDocUri("roles/y/meta/main.yml"),
@@ -1089,3 +1194,22 @@ describe("doValidate()", function () {
     });
   });
 });
+
+describe("validateText()", function () {
+  it("reports the same YAML diagnostics as the main thread", function () {
+    const text = "- hosts: all\n  tasks: [\n";
+    const textDocument = TextDocument.create(
+      "file:///play.yml",
+      "ansible",
+      1,
+      text,
+    );
+
+    const diagnostics = validateText({
+      uri: textDocument.uri,
+      text: new TextEncoder().encode(text),
+    });
+    expect(diagnostics.length).toBeGreaterThan(0);
+    expect(diagnostics).toEqual(getYamlValidation(textDocument));
+  });
+});
@@ -0,0 +1,161 @@
+import { expect, vi } from "vitest";
+import sinon from "sinon";
+import * as fs from "fs";
+import * as os from "os";
+import * as path from "path";
+import { Connection } from "vscode-languageserver";
+import {
+  AnsibleInventory,
+  getInventoryCachePath,
+} from "@src/services/ansibleInventory.js";
+import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
+import { CommandRunner } from "@src/utils/commandRunner.js";
+
+const inventoryOutput = JSON.stringify({
+  _meta: { hostvars: {} },
+  all: { children: ["ungrouped"] },
+  ungrouped: { hosts: ["fresh.example.com"] },
+});
+
+function createSettings(refreshInterval = 0, interpreterPath = "") {
+  return {
+    ansible: { path: "ansible" },
+    python: { interpreterPath, activationScript: "" },
+    executionEnvironment: { enabled: false, image: "test-image" },
+    inventory: { refreshInterval, timeout: 1 },
+  };
+}
+
+describe("AnsibleInventory", function () {
+  let sandbox: sinon.SinonSandbox;
+  let tmpDir: string;
+  let source: string;
+  let runCommand: sinon.SinonStub;
+  let connection: Connection;
+  let previousCacheHome: string | undefined;
+
+  function createInventory(settings = createSettings()) {
+    const context = {
+      workspaceFolder: { uri: `file://${tmpDir}` },
+      documentSettings: { get: sinon.stub().resolves(settings) },
+      ansibleConfig: Promise.resolve({ default_host_list: [source] }),
+    };
+    return new AnsibleInventory(
+      connection,
+      context as unknown as WorkspaceFolderContext,
+    );
+  }
+
+  beforeEach(function () {
+    sandbox = sinon.createSandbox();
+    tmpDir = fs.mkdtempSync(path.join(os.tmpdir(), "als-inventory-"));
+    source = path.join(tmpDir, "inventory.ini");
+    fs.writeFileSync(source, "[web]\nweb01\n");
+    previousCacheHome = process.env.XDG_CACHE_HOME;
+    process.env.XDG_CACHE_HOME = path.join(tmpDir, "cache");
+    runCommand = sandbox.stub(CommandRunner.prototype, "runCommand");
+    connection = {
+      console: {
+        error: sinon.stub(),
+        warn: sinon.stub(),
+        log: sinon.stub(),
+      },
+    } as unknown as Connection;
+  });
+
+  afterEach(function () {
+    sandbox.restore();
+    if (previousCacheHome === undefined) {
+      delete process.env.XDG_CACHE_HOME;
+    } else {
+      process.env.XDG_CACHE_HOME = previousCacheHome;
+    }
+    fs.rmSync(tmpDir, { recursive: true, force: true });
+  });
+
+  function seedCache(settings = createSettings()) {
+    const cachePath = getInventoryCachePath([source], {
+      ansiblePath: settings.ansible.path,
+      interpreterPath: settings.python.interpreterPath,
+      activationScript: settings.python.activationScript,
+      executionEnvironmentImage: undefined,
+    });
+    fs.mkdirSync(path.dirname(cachePath), { recursive: true });
+    fs.writeFileSync(
+      cachePath,
+      JSON.stringify({
+        sources: [source],
+        updated: 0,
+        hostList: [{ host: "cached.example.com", priority: 3 }],
+      }),
+    );
+  }
+
+  it("serves the cached hosts when ansible-inventory times out", async function () {
+    seedCache();
+    runCommand.rejects(new Error("ansible-inventory timed out after 1000ms"));
+    const inventory = createInventory();
+
+    await inventory.initialize();
+    await inventory.refresh();
+    expect(inventory.hostList).toEqual([
+      { host: "cached.example.com", priority: 3 },
+    ]);
+    expect((connection.console.error as sinon.SinonStub).called).toBe(true);
+    inventory.dispose();
+  });
+
+  it("persists the hosts and serves them on the next start", async function () {
+    runCommand.resolves({ stdout: inventoryOutput, stderr: "" });
+    const first = createInventory();
+    await first.initialize();
+    first.dispose();
+
+    runCommand.rejects(new Error("inventory plugin failed"));
+    const second = createInventory();
+    await second.initialize();
+    expect(second.hostList.map((h) => h.host)).toContain("fresh.example.com");
+    second.dispose();
+  });
+
+  it("keys the persisted hosts by interpreter", function () {
+    const environment = {
+      ansiblePath: "ansible",
+      interpreterPath: "",
+      activationScript: "",
+    };
+    expect(getInventoryCachePath([source], environment)).not.toBe(
+      getInventoryCachePath([source], {
+        ...environment,
+        interpreterPath: "/opt/venv/bin/python",
+      }),
+    );
+  });
+
+  it("refreshes when a watched source changes", async function () {
+    runCommand.resolves({ stdout: inventoryOutput, stderr: "" });
+    const inventory = createInventory();
+    await inventory.initialize();
+    expect(runCommand.callCount).toBe(1);
+
+    fs.appendFileSync(source, "web02\n");
+    await vi.waitFor(() => expect(runCommand.callCount).toBe(2), {
+      timeout: 5000,
+    });
+    inventory.dispose();
+  });
+
+  it("stops refreshing once disposed", async function () {
+    runCommand.resolves({ stdout: inventoryOutput, stderr: "" });
+    const clearInterval = sandbox.spy(global, "clearInterval");
+    const inventory = createInventory(createSettings(1));
+    await inventory.initialize();
+
+    inventory.dispose();
+    expect(clearInterval.calledOnce).toBe(true);
+
+    fs.appendFileSync(source, "web02\n");
+    await new Promise((resolve) => setTimeout(resolve, 1500));
+    expect(runCommand.callCount).toBe(1);
+  });
+});
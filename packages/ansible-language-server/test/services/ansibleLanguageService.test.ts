@@ -1,7 +1,8 @@
-import { expect } from "vitest";
+import { expect, vi } from "vitest";
 import sinon from "sinon";
 import { Connection } from "vscode-languageserver";
 import { AnsibleLanguageService } from "@src/ansibleLanguageService.js";
+import { WorkspaceFolderContext } from "@src/services/workspaceManager.js";
 
 interface MockConnection extends Connection {
   _simulateInitialize: (params: unknown) => void;
@@ -70,6 +71,7 @@ function createMockConnection(): MockConnection {
     languages: {
       semanticTokens: {
         on: sinon.stub(),
+        onRange: sinon.stub(),
       },
     },
     _simulateInitialize(params: unknown) {
@@ -220,4 +222,41 @@ describe("AnsibleLanguageService", () => {
       }
     });
   });
+
+  describe("warm-up", () => {
+    it("loads the docs library of each folder once initialized", async () => {
+      const warmedUpFolders: string[] = [];
+      sinon
+        .stub(WorkspaceFolderContext.prototype, "docsLibrary")
+        .get(function (this: WorkspaceFolderContext) {
+          warmedUpFolders.push(this.workspaceFolder.uri);
+          return Promise.resolve({});
+        });
+      const service = new AnsibleLanguageService(
+        mockConnection,
+        mockDocuments as never,
+      );
+      service.initialize();
+
+      mockConnection._simulateInitialize({
+        capabilities: {},
+        workspaceFolders: [
+          { uri: "file:///folder_1", name: "folder_1" },
+          { uri: "file:///folder_2", name: "folder_2" },
+        ],
+      });
+      await new Promise((resolve) => setTimeout(resolve, 10));
+      expect(warmedUpFolders).toEqual([]);
+
+      mockConnection._simulateInitialized();
+      await vi.waitFor(
+        () =>
+          expect([...warmedUpFolders].sort()).toEqual([
+            "file:///folder_1",
+            "file:///folder_2",
+          ]),
+        { timeout: 10000 },
+      );
+    });
+  });
 });
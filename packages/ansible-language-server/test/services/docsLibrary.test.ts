@@ -0,0 +1,86 @@
+import { expect } from "vitest";
+import * as path from "path";
+import { fileURLToPath } from "url";
+import { DocsLibrary } from "@src/services/docsLibrary.js";
+import { createTestWorkspaceManager } from "@test/helper.js";
+
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+const COLLECTIONS_PATH = path.resolve(
+  __dirname,
+  "..",
+  "fixtures",
+  "common",
+  "collections",
+);
+const DOCUMENT_URI = "file:///tmp/playbook.yml";
+
+function createDocsLibrary(): DocsLibrary {
+  const workspaceManager = createTestWorkspaceManager();
+  const context = workspaceManager.getContext(DOCUMENT_URI);
+  if (!context) {
+    throw new Error("Unable to create workspace folder context");
+  }
+  return new DocsLibrary(workspaceManager.connection, context);
+}
+
+describe("DocsLibrary collection updates", function () {
+  it("indexes modules and redirects of a single collection", async function () {
+    const docsLibrary = createDocsLibrary();
+    await docsLibrary.addCollection(COLLECTIONS_PATH, "org_1.coll_6");
+
+    const fqcns = await docsLibrary.getModuleFqcns(DOCUMENT_URI);
+    expect([...fqcns].sort()).toEqual([
+      "org_1.coll_6.module_1",
+      "org_1.coll_6.module_2",
+      "org_1.coll_6.sub_coll_1.module_1",
+      "org_1.coll_6.sub_coll_1.module_2",
+    ]);
+    expect(docsLibrary.getModuleRoute("org_1.coll_6.module_1")?.redirect).toBe(
+      "org_1.coll_6.sub_coll_1.module_1",
+    );
+  });
+
+  it("leaves other collections untouched when one is removed", async function () {
+    const docsLibrary = createDocsLibrary();
+    await docsLibrary.addCollection(COLLECTIONS_PATH, "org_1.coll_4");
+    await docsLibrary.addCollection(COLLECTIONS_PATH, "org_1.coll_6");
+
+    docsLibrary.removeCollection("org_1.coll_6");
+
+    const fqcns = await docsLibrary.getModuleFqcns(DOCUMENT_URI);
+    expect([...fqcns].every((fqcn) => fqcn.startsWith("org_1.coll_4."))).toBe(
+      true,
+    );
+    expect(fqcns.size).toBe(4);
+    expect(docsLibrary.getModuleRoute("org_1.coll_6.module_1")).toBeUndefined();
+    const [module] = await docsLibrary.findModule("org_1.coll_4.module_1");
+    expect(module?.fqcn).toBe("org_1.coll_4.module_1");
+  });
+
+  it("does not duplicate entries when a collection is re-indexed", async function () {
+    const docsLibrary = createDocsLibrary();
+    await docsLibrary.addCollection(COLLECTIONS_PATH, "org_1.coll_6");
+    await docsLibrary.addCollection(COLLECTIONS_PATH, "org_1.coll_6");
+
+    const fqcns = await docsLibrary.getModuleFqcns(DOCUMENT_URI);
+    expect(fqcns.size).toBe(4);
+  });
+
+  it("finds module FQCNs by prefix", async function () {
+    const docsLibrary = createDocsLibrary();
+    await docsLibrary.addCollection(COLLECTIONS_PATH, "org_1.coll_4");
+    await docsLibrary.addCollection(COLLECTIONS_PATH, "org_1.coll_6");
+
+    const fqcns = await docsLibrary.findModuleFqcns(
+      DOCUMENT_URI,
+      "org_1.coll_6.mod",
+    );
+    expect(fqcns.sort()).toEqual([
+      "org_1.coll_6.module_1",
+      "org_1.coll_6.module_2",
+    ]);
+    expect(
+      await docsLibrary.findModuleFqcns(DOCUMENT_URI, "module_3"),
+    ).toEqual(["org_1.coll_4.module_3"]);
+  });
+});
@@ -0,0 +1,63 @@
+import { expect } from "vitest";
+import sinon from "sinon";
+import { Connection } from "vscode-languageserver";
+import { TextDocument } from "vscode-languageserver-textdocument";
+import { DocumentModeManager } from "@src/services/documentModeManager.js";
+
+const settings = { lineThreshold: 100, costThreshold: 50, validationDelay: 0 };
+
+function createDocument(lineCount: number): TextDocument {
+  return TextDocument.create(
+    "file:///vars.yml",
+    "ansible",
+    1,
+    "key: value\n".repeat(lineCount),
+  );
+}
+
+describe("DocumentModeManager", function () {
+  let connection: Connection;
+
+  beforeEach(function () {
+    connection = {
+      console: { log: sinon.stub() },
+      window: { showInformationMessage: sinon.stub() },
+    } as unknown as Connection;
+  });
+
+  it("reduces documents above the line threshold", function () {
+    const manager = new DocumentModeManager(connection);
+
+    expect(manager.getMode(createDocument(10), settings)).toBe("full");
+    expect(manager.getMode(createDocument(1000), settings)).toBe("reduced");
+    // the user is told once
+    expect(manager.getMode(createDocument(1000), settings)).toBe("reduced");
+    expect(
+      (connection.window.showInformationMessage as sinon.SinonStub).callCount,
+    ).toBe(1);
+  });
+
+  it("reduces slow documents until they are closed", function () {
+    const manager = new DocumentModeManager(connection);
+    const document = createDocument(10);
+
+    manager.recordCost(document.uri, 80);
+    expect(manager.getMode(document, settings)).toBe("reduced");
+    manager.recordCost(document.uri, 5);
+    expect(manager.getMode(document, settings)).toBe("reduced");
+
+    manager.handleDocumentClosed(document.uri);
+    expect(manager.getMode(document, settings)).toBe("full");
+  });
+
+  it("decides the mode again once reset", function () {
+    const manager = new DocumentModeManager(connection);
+    const document = createDocument(1000);
+
+    expect(manager.getMode(document, settings)).toBe("reduced");
+    manager.resetMode(document.uri);
+    expect(
+      manager.getMode(document, { ...settings, lineThreshold: 5000 }),
+    ).toBe("full");
+  });
+});
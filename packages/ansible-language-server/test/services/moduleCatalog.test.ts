@@ -0,0 +1,62 @@
+import { expect } from "vitest";
+import {
+  matchesModuleFilter,
+  ModuleCatalog,
+} from "@src/services/moduleCatalog.js";
+
+describe("ModuleCatalog", function () {
+  function createCatalog(): ModuleCatalog {
+    const catalog = new ModuleCatalog();
+    for (const fqcn of [
+      "ansible.builtin.copy",
+      "ansible.builtin.command",
+      "ansible.builtin.debug",
+      "community.general.copr",
+      "org_1.coll_6.sub_coll_1.module_1",
+    ]) {
+      catalog.add(fqcn);
+    }
+    return catalog;
+  }
+
+  it("finds modules by short name prefix", function () {
+    expect(createCatalog().find("co").sort()).toEqual([
+      "ansible.builtin.command",
+      "ansible.builtin.copy",
+      "community.general.copr",
+    ]);
+  });
+
+  it("finds modules by FQCN prefix without duplicates", function () {
+    const catalog = createCatalog();
+    expect(catalog.find("ansible.builtin.co").sort()).toEqual([
+      "ansible.builtin.command",
+      "ansible.builtin.copy",
+    ]);
+    expect(catalog.find("Community").sort()).toEqual([
+      "community.general.copr",
+    ]);
+    expect(catalog.find("")).toHaveLength(5);
+  });
+
+  it("keeps the index in sync with the set", function () {
+    const catalog = createCatalog();
+    expect(catalog.find("deb")).toEqual(["ansible.builtin.debug"]);
+    catalog.delete("ansible.builtin.debug");
+    catalog.add("community.general.debconf");
+    expect(catalog.find("deb")).toEqual(["community.general.debconf"]);
+    catalog.clear();
+    expect(catalog.find("")).toEqual([]);
+  });
+
+  it("matches filter texts fuzzily from the start of words", function () {
+    const filterText = "debug ansible.builtin.debug builtin ansible";
+    expect(matchesModuleFilter(filterText, "dbg")).toBe(true);
+    expect(matchesModuleFilter(filterText, "Builtin")).toBe(true);
+    expect(matchesModuleFilter(filterText, "ansible.builtin.deb")).toBe(true);
+    expect(matchesModuleFilter(filterText, "")).toBe(true);
+    // the first character has to start a word
+    expect(matchesModuleFilter(filterText, "ebug")).toBe(false);
+    expect(matchesModuleFilter(filterText, "copy")).toBe(false);
+  });
+});
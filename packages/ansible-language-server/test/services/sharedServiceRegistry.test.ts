@@ -0,0 +1,73 @@
+import { expect } from "vitest";
+import { SharedServiceRegistry } from "@src/services/sharedServiceRegistry.js";
+
+describe("SharedServiceRegistry", function () {
+  it("shares services by fingerprint until the last release", async function () {
+    const disposed: string[] = [];
+    const registry = new SharedServiceRegistry<string>((service) => {
+      disposed.push(service);
+    });
+    let created = 0;
+    const create = () => Promise.resolve(`service-${++created}`);
+
+    const first = registry.acquire("env-a", create);
+    const second = registry.acquire("env-a", create);
+    const other = registry.acquire("env-b", create);
+    expect(await first.service).toBe("service-1");
+    expect(await second.service).toBe("service-1");
+    expect(await other.service).toBe("service-2");
+
+    first.release();
+    first.release(); // releasing twice has no effect
+    await Promise.resolve();
+    expect(disposed).toEqual([]);
+
+    second.release();
+    await second.service;
+    await Promise.resolve();
+    expect(disposed).toEqual(["service-1"]);
+    expect(registry.size).toBe(1);
+
+    const third = registry.acquire("env-a", create);
+    expect(await third.service).toBe("service-3");
+  });
+
+  it("creates the service again after a failure", async function () {
+    const registry = new SharedServiceRegistry<string>();
+    const failed = registry.acquire("env", () =>
+      Promise.reject(new Error("no ansible")),
+    );
+    await expect(failed.service).rejects.toThrow("no ansible");
+    await Promise.resolve();
+
+    const retried = registry.acquire("env", () => Promise.resolve("service"));
+    expect(await retried.service).toBe("service");
+  });
+
+  it("hands the service over when its owner releases it", async function () {
+    const owners: string[] = [];
+    const registry = new SharedServiceRegistry<string[], string>(
+      () => undefined,
+      (service, owner) => {
+        owners.push(owner);
+      },
+    );
+    const create = () => Promise.resolve(owners);
+
+    const first = registry.acquire("env", create, "folder-a");
+    const second = registry.acquire("env", create, "folder-b");
+    const third = registry.acquire("env", create, "folder-c");
+
+    // releasing another lease keeps the owner
+    second.release();
+    await first.service;
+    await Promise.resolve();
+    expect(owners).toEqual([]);
+
+    first.release();
+    await first.service;
+    await Promise.resolve();
+    expect(owners).toEqual(["folder-c"]);
+    third.release();
+  });
+});
@@ -0,0 +1,74 @@
+import { expect } from "vitest";
+import sinon from "sinon";
+import { Connection, Diagnostic, TextDocuments } from "vscode-languageserver";
+import { TextDocument } from "vscode-languageserver-textdocument";
+import { ValidationManager } from "@src/services/validationManager.js";
+import { CACHE_BUDGET } from "@src/utils/lruCache.js";
+
+function createDiagnostics(line: number): Diagnostic[] {
+  return [
+    {
+      message: `issue on line ${line}`,
+      range: {
+        start: { line: line, character: 0 },
+        end: { line: line, character: 10 },
+      },
+    },
+  ];
+}
+
+describe("ValidationManager", function () {
+  const openUri = "file:///workspace/playbook.yml";
+  const openDocuments = new Set<string>();
+  let validationManager: ValidationManager;
+
+  beforeEach(function () {
+    openDocuments.clear();
+    openDocuments.add(openUri);
+    const connection = {
+      sendDiagnostics: sinon.stub().resolves(),
+    } as unknown as Connection;
+    const documents = {
+      get: (uri: string) =>
+        openDocuments.has(uri)
+          ? TextDocument.create(uri, "ansible", 1, "")
+          : undefined,
+    } as unknown as TextDocuments<TextDocument>;
+    validationManager = new ValidationManager(connection, documents);
+  });
+
+  function cacheReferencedFiles(count: number): void {
+    // a lint report on the open document, referring to many other files
+    const diagnosticsByFile = new Map<string, Diagnostic[]>();
+    for (let i = 0; i < count; i++) {
+      diagnosticsByFile.set(`file:///workspace/roles/role_${i}.yml`, []);
+    }
+    validationManager.cacheDiagnostics(openUri, diagnosticsByFile);
+  }
+
+  it("keeps the diagnostics of open documents", function () {
+    validationManager.cacheDiagnostics(
+      openUri,
+      new Map([[openUri, createDiagnostics(3)]]),
+    );
+    cacheReferencedFiles(CACHE_BUDGET.validation + 1);
+
+    expect(
+      validationManager.getValidationFromCache(openUri)?.get(openUri),
+    ).toEqual(createDiagnostics(3));
+  });
+
+  it("lets the diagnostics of closed documents be evicted", function () {
+    validationManager.cacheDiagnostics(
+      openUri,
+      new Map([[openUri, createDiagnostics(3)]]),
+    );
+    openDocuments.delete(openUri);
+    validationManager.handleDocumentClosed(openUri);
+    expect(validationManager.getValidationFromCache(openUri)).toBeDefined();
+
+    openDocuments.add(openUri);
+    cacheReferencedFiles(CACHE_BUDGET.validation);
+    expect(validationManager.getValidationFromCache(openUri)).toBeUndefined();
+  });
+});
@@ -0,0 +1,50 @@
+import { expect } from "vitest";
+import _ from "lodash";
+import { SettingsManager } from "@src/services/settingsManager.js";
+import { getSettingsDependents } from "@src/services/workspaceManager.js";
+
+describe("getSettingsDependents()", function () {
+  const settings = new SettingsManager(null, false).globalSettings;
+
+  it("only resets validation for lint settings", function () {
+    const changed = _.cloneDeep(settings);
+    changed.validation.lint.arguments = "--profile production";
+
+    expect([...getSettingsDependents(settings, changed)]).toEqual([
+      "validation",
+    ]);
+  });
+
+  it("resets the environment for interpreter settings", function () {
+    const changed = _.cloneDeep(settings);
+    changed.python.interpreterPath = "/opt/venv/bin/python";
+
+    const dependents = getSettingsDependents(settings, changed);
+    expect(dependents.has("environment")).toBe(true);
+    expect(dependents.has("validation")).toBe(true);
+  });
+
+  it("resets nothing for completion toggles", function () {
+    const changed = _.cloneDeep(settings);
+    changed.completion.provideRedirectModules = false;
+    changed.ansible.useFullyQualifiedCollectionNames = false;
+
+    expect(getSettingsDependents(settings, changed).size).toBe(0);
+  });
+
+  it("resets nothing for the autofix on save", function () {
+    const changed = _.cloneDeep(settings);
+    changed.validation.lint.autoFixOnSave = true;
+
+    expect(getSettingsDependents(settings, changed).size).toBe(0);
+  });
+
+  it("resets the document modes for the large document thresholds", function () {
+    const changed = _.cloneDeep(settings);
+    changed.largeDocuments.lineThreshold = 20000;
+
+    expect([...getSettingsDependents(settings, changed)]).toEqual([
+      "documentModes",
+    ]);
+  });
+});
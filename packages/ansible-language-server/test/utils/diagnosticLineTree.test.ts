@@ -0,0 +1,73 @@
+import { expect } from "vitest";
+import { Diagnostic } from "vscode-languageserver";
+import { DiagnosticLineTree } from "@src/utils/diagnosticLineTree.js";
+
+function createDiagnostic(startLine: number, endLine: number): Diagnostic {
+  return {
+    message: `line ${startLine}`,
+    range: {
+      start: { line: startLine, character: 0 },
+      end: { line: endLine, character: 10 },
+    },
+  };
+}
+
+function getLines(tree: DiagnosticLineTree): [number, number][] {
+  return tree.values.map((d) => [d.range.start.line, d.range.end.line]);
+}
+
+describe("DiagnosticLineTree", function () {
+  it("moves diagnostics below inserted lines", function () {
+    const tree = new DiagnosticLineTree([
+      createDiagnostic(8, 8),
+      createDiagnostic(2, 2),
+      createDiagnostic(5, 6),
+    ]);
+
+    tree.applyChange(3, 3, 2);
+    expect(getLines(tree)).toEqual([
+      [2, 2],
+      [7, 8],
+      [10, 10],
+    ]);
+  });
+
+  it("drops diagnostics overlapping an edit", function () {
+    const tree = new DiagnosticLineTree([
+      createDiagnostic(1, 1),
+      createDiagnostic(2, 4),
+      createDiagnostic(6, 6),
+      createDiagnostic(9, 9),
+    ]);
+
+    // lines 3 to 6 replaced by a single line
+    tree.applyChange(3, 6, -3);
+    expect(tree.size).toBe(2);
+    expect(getLines(tree)).toEqual([
+      [1, 1],
+      [6, 6],
+    ]);
+
+    tree.applyChange(0, 0, 1);
+    expect(getLines(tree)).toEqual([
+      [2, 2],
+      [7, 7],
+    ]);
+  });
+
+  it("handles many edits on many diagnostics", function () {
+    const tree = new DiagnosticLineTree(
+      Array.from({ length: 5000 }, (_, i) => createDiagnostic(i * 2, i * 2)),
+    );
+
+    // a line added below the first diagnostic, then removed, 1000 times
+    for (let i = 0; i < 1000; i++) {
+      tree.applyChange(1, 1, 1);
+      tree.applyChange(1, 2, -1);
+    }
+    const lines = getLines(tree);
+    expect(lines.length).toBe(5000);
+    expect(lines[0]).toEqual([0, 0]);
+    expect(lines[4999]).toEqual([9998, 9998]);
+  });
+});
@@ -0,0 +1,83 @@
+import { expect } from "vitest";
+import * as path from "path";
+import { fileURLToPath } from "url";
+import {
+  hasModuleFiles,
+  walkCollection,
+  walkCollections,
+} from "@src/utils/docsFinder.js";
+
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+const COLLECTIONS_PATH = path.resolve(
+  __dirname,
+  "..",
+  "fixtures",
+  "common",
+  "collections",
+);
+
+describe("docsFinder", function () {
+  describe("walkCollection()", function () {
+    it("collects modules, nested modules and routing", async function () {
+      const contents = await walkCollection(COLLECTIONS_PATH, "org_1.coll_6");
+
+      expect(contents.modules.map((m) => m.fqcn).sort()).toEqual([
+        "org_1.coll_6.module_2",
+        "org_1.coll_6.sub_coll_1.module_1",
+      ]);
+      const subModule = contents.modules.find((m) => m.name === "module_1");
+      expect(subModule?.collection).toBe("coll_6.sub_coll_1");
+      expect(
+        contents.pluginRouting
+          .get("org_1.coll_6")
+          ?.get("modules")
+          ?.get("module_1")?.redirect,
+      ).toBe("org_1.coll_6.sub_coll_1.module_1");
+    });
+
+    it("returns nothing for a missing collection", async function () {
+      const contents = await walkCollection(COLLECTIONS_PATH, "org_9.coll_9");
+
+      expect(contents.modules).toHaveLength(0);
+      expect(contents.docFragments).toHaveLength(0);
+      expect(contents.pluginRouting.size).toBe(0);
+    });
+  });
+
+  describe("walkCollections()", function () {
+    it("walks every collection of a collections path", async function () {
+      const contents = await walkCollections(COLLECTIONS_PATH);
+
+      expect(contents.modules.map((m) => m.fqcn)).toContain(
+        "org_1.coll_4.module_1",
+      );
+      expect(contents.modules.map((m) => m.fqcn)).toContain(
+        "org_1.coll_6.sub_coll_1.module_1",
+      );
+      expect(contents.pluginRouting.has("org_1.coll_6")).toBe(true);
+    });
+
+    it("parses only the documentation used from modules", async function () {
+      const contents = await walkCollections(COLLECTIONS_PATH);
+      const module = contents.modules.find(
+        (m) => m.fqcn === "org_1.coll_4.module_1",
+      );
+
+      expect([...(module?.rawDocumentationFragments.keys() || [])]).toEqual([
+        "DOCUMENTATION",
+      ]);
+    });
+  });
+
+  describe("hasModuleFiles()", function () {
+    it("finds modules of installed collections", function () {
+      expect(hasModuleFiles(COLLECTIONS_PATH)).toBe(true);
+    });
+
+    it("returns false without collections", function () {
+      expect(hasModuleFiles(path.join(COLLECTIONS_PATH, "missing"))).toBe(
+        false,
+      );
+    });
+  });
+});
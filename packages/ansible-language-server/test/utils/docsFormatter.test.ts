@@ -0,0 +1,57 @@
+import { expect } from "vitest";
+import * as fs from "fs";
+import * as os from "os";
+import * as path from "path";
+import { MarkupKind } from "vscode-languageserver";
+import { getRenderedDocs } from "@src/utils/docsFormatter.js";
+import { getFileStamp } from "@src/utils/misc.js";
+
+describe("getRenderedDocs()", function () {
+  it("renders again once the source file changes", function () {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), "als-docs-"));
+    const source = path.join(dir, "module_1.py");
+    fs.writeFileSync(source, "DOCUMENTATION = ''\n");
+    const getKey = () => ({
+      generation: 0,
+      fqcn: "ns.coll.module_1",
+      source,
+      stamp: getFileStamp(source),
+    });
+    let renders = 0;
+    const render = () => {
+      renders++;
+      return { kind: MarkupKind.Markdown, value: `render ${renders}` };
+    };
+
+    try {
+      getRenderedDocs(getKey(), render);
+      getRenderedDocs(getKey(), render);
+      expect(renders).toBe(1);
+
+      fs.writeFileSync(source, "DOCUMENTATION = 'changed'\n");
+      expect(getRenderedDocs(getKey(), render).value).toBe("render 2");
+    } finally {
+      fs.rmSync(dir, { recursive: true, force: true });
+    }
+  });
+
+  it("does not check the source file itself", function () {
+    const key = {
+      generation: 0,
+      fqcn: "ns.coll.module_2",
+      source: "/nonexistent/module_2.py",
+      stamp: "1-1",
+    };
+    let renders = 0;
+    const render = () => {
+      renders++;
+      return { kind: MarkupKind.Markdown, value: `render ${renders}` };
+    };
+
+    getRenderedDocs(key, render);
+    expect(getRenderedDocs(key, render).value).toBe("render 1");
+    expect(getRenderedDocs({ ...key, stamp: "2-1" }, render).value).toBe(
+      "render 2",
+    );
+  });
+});
@@ -0,0 +1,147 @@
+import { expect, afterEach, beforeEach } from "vitest";
+import * as fs from "fs";
+import * as os from "os";
+import * as path from "path";
+import { IModuleMetadata } from "@src/interfaces/module.js";
+import { LazyModuleDocumentation } from "@src/utils/docsParser.js";
+import { loadModuleDocumentation } from "@src/utils/docsStore.js";
+
+const MODULE_SOURCE = `DOCUMENTATION = r'''
+module: sample
+short_description: Sample module
+extends_documentation_fragment:
+  - org_1.coll_1.common
+options:
+  name:
+    description: Name of the thing.
+    type: str
+    aliases: [label]
+'''
+`;
+
+const FRAGMENT_SOURCE = `class ModuleDocFragment(object):
+    DOCUMENTATION = r'''
+options:
+  timeout:
+    description: Timeout in seconds.
+    type: int
+    default: 10
+'''
+`;
+
+describe("loadModuleDocumentation", function () {
+  let tmpDir: string;
+  let xdgCacheHome: string | undefined;
+
+  beforeEach(function () {
+    tmpDir = fs.mkdtempSync(path.join(os.tmpdir(), "als-docs-store-"));
+    xdgCacheHome = process.env.XDG_CACHE_HOME;
+    process.env.XDG_CACHE_HOME = path.join(tmpDir, "cache");
+    fs.writeFileSync(path.join(tmpDir, "sample.py"), MODULE_SOURCE);
+    fs.writeFileSync(path.join(tmpDir, "common.py"), FRAGMENT_SOURCE);
+  });
+
+  afterEach(function () {
+    if (xdgCacheHome === undefined) {
+      delete process.env.XDG_CACHE_HOME;
+    } else {
+      process.env.XDG_CACHE_HOME = xdgCacheHome;
+    }
+    fs.rmSync(tmpDir, { recursive: true, force: true });
+  });
+
+  function createModule(): IModuleMetadata {
+    return new LazyModuleDocumentation(
+      path.join(tmpDir, "sample.py"),
+      "org_1.coll_1.sample",
+      "org_1",
+      "coll_1",
+      "sample",
+    );
+  }
+
+  function createDocFragments(): Map<string, IModuleMetadata> {
+    return new Map([
+      [
+        "org_1.coll_1.common",
+        new LazyModuleDocumentation(
+          path.join(tmpDir, "common.py"),
+          "org_1.coll_1.common",
+          "org_1",
+          "coll_1",
+          "common",
+        ),
+      ],
+    ]);
+  }
+
+  it("merges fragments into the typed documentation", function () {
+    const module = createModule();
+    loadModuleDocumentation(module, createDocFragments());
+
+    const options = module.documentation?.options;
+    expect([...(options?.keys() || [])]).toEqual(["timeout", "name", "label"]);
+    expect(options?.get("label")).toBe(options?.get("name"));
+    expect(options?.get("timeout")?.default).toBe(10);
+  });
+
+  it("reuses stored documentation while sources are unchanged", function () {
+    loadModuleDocumentation(createModule(), createDocFragments());
+
+    const module = createModule();
+    loadModuleDocumentation(module, createDocFragments());
+    expect(module.documentation?.shortDescription).toBe("Sample module");
+    expect(module.sourceLineRange).toEqual([1, 10]);
+  });
+
+  it("shares the typed documentation and releases the raw one", function () {
+    const first = createModule() as LazyModuleDocumentation;
+    loadModuleDocumentation(first, createDocFragments());
+    expect(first.isLoaded).toBe(false);
+
+    const second = createModule();
+    loadModuleDocumentation(second, createDocFragments());
+    expect(second.documentation).toBe(first.documentation);
+  });
+
+  it("processes the module again once a fragment changes", function () {
+    loadModuleDocumentation(createModule(), createDocFragments());
+    fs.writeFileSync(
+      path.join(tmpDir, "common.py"),
+      FRAGMENT_SOURCE.replace("default: 10", "default: 120"),
+    );
+
+    const module = createModule();
+    loadModuleDocumentation(module, createDocFragments());
+    expect(module.documentation?.options.get("timeout")?.default).toBe(120);
+  });
+
+  it("loads the options without descriptions on request", function () {
+    const module = createModule();
+    loadModuleDocumentation(module, createDocFragments(), "options");
+
+    const options = module.documentation?.options;
+    expect([...(options?.keys() || [])]).toEqual(["timeout", "name", "label"]);
+    expect(options?.get("label")).toBe(options?.get("name"));
+    expect(options?.get("name")?.type).toBe("str");
+    expect(options?.get("name")?.description).toBeUndefined();
+    expect(module.documentation?.shortDescription).toBeUndefined();
+    expect(module.documentationDetail).toBe("options");
+
+    loadModuleDocumentation(module, createDocFragments());
+    expect(module.documentation?.shortDescription).toBe("Sample module");
+    expect(module.documentation?.options.get("name")?.description).toBe(
+      "Name of the thing.",
+    );
+    expect(module.documentationDetail).toBe("full");
+  });
+
+  it("provides the full documentation after the options", function () {
+    loadModuleDocumentation(createModule(), createDocFragments(), "options");
+
+    const module = createModule();
+    loadModuleDocumentation(module, createDocFragments());
+    expect(module.documentation?.shortDescription).toBe("Sample module");
+    expect(module.documentationDetail).toBe("full");
+  });
+});
@@ -0,0 +1,18 @@
+import { expect } from "vitest";
+import sinon from "sinon";
+import { lazyImport } from "@src/utils/misc.js";
+
+describe("lazyImport()", function () {
+  it("loads the module on first use only", async function () {
+    const module = { name: "module_1" };
+    const load = sinon.stub().resolves(module);
+    const loadModule = lazyImport(load);
+    expect(load.called).toBe(false);
+
+    const [first, second] = await Promise.all([loadModule(), loadModule()]);
+    expect(first).toBe(module);
+    expect(second).toBe(module);
+    expect(await loadModule()).toBe(module);
+    expect(load.calledOnce).toBe(true);
+  });
+});
@@ -0,0 +1,38 @@
+import { expect } from "vitest";
+import { LRUCache } from "@src/utils/lruCache.js";
+import { perfStats } from "@src/utils/perfStats.js";
+
+describe("LRUCache", function () {
+  it("evicts the least recently used entry", function () {
+    const cache = new LRUCache<string, number>(2);
+    cache.set("a", 1);
+    cache.set("b", 2);
+    expect(cache.get("a")).toBe(1); // "b" is now the least recently used
+    cache.set("c", 3);
+
+    expect(cache.size).toBe(2);
+    expect(cache.get("b")).toBeUndefined();
+    expect(cache.get("a")).toBe(1);
+    expect(cache.get("c")).toBe(3);
+  });
+
+  it("replaces existing entries without growing", function () {
+    const cache = new LRUCache<string, number>(2);
+    cache.set("a", 1);
+    cache.set("a", 2);
+
+    expect(cache.size).toBe(1);
+    expect(cache.get("a")).toBe(2);
+  });
+
+  it("reports the entries and evictions of named caches", function () {
+    const cache = new LRUCache<string, number>(1, "test-lru");
+    cache.set("a", 1);
+    cache.set("b", 2);
+
+    expect(perfStats.snapshot().caches["test-lru"]).toMatchObject({
+      evictions: 1,
+      entries: 1,
+    });
+  });
+});
@@ -1,8 +1,13 @@
 import { expect } from "vitest";
+import * as fs from "fs";
+import * as os from "os";
 import * as path from "path";
 import { fileURLToPath } from "url";
 import { dirname } from "path";
-import { globArray } from "@src/utils/pathUtils.js";
+import {
+  canonicalCollectionsPaths,
+  globArray,
+} from "@src/utils/pathUtils.js";
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = dirname(__filename);
@@ -51,4 +56,33 @@ describe("docsFinder", function () {
       });
     });
   });
+
+  describe("canonicalCollectionsPaths()", function () {
+    const collectionsPath = path.resolve(
+      __dirname,
+      "..",
+      "fixtures",
+      "common",
+      "collections",
+    );
+
+    it("should drop duplicate and missing collections paths", function () {
+      const tmpDir = fs.mkdtempSync(path.join(os.tmpdir(), "als-paths-"));
+      const linkPath = path.join(tmpDir, "collections");
+      fs.symlinkSync(collectionsPath, linkPath);
+      try {
+        expect(
+          canonicalCollectionsPaths([
+            path.join(tmpDir, "missing"),
+            tmpDir,
+            `${collectionsPath}/`,
+            linkPath,
+            path.join(collectionsPath, "ansible_collections"),
+          ]),
+        ).toEqual([fs.realpathSync(collectionsPath)]);
+      } finally {
+        fs.rmSync(tmpDir, { recursive: true, force: true });
+      }
+    });
+  });
 });
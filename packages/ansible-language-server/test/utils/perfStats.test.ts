@@ -0,0 +1,58 @@
+import { expect } from "vitest";
+import { LatencyHistogram, PerfStats } from "@src/utils/perfStats.js";
+
+describe("perfStats", function () {
+  describe("LatencyHistogram", function () {
+    it("summarizes latencies by bucket", function () {
+      const histogram = new LatencyHistogram();
+      for (let i = 0; i < 98; i++) {
+        histogram.record(3);
+      }
+      histogram.record(150);
+      histogram.record(7000);
+
+      const summary = histogram.summarize();
+      expect(summary.count).toBe(100);
+      expect(summary.max).toBe(7000);
+      expect(summary.p50).toBe(5);
+      expect(summary.p99).toBe(200);
+      expect(summary.buckets).toEqual({ "5": 98, "200": 1, inf: 1 });
+    });
+  });
+
+  describe("PerfStats", function () {
+    it("collects requests, processes and cache counts", function () {
+      const stats = new PerfStats();
+      stats.recordRequest("hover", 12);
+      stats.recordProcess("ansible-config", 800);
+      stats.recordCacheHit("settings");
+      stats.recordCacheHit("settings");
+      stats.recordCacheMiss("settings");
+
+      const snapshot = stats.snapshot();
+      expect(snapshot.requests.hover.count).toBe(1);
+      expect(snapshot.processes["ansible-config"].p50).toBe(800);
+      expect(snapshot.caches).toEqual({
+        settings: { hits: 2, misses: 1, evictions: 0 },
+      });
+      expect(stats.format()).toContain("settings 2/3 hits");
+
+      stats.reset();
+      expect(stats.snapshot().requests).toEqual({});
+    });
+
+    it("sums up the sizes of tracked caches", function () {
+      const stats = new PerfStats();
+      stats.trackCacheSize("metadata", { size: 3 });
+      stats.trackCacheSize("metadata", { size: 4 });
+      stats.recordCacheEviction("metadata");
+
+      expect(stats.snapshot().caches.metadata).toEqual({
+        hits: 0,
+        misses: 0,
+        evictions: 1,
+        entries: 7,
+      });
+    });
+  });
+});
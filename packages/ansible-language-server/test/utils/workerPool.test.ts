@@ -0,0 +1,56 @@
+import { expect } from "vitest";
+import * as path from "path";
+import { fileURLToPath } from "url";
+import { resolveWorkerScript, WorkerPool } from "@src/utils/workerPool.js";
+
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+const WORKER_SCRIPT = path.resolve(
+  __dirname,
+  "..",
+  "fixtures",
+  "utils",
+  "workerPool",
+  "double.mjs",
+);
+
+describe("WorkerPool", function () {
+  it("runs queued tasks on a limited number of workers", async function () {
+    const pool = new WorkerPool<unknown, number>(WORKER_SCRIPT, 2);
+    try {
+      const results = await Promise.all(
+        [1, 2, 3, 4, 5].map((task) => pool.run(task)),
+      );
+      expect(results).toEqual([2, 4, 6, 8, 10]);
+    } finally {
+      pool.dispose();
+    }
+  });
+
+  it("rejects tasks failing in the worker", async function () {
+    const pool = new WorkerPool<unknown, number>(WORKER_SCRIPT, 1);
+    try {
+      await expect(pool.run("x")).rejects.toThrow("Not a number: x");
+      expect(await pool.run(21)).toBe(42);
+    } finally {
+      pool.dispose();
+    }
+  });
+
+  it("moves transferred buffers to the worker", async function () {
+    const pool = new WorkerPool<Uint8Array, number>(
+      path.join(path.dirname(WORKER_SCRIPT), "length.mjs"),
+      1,
+    );
+    try {
+      const buffer = new TextEncoder().encode("- hosts: all\n");
+      expect(await pool.run(buffer, [buffer.buffer])).toBe(13);
+      expect(buffer.byteLength).toBe(0);
+    } finally {
+      pool.dispose();
+    }
+  });
+
+  it("does not resolve worker scripts when running from sources", function () {
+    expect(resolveWorkerScript("docsWorker")).toBeUndefined();
+  });
+});
@@ -1,6 +1,7 @@
 // codespell:ignore isPlay
 import { expect, beforeEach } from "vitest";
 import { Position } from "vscode-languageserver";
+import { TextDocument } from "vscode-languageserver-textdocument";
 import { Node, Scalar, YAMLMap, YAMLSeq } from "yaml";
 import {
   AncestryBuilder,
@@ -12,8 +13,11 @@ import {
   isRoleParam,
   isTaskParam,
   parseAllDocuments,
+  parseScopeAt,
+  parseTextDocument,
 } from "@src/utils/yaml.js";
 import { getDoc, isWindows } from "@test/helper.js";
+import { insert } from "@src/utils/misc.js";
 
 function getPathInFile(yamlFile: string, line: number, character: number) {
   const textDoc = getDoc(`yaml/${yamlFile}`);
@@ -232,6 +236,24 @@ describe("yaml", function () {
       const collections = getDeclaredCollections(path);
       expect(collections).toEqual(expect.arrayContaining([]));
     });
+
+    it("reuses collections found for the same task", async function () {
+      const textDoc = getDoc("yaml/getDeclaredCollections.yml");
+      const parsedDocs = parseAllDocuments(textDoc.getText());
+      const getCollectionsAt = (character: number) =>
+        getDeclaredCollections(
+          getPathAt(textDoc, { line: 12, character: character }, parsedDocs),
+        );
+
+      const collections = getCollectionsAt(6);
+      expect(getCollectionsAt(8)).toBe(collections);
+      expect(collections).toEqual(
+        expect.arrayContaining([
+          "mynamespace.mycollection",
+          "mynamespace2.mycollection2",
+        ]),
+      );
+    });
   });
 
   describe("isTaskParam", function () {
@@ -450,4 +472,112 @@ describe("yaml", function () {
       expect(test).to.be.eq(false);
     });
   });
+
+  describe("parseScopeAt", function () {
+    const text = [
+      "- hosts: all",
+      "  tasks:",
+      "    - name: first",
+      "      ansible.builtin.debug:",
+      "",
+      "- hosts: localhost",
+      "  tasks:",
+      "    - name: second",
+      "      ",
+      "- hosts: all",
+      "",
+    ].join("\n");
+
+    function getPaths(document: TextDocument, position: Position) {
+      const offset = document.offsetAt(position);
+      const fullPath = getPathAt(
+        document,
+        position,
+        parseAllDocuments(insert(document.getText(), offset, "_:")),
+        true,
+      );
+      const scopedPath = getPathAt(
+        document,
+        position,
+        parseScopeAt(document, offset, "_:"),
+        true,
+      );
+      return [fullPath, scopedPath];
+    }
+
+    it("parses only the enclosing play with document ranges", function () {
+      const document = TextDocument.create("file:///a.yml", "ansible", 1, text);
+      const position = Position.create(8, 6);
+      const [fullPath, scopedPath] = getPaths(document, position);
+
+      const scopedDocs = parseScopeAt(
+        document,
+        document.offsetAt(position),
+        "_:",
+      );
+      expect(scopedDocs[0].toJSON()).toEqual([
+        { hosts: "localhost", tasks: [{ name: "second", _: null }] },
+      ]);
+      expect(scopedPath?.length).toBe(fullPath?.length);
+      expect(scopedPath?.at(-1)?.range).toEqual(fullPath?.at(-1)?.range);
+      expect(isTaskParam(scopedPath as Node[])).toBe(true);
+    });
+
+    it("falls back to the whole document outside of a root sequence", function () {
+      const document = TextDocument.create(
+        "file:///a.yml",
+        "ansible",
+        1,
+        "key: value\nother:\n  ",
+      );
+      const position = Position.create(2, 2);
+      const [fullPath, scopedPath] = getPaths(document, position);
+
+      expect(scopedPath?.at(-1)?.range).toEqual(fullPath?.at(-1)?.range);
+    });
+  });
+
+  describe("getPathAt", function () {
+    const text = [
+      "- name: play",
+      "  tasks:",
+      ...Array.from({ length: 200 }, (_, i) => [
+        `    - name: task ${i}`,
+        `      ansible.builtin.debug:`,
+        `        msg: message ${i}`,
+      ]).flat(),
+      "",
+    ].join("\n");
+
+    it("finds nodes among many siblings", function () {
+      const document = TextDocument.create("file:///a.yml", "ansible", 1, text);
+      const docs = parseTextDocument(document);
+
+      for (const i of [0, 1, 57, 199]) {
+        const keyPath = getPathAt(
+          document,
+          Position.create(3 + i * 3, 8),
+          docs,
+        );
+        expect((keyPath?.at(-1) as Scalar).value).toBe("ansible.builtin.debug");
+        expect(isTaskParam(keyPath as Node[])).toBe(true);
+
+        const valuePath = getPathAt(
+          document,
+          Position.create(4 + i * 3, 15),
+          docs,
+        );
+        expect((valuePath?.at(-1) as Scalar).value).toBe(`message ${i}`);
+      }
+    });
+
+    it("reuses the parsed documents of a document version", function () {
+      const document = TextDocument.create("file:///a.yml", "ansible", 1, text);
+      const docs = parseTextDocument(document);
+      expect(parseTextDocument(document)).toBe(docs);
+
+      TextDocument.update(document, [{ text: "- name: other\n" }], 2);
+      expect(parseTextDocument(document)).not.toBe(docs);
+    });
+  });
 });
@@ -0,0 +1,413 @@
+#!/usr/bin/env node
+/**
+ * Benchmark of the language server on a generated workspace.
+ *
+ * Generates collections with many modules, a playbook with many tasks and a
+ * large inventory, drives the built server (dist/cli.cjs) over stdio and
+ * reports startup, index build and request latencies as JSON. Requires
+ * ansible to be installed, like the test suite.
+ *
+ * The default playbook is above the large document threshold of the server,
+ * which declines full semantic tokens for it and only serves ranges. Pass
+ * --full-mode to lift the thresholds and measure full semantic tokens too.
+ *
+ * Usage: node tools/benchmark.mts [--collections 200] [--modules 20]
+ *   [--tasks 2000] [--hosts 5000] [--iterations 50] [--full-mode]
+ *   [--output result.json]
+ */
+import { ChildProcess, spawn } from "node:child_process";
+import { mkdirSync, mkdtempSync, rmSync, writeFileSync } from "node:fs";
+import { tmpdir } from "node:os";
+import { dirname, join, resolve } from "node:path";
+import { performance } from "node:perf_hooks";
+import { fileURLToPath, pathToFileURL } from "node:url";
+import { parseArgs } from "node:util";
+import * as rpc from "vscode-jsonrpc/node";
+
+const toolsDir = dirname(fileURLToPath(import.meta.url));
+const SERVER = resolve(toolsDir, "..", "dist", "cli.cjs");
+const NAMESPACES = 10;
+const OPTIONS_PER_MODULE = 10;
+/** time given to the server to shut down before it is killed, in ms */
+const SHUTDOWN_TIMEOUT = 5000;
+/** LSP error code of requests declined by the server */
+const SERVER_CANCELLED = -32802;
+/** lines shown by the editor, for semantic tokens of a range */
+const VISIBLE_LINES = 60;
+
+interface IBenchmarkOptions {
+  collections: number;
+  modules: number;
+  tasks: number;
+  hosts: number;
+  iterations: number;
+  fullMode: boolean;
+  output?: string;
+}
+
+interface ILatency {
+  count: number;
+  mean: number;
+  p50: number;
+  p99: number;
+  max: number;
+}
+
+function parseOptions(): IBenchmarkOptions {
+  const { values } = parseArgs({
+    options: {
+      collections: { type: "string", default: "200" },
+      modules: { type: "string", default: "20" },
+      tasks: { type: "string", default: "2000" },
+      hosts: { type: "string", default: "5000" },
+      iterations: { type: "string", default: "50" },
+      "full-mode": { type: "boolean", default: false },
+      output: { type: "string" },
+    },
+  });
+  return {
+    collections: Number(values.collections),
+    modules: Number(values.modules),
+    tasks: Number(values.tasks),
+    hosts: Number(values.hosts),
+    iterations: Number(values.iterations),
+    fullMode: values["full-mode"],
+    output: values.output,
+  };
+}
+
+function moduleSource(name: string): string {
+  const options = Array.from(
+    { length: OPTIONS_PER_MODULE },
+    (_, i) => `  option_${i}:
+    description:
+      - Option ${i} of the generated module.
+      - Only used to give the documentation a realistic size.
+    type: ${i % 2 ? "str" : "bool"}
+    aliases: [alias_${i}]`,
+  ).join("\n");
+  return `DOCUMENTATION = r'''
+module: ${name}
+short_description: Generated module ${name}
+description:
+  - Generated module used to benchmark the language server.
+options:
+${options}
+'''
+
+EXAMPLES = r'''
+- name: Use ${name}
+  ${name}:
+    option_0: true
+'''
+
+RETURN = r'''
+changed:
+  description: Whether something changed.
+  type: bool
+'''
+`;
+}
+
+function moduleFqcn(index: number, options: IBenchmarkOptions): string {
+  const collection = index % options.collections;
+  const module = Math.floor(index / options.collections) % options.modules;
+  return `ns_${collection % NAMESPACES}.coll_${collection}.module_${module}`;
+}
+
+/**
+ * Writes the workspace and returns the path and contents of the playbook.
+ */
+function generateWorkspace(
+  dir: string,
+  options: IBenchmarkOptions,
+): { path: string; text: string } {
+  for (let c = 0; c < options.collections; c++) {
+    const collectionDir = join(
+      dir,
+      "collections",
+      "ansible_collections",
+      `ns_${c % NAMESPACES}`,
+      `coll_${c}`,
+    );
+    const modulesDir = join(collectionDir, "plugins", "modules");
+    mkdirSync(modulesDir, { recursive: true });
+    mkdirSync(join(collectionDir, "meta"));
+    writeFileSync(
+      join(collectionDir, "meta", "runtime.yml"),
+      "requires_ansible: '>=2.15'\n",
+    );
+    for (let m = 0; m < options.modules; m++) {
+      writeFileSync(
+        join(modulesDir, `module_${m}.py`),
+        moduleSource(`module_${m}`),
+      );
+    }
+  }
+
+  const groups = Math.max(1, Math.ceil(options.hosts / 100));
+  const inventory = Array.from({ length: groups }, (_, g) => {
+    const first = g * 100;
+    const count = Math.min(100, options.hosts - first);
+    const hosts = Array.from(
+      { length: count },
+      (_, h) => `host-${first + h}.example.com`,
+    );
+    return `[group_${g}]\n${hosts.join("\n")}\n`;
+  });
+  writeFileSync(join(dir, "inventory.ini"), inventory.join("\n"));
+
+  writeFileSync(
+    join(dir, "ansible.cfg"),
+    "[defaults]\n" +
+      "collections_path = ./collections\n" +
+      "inventory = ./inventory.ini\n",
+  );
+
+  const tasks = Array.from(
+    { length: options.tasks },
+    (_, i) => `    - name: Task ${i}
+      ${moduleFqcn(i, options)}:
+        option_0: true
+        option_1: value ${i}
+`,
+  );
+  const path = join(dir, "playbook.yml");
+  const play = "- name: Benchmark play\n  hosts: all\n  tasks:\n";
+  const text = play + tasks.join("");
+  writeFileSync(path, text);
+  return { path, text };
+}
+
+function summarize(durations: number[]): ILatency {
+  const sorted = [...durations].sort((a, b) => a - b);
+  const at = (fraction: number) =>
+    round(
+      sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * fraction))],
+    );
+  return {
+    count: sorted.length,
+    mean: round(sorted.reduce((a, b) => a + b, 0) / sorted.length),
+    p50: at(0.5),
+    p99: at(0.99),
+    max: round(sorted[sorted.length - 1]),
+  };
+}
+
+function round(value: number): number {
+  return Math.round(value * 100) / 100;
+}
+
+async function measure(
+  iterations: number,
+  request: (iteration: number) => Promise<unknown>,
+): Promise<ILatency> {
+  const durations: number[] = [];
+  for (let i = 0; i < iterations; i++) {
+    const started = performance.now();
+    await request(i);
+    durations.push(performance.now() - started);
+  }
+  return summarize(durations);
+}
+
+/**
+ * Sends a request and tells whether the server served it, rather than
+ * declining it, e.g. full semantic tokens of a document in reduced mode.
+ */
+async function sendUnlessDeclined(
+  connection: rpc.MessageConnection,
+  method: string,
+  params: object,
+): Promise<boolean> {
+  try {
+    await connection.sendRequest(method, params);
+    return true;
+  } catch (error) {
+    if (error instanceof rpc.ResponseError && error.code === SERVER_CANCELLED) {
+      return false;
+    }
+    throw error;
+  }
+}
+
+/**
+ * Asks the server to shut down, then stops it in any case, e.g. after a
+ * failed request, and waits for it to exit.
+ */
+async function stopServer(
+  server: ChildProcess,
+  connection: rpc.MessageConnection,
+): Promise<void> {
+  try {
+    await Promise.race([
+      connection.sendRequest("shutdown").then(() =>
+        connection.sendNotification("exit"),
+      ),
+      new Promise((resolve) => setTimeout(resolve, SHUTDOWN_TIMEOUT)),
+    ]);
+  } catch {
+    // the server is killed below
+  }
+  connection.dispose();
+  if (server.exitCode === null && server.signalCode === null) {
+    const exited = new Promise((resolve) => server.once("exit", resolve));
+    server.kill();
+    await exited;
+  }
+}
+
+async function main(): Promise<void> {
+  const options = parseOptions();
+  const workspace = mkdtempSync(join(tmpdir(), "als-benchmark-"));
+  let stop: (() => Promise<void>) | undefined;
+  try {
+    const generationStarted = performance.now();
+    const playbook = generateWorkspace(workspace, options);
+    const generationTime = performance.now() - generationStarted;
+
+    const started = performance.now();
+    const server = spawn(process.execPath, [SERVER, "--stdio"], {
+      cwd: workspace,
+      stdio: ["pipe", "pipe", "inherit"],
+    });
+    const connection = rpc.createMessageConnection(
+      new rpc.StreamMessageReader(server.stdout),
+      new rpc.StreamMessageWriter(server.stdin),
+    );
+    stop = () => stopServer(server, connection);
+    // settings of the folder, lifting the large document thresholds in full
+    // mode so that the whole playbook is handled as a small one
+    const settings = options.fullMode
+      ? {
+          largeDocuments: {
+            lineThreshold: Number.MAX_SAFE_INTEGER,
+            costThreshold: Number.MAX_SAFE_INTEGER,
+          },
+        }
+      : {};
+    connection.onRequest(
+      "workspace/configuration",
+      (params: { items: unknown[] }) => params.items.map(() => settings),
+    );
+    // accept registrations, progress and other client requests
+    connection.onRequest(() => null);
+    let indexReady: number | undefined;
+    let modulesCount: number | undefined;
+    connection.onNotification(
+      "ansible/docsLibraryReady",
+      (params: { modulesCount: number }) => {
+        indexReady = performance.now();
+        modulesCount = params.modulesCount;
+      },
+    );
+    connection.listen();
+
+    const workspaceUri = pathToFileURL(workspace).toString();
+    await connection.sendRequest("initialize", {
+      processId: process.pid,
+      rootUri: workspaceUri,
+      capabilities: { workspace: { configuration: true } },
+      workspaceFolders: [{ uri: workspaceUri, name: "benchmark" }],
+    });
+    const initialized = performance.now();
+    await connection.sendNotification("initialized", {});
+
+    const uri = pathToFileURL(playbook.path).toString();
+    await connection.sendNotification("textDocument/didOpen", {
+      textDocument: {
+        uri,
+        languageId: "ansible",
+        version: 1,
+        text: playbook.text,
+      },
+    });
+
+    const firstRequestStarted = performance.now();
+    const fullTokens = await sendUnlessDeclined(
+      connection,
+      "textDocument/semanticTokens/full",
+      { textDocument: { uri } },
+    );
+    const firstTokens = performance.now() - firstRequestStarted;
+
+    // line of the module of a task, spread over the playbook
+    const taskLine = (i: number) => 4 + ((i * 7919) % options.tasks) * 4;
+    const position = (line: number, character: number) => ({
+      textDocument: { uri },
+      position: { line, character },
+    });
+    const visibleRange = (line: number) => ({
+      textDocument: { uri },
+      range: {
+        start: { line: Math.max(0, line - VISIBLE_LINES / 2), character: 0 },
+        end: { line: line + VISIBLE_LINES / 2, character: 0 },
+      },
+    });
+    const requests = {
+      // declined for a document in reduced mode
+      semanticTokens: fullTokens
+        ? await measure(options.iterations, () =>
+            connection.sendRequest("textDocument/semanticTokens/full", {
+              textDocument: { uri },
+            }),
+          )
+        : null,
+      semanticTokensRange: await measure(options.iterations, (i) =>
+        connection.sendRequest(
+          "textDocument/semanticTokens/range",
+          visibleRange(taskLine(i)),
+        ),
+      ),
+      hover: await measure(options.iterations, (i) =>
+        connection.sendRequest("textDocument/hover", position(taskLine(i), 8)),
+      ),
+      optionHover: await measure(options.iterations, (i) =>
+        connection.sendRequest(
+          "textDocument/hover",
+          position(taskLine(i) + 1, 9),
+        ),
+      ),
+      completion: await measure(options.iterations, (i) =>
+        connection.sendRequest(
+          "textDocument/completion",
+          position(taskLine(i) + 1, 8),
+        ),
+      ),
+      definition: await measure(options.iterations, (i) =>
+        connection.sendRequest(
+          "textDocument/definition",
+          position(taskLine(i), 8),
+        ),
+      ),
+    };
+    const serverStats = await connection.sendRequest("ansible/perfStats");
+
+    const result = {
+      options: { ...options, output: undefined },
+      node: process.version,
+      generationTime: round(generationTime),
+      startupTime: round(initialized - started),
+      indexBuildTime:
+        indexReady !== undefined ? round(indexReady - started) : null,
+      modulesCount: modulesCount ?? null,
+      documentMode: fullTokens ? "full" : "reduced",
+      firstSemanticTokensTime: fullTokens ? round(firstTokens) : null,
+      requests: requests,
+      serverStats: serverStats,
+    };
+
+    const output = JSON.stringify(result, null, 2);
+    if (options.output) {
+      writeFileSync(options.output, `${output}\n`);
+    } else {
+      console.log(output);
+    }
+  } finally {
+    // the server must be gone before its workspace is removed
+    await stop?.();
+    rmSync(workspace, { recursive: true, force: true });
+  }
+}
+
+await main();